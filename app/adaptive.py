@@ -0,0 +1,527 @@
+"""
+Quiz adaptatif : modèle de réponse à deux paramètres (IRT 2PL)
+
+    P(bonne réponse | θ) = 1 / (1 + exp(-a (θ - b)))
+
+θ est le niveau de l'étudiant, b la difficulté de la question, a sa discrimination.
+
+Ajustement hors ligne (`python -m app.adaptive`, ou `POST /admin/adaptive/fit`) à
+partir du journal des tentatives : maximum a posteriori joint des niveaux et des
+paramètres (priors normaux), par itérations de Newton diagonales vectorisées avec
+numpy (`np.bincount` sur les tableaux de réponses). Requiert numpy.
+
+En session, après chaque réponse, le niveau est ré-estimé par espérance a posteriori
+(EAP) sur une grille fixe de `ADAPTIVE_GRID_POINTS` valeurs. La question suivante
+est la plus informative au niveau estimé (information de Fisher a² P (1 - P)) parmi
+les questions pas encore posées, et pas encore vues par l'étudiant si possible :
+calcul vectorisé sur les tableaux a et b pré-calculés de la banque, par blocs de
+questions de discrimination décroissante (l'information est au plus a²/4 : les blocs
+suivants sont ignorés dès qu'ils ne peuvent plus battre les meilleures), tirage
+parmi les `ADAPTIVE_TOP_K` meilleures pour limiter la surexposition. Sans numpy,
+les mêmes calculs sont faits en Python pur (plus lents).
+
+Questions sans paramètres ajustés (moins de `ADAPTIVE_MIN_RESPONSES` réponses) :
+a = 1, b = 0. L'état des sessions est dans le stockage : n'importe quel worker peut
+servir la réponse suivante.
+"""
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from .attempts import attempts_buffer
+from .config import adaptive_config
+from .generator import get_bank, get_seen, is_seen, record_seen
+from .grading import is_correct, record_attempt
+from .invalidation import on_invalidation, publish_invalidation
+from .storage import get_store
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle
+    np = None
+
+_DEFAULT_A = 1.0
+_DEFAULT_B = 0.0
+# Bornes de la discrimination ajustée (les valeurs extrêmes viennent de trop peu de données)
+_MIN_A, _MAX_A = 0.2, 4.0
+# Durée de validité des paramètres en mémoire (ajustement lancé depuis un autre processus)
+_PARAMS_TTL_S = 300
+# Sessions dont le masque des questions disponibles reste en mémoire (un octet par question)
+_SESSION_MASKS = 128
+# Taille du premier bloc de questions évalué par la sélection (doublée à chaque bloc)
+_SELECT_CHUNK = 1024
+
+
+class AdaptiveConflict(Exception):
+    """Session terminée, ou modifiée par une requête concurrente (réponse envoyée deux fois)."""
+
+
+# --- Ajustement hors ligne ---
+def _expit(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30.0, 30.0)))
+
+
+def fit_2pl(users, items, y, n_users: int, n_items: int, iterations: int = 100):
+    """
+    Ajuste le modèle 2PL sur des réponses : tableaux alignés d'indices d'étudiant et
+    de question, y à 1 pour une bonne réponse. Priors : θ ~ N(0, 1), b ~ N(0, 2²),
+    log a ~ N(0, 0.5²). Retourne (a, b, theta).
+    """
+    y = np.asarray(y, dtype=float)
+    theta = np.zeros(n_users)
+    b = np.zeros(n_items)
+    log_a = np.zeros(n_items)
+    for _ in range(iterations):
+        a = np.exp(log_a)[items]
+        # Niveaux, à paramètres fixés
+        p = _expit(a * (theta[users] - b[items]))
+        grad = np.bincount(users, a * (y - p), n_users) - theta
+        hess = np.bincount(users, a * a * p * (1 - p), n_users) + 1.0
+        theta += np.clip(grad / hess, -1.0, 1.0)
+        # Difficultés
+        p = _expit(a * (theta[users] - b[items]))
+        grad = np.bincount(items, -a * (y - p), n_items) - b / 4.0
+        hess = np.bincount(items, a * a * p * (1 - p), n_items) + 0.25
+        b += np.clip(grad / hess, -1.0, 1.0)
+        # Discriminations (en log : a reste positif)
+        d = theta[users] - b[items]
+        p = _expit(a * d)
+        grad = np.bincount(items, a * d * (y - p), n_items) - log_a / 0.25
+        hess = np.bincount(items, (a * d) ** 2 * p * (1 - p), n_items) + 4.0
+        log_a = np.clip(log_a + np.clip(grad / hess, -0.5, 0.5), math.log(_MIN_A), math.log(_MAX_A))
+    return np.exp(log_a), b, theta
+
+
+def fit_from_attempts(min_responses: int | None = None, iterations: int | None = None) -> dict:
+    """Ajuste les paramètres des questions sur tout le journal des tentatives et les enregistre."""
+    if np is None:
+        raise RuntimeError("numpy requis pour l'ajustement des paramètres IRT")
+    min_responses = adaptive_config["min_responses"] if min_responses is None else min_responses
+    iterations = adaptive_config["fit_iterations"] if iterations is None else iterations
+    started = time.perf_counter()
+    attempts_buffer.flush()
+    known: set[str] = set()
+    # Tentatives anciennes sans qid : rattachées par intitulé, seulement s'il est unique
+    qid_by_text: dict[str, str | None] = {}
+    for q in get_bank().questions.values():
+        known.add(q["qid"])
+        qid_by_text[q["question"]] = None if q["question"] in qid_by_text else q["qid"]
+    students: dict[str, int] = {}
+    questions: dict[str, int] = {}
+    users, items, ys = [], [], []
+    for user, qid, question, correct in get_store().attempt_outcomes():
+        if qid is None:
+            qid = qid_by_text.get(question)
+        if qid not in known or user is None:
+            continue  # question supprimée depuis, ou intitulé ambigu
+        users.append(students.setdefault(user, len(students)))
+        items.append(questions.setdefault(qid, len(questions)))
+        ys.append(correct)
+    rows = []
+    fitted_at = datetime.utcnow().isoformat()
+    if ys:
+        items_arr = np.array(items, dtype=np.intp)
+        a, b, _ = fit_2pl(np.array(users, dtype=np.intp), items_arr, np.array(ys, dtype=float),
+                          len(students), len(questions), iterations)
+        counts = np.bincount(items_arr, minlength=len(questions))
+        rows = [
+            {"qid": qid, "a": round(float(a[i]), 4), "b": round(float(b[i]), 4), "n": int(counts[i]),
+             "fitted_at": fitted_at}
+            for qid, i in questions.items() if counts[i] >= min_responses
+        ]
+    get_store().save_item_params(rows)
+    adaptive_engine.reload()
+    publish_invalidation("adaptive", {"fitted_at": fitted_at})
+    return {
+        "responses": len(ys),
+        "students": len(students),
+        "questions": len(questions),
+        "fitted": len(rows),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+# --- Sélection des questions en session ---
+class ItemArrays:
+    """Paramètres de la banque en tableaux alignés : position -> ordinal, a, b."""
+
+    def __init__(self, bank, params: dict):
+        self.bank = bank
+        self.version = bank.version
+        self.ordinals = list(bank.questions)
+        self.position = {o: i for i, o in enumerate(self.ordinals)}
+        ab = [params.get(bank.questions[o]["qid"], (_DEFAULT_A, _DEFAULT_B)) for o in self.ordinals]
+        if np is not None:
+            self.ordinals_arr = np.array(self.ordinals, dtype=np.int64)
+            # Octet et bit de chaque question dans les bitsets « déjà vues »
+            self._seen_byte = self.ordinals_arr >> 3
+            self._seen_bit = (1 << (self.ordinals_arr & 7)).astype(np.uint8)
+            self.a = np.array([x[0] for x in ab], dtype=float)
+            self.b = np.array([x[1] for x in ab], dtype=float)
+        else:
+            self.a = [x[0] for x in ab]
+            self.b = [x[1] for x in ab]
+        self._eligible: dict[tuple, object] = {}
+
+    def eligible(self, theme: str | None, test: str | None):
+        """
+        Positions des questions du thème/test, par discrimination décroissante puis difficulté
+        avec numpy (calculées une fois par couple ; seuls les thèmes et tests de la banque
+        sont gardés).
+        """
+        key = (theme, test)
+        positions = self._eligible.get(key)
+        if positions is None:
+            positions = [self.position[o] for o in self.bank.candidates(theme, test) if o in self.position]
+            if np is not None:
+                positions = np.array(positions, dtype=np.intp)
+                positions = positions[np.lexsort((self.b[positions], -self.a[positions]))]
+            if (theme is None or theme in self.bank.by_theme) and (test is None or test in self.bank.by_test):
+                self._eligible[key] = positions
+        return positions
+
+    def unseen(self, seen: bytearray | None):
+        """Masque (par position) des questions absentes du bitset « déjà vues » (numpy)."""
+        mask = np.ones(len(self.ordinals), dtype=bool)
+        if seen:
+            buf = np.frombuffer(bytes(seen), dtype=np.uint8)
+            inside = self._seen_byte < len(buf)
+            mask[inside] = (buf[self._seen_byte[inside]] & self._seen_bit[inside]) == 0
+        return mask
+
+    def __len__(self):
+        return len(self.ordinals)
+
+
+class AdaptiveEngine:
+    """Estimation du niveau (EAP sur grille) et choix de la question la plus informative."""
+
+    def __init__(self, grid_points: int = 81, theta_range: float = 4.0, top_k: int = 3):
+        self.top_k = max(1, top_k)
+        step = 2 * theta_range / (grid_points - 1)
+        grid = [-theta_range + i * step for i in range(grid_points)]
+        if np is not None:
+            self.grid = np.array(grid)
+            self.log_prior = -self.grid ** 2 / 2
+        else:
+            self.grid = grid
+            self.log_prior = [-t * t / 2 for t in grid]
+        self._params: dict | None = None
+        self._params_loaded = 0.0
+        self._arrays: ItemArrays | None = None
+        self._masks: OrderedDict = OrderedDict()  # session -> (tableaux, masque des disponibles)
+        self._lock = threading.Lock()
+        self.fitted_at = None
+        self.selections = 0
+        self.total_select_ms = 0.0
+        self.max_select_ms = 0.0
+
+    def reload(self):
+        """Oublie paramètres et tableaux : relus au prochain appel."""
+        with self._lock:
+            self._params = None
+            self._arrays = None
+            self._masks.clear()
+
+    def params(self) -> dict:
+        params = self._params
+        if params is None or time.monotonic() - self._params_loaded > _PARAMS_TTL_S:
+            rows = get_store().load_item_params()
+            params = {r["qid"]: (float(r["a"]), float(r["b"])) for r in rows}
+            with self._lock:
+                self._params = params
+                self._params_loaded = time.monotonic()
+                self._arrays = None
+                self.fitted_at = max((r.get("fitted_at") or "" for r in rows), default=None) or None
+        return params
+
+    def arrays(self) -> ItemArrays:
+        """Tableaux de la banque courante (reconstruits après modification de la banque)."""
+        params = self.params()
+        bank = get_bank()
+        arrays = self._arrays
+        if arrays is None or arrays.bank is not bank or arrays.version != bank.version:
+            arrays = ItemArrays(bank, params)
+            with self._lock:
+                self._arrays = arrays
+        return arrays
+
+    def estimate(self, responses: list[tuple[float, float, bool]]) -> tuple[float, float]:
+        """Niveau estimé (EAP) et erreur type, à partir des réponses (a, b, correct)."""
+        if np is not None:
+            if responses:
+                a, b, y = (np.array(col, dtype=float) for col in zip(*responses))
+                z = a[:, None] * (self.grid[None, :] - b[:, None])
+                # log P = -log(1 + e^-z), log (1 - P) = -log(1 + e^z)
+                loglik = -(y[:, None] * np.logaddexp(0, -z) + (1 - y)[:, None] * np.logaddexp(0, z)).sum(axis=0)
+            else:
+                loglik = 0.0
+            post = self.log_prior + loglik
+            w = np.exp(post - post.max())
+            w /= w.sum()
+            theta = float((w * self.grid).sum())
+            return theta, float(math.sqrt((w * (self.grid - theta) ** 2).sum()))
+        post = list(self.log_prior)
+        for a, b, y in responses:
+            for j, t in enumerate(self.grid):
+                z = a * (t - b)
+                post[j] -= math.log1p(math.exp(-z)) if y else math.log1p(math.exp(z))
+        top = max(post)
+        w = [math.exp(p - top) for p in post]
+        total = sum(w)
+        theta = sum(wi * t for wi, t in zip(w, self.grid)) / total
+        return theta, math.sqrt(sum(wi * (t - theta) ** 2 for wi, t in zip(w, self.grid)) / total)
+
+    def _available(self, arrays: ItemArrays, seen: bytearray | None, exclude: set, session: str | None):
+        """
+        Masque (par position) des questions ni vues ni posées. Le bitset « déjà vues » n'est
+        lu qu'une fois par session ; les questions posées sont ensuite retirées sur place.
+        """
+        entry = None
+        if session is not None:
+            with self._lock:
+                entry = self._masks.get(session)
+                if entry is not None:
+                    self._masks.move_to_end(session)
+        if entry is not None and entry[0] is arrays:
+            mask = entry[1]
+        else:
+            mask = arrays.unseen(seen)
+            if session is not None:
+                with self._lock:
+                    self._masks[session] = (arrays, mask)
+                    while len(self._masks) > _SESSION_MASKS:
+                        self._masks.popitem(last=False)
+        for ordinal in exclude:
+            pos = arrays.position.get(ordinal)
+            if pos is not None:
+                mask[pos] = False
+        return mask
+
+    def _best(self, arrays: ItemArrays, theta: float, eligible, mask):
+        """
+        Les top_k positions les plus informatives parmi eligible (par a décroissant) où mask
+        est vrai. Blocs de taille croissante, arrêt dès que a²/4 du bloc suivant ne dépasse
+        plus la k-ième meilleure information : résultat exact sans évaluer toute la banque.
+        """
+        k = self.top_k
+        best = np.empty(0, dtype=np.intp)
+        best_info = np.empty(0)
+        start, size = 0, _SELECT_CHUNK
+        while start < len(eligible):
+            first, last = eligible[start], eligible[-1]
+            if arrays.a[first] == arrays.a[last] and arrays.b[first] == arrays.b[last]:
+                # Reste à paramètres identiques (questions non ajustées : a = 1, b = 0) :
+                # même information pour toutes, les k premières disponibles suffisent
+                a = arrays.a[first]
+                p = 1.0 / (1.0 + np.exp(-a * (theta - arrays.b[first])))
+                info = a * a * p * (1 - p)
+                if len(best) == k and best_info.min() >= info:
+                    break
+                tail = [best]
+                found = 0
+                while start < len(eligible) and found < k:
+                    chunk = eligible[start:start + size]
+                    chunk = chunk[mask[chunk]][:k - found]
+                    tail.append(chunk)
+                    found += len(chunk)
+                    start += size
+                    size *= 2
+                best = np.concatenate(tail)
+                best_info = np.concatenate((best_info, np.full(found, info)))
+                if len(best) > k:
+                    best = best[np.argpartition(best_info, -k)[-k:]]
+                break
+            chunk = eligible[start:start + size]
+            chunk = chunk[mask[chunk]]
+            start += size
+            size *= 2
+            if len(chunk):
+                a = arrays.a[chunk]
+                p = 1.0 / (1.0 + np.exp(-a * (theta - arrays.b[chunk])))
+                best = np.concatenate((best, chunk))
+                best_info = np.concatenate((best_info, a * a * p * (1 - p)))
+                if len(best) > k:
+                    top = np.argpartition(best_info, -k)[-k:]
+                    best, best_info = best[top], best_info[top]
+            if len(best) == k and start < len(eligible):
+                a_next = arrays.a[eligible[start]]
+                if a_next * a_next / 4 <= best_info.min():
+                    break
+        return best
+
+    def select(self, arrays: ItemArrays, theta: float, eligible, exclude: set,
+               seen: bytearray | None = None, rng: random.Random | None = None,
+               session: str | None = None) -> int | None:
+        """
+        Ordinal de la question la plus informative au niveau theta, hors `exclude`
+        (ordinaux déjà posés) et, s'il en reste, hors questions déjà vues. Avec `session`,
+        le masque des questions disponibles est gardé d'une étape à l'autre.
+        """
+        rng = rng or random
+        started = time.perf_counter()
+        if np is not None:
+            best = self._best(arrays, theta, eligible, self._available(arrays, seen, exclude, session))
+            if not len(best) and seen:
+                # Toutes les questions restantes déjà vues : elles redeviennent candidates
+                mask = np.ones(len(arrays), dtype=bool)
+                mask[[arrays.position[o] for o in exclude if o in arrays.position]] = False
+                best = self._best(arrays, theta, eligible, mask)
+            if not len(best):
+                return None
+            chosen = arrays.ordinals[best[rng.randrange(len(best))]]
+        else:
+            candidates = [i for i in eligible if arrays.ordinals[i] not in exclude]
+            fresh = [i for i in candidates if not is_seen(seen, arrays.ordinals[i])]
+            candidates = fresh or candidates
+            if not candidates:
+                return None
+
+            def info(i):
+                a = arrays.a[i]
+                p = 1.0 / (1.0 + math.exp(-a * (theta - arrays.b[i])))
+                return a * a * p * (1 - p)
+            best = sorted(candidates, key=info, reverse=True)[:self.top_k]
+            chosen = arrays.ordinals[rng.choice(best)]
+        elapsed = (time.perf_counter() - started) * 1000
+        self.selections += 1
+        self.total_select_ms += elapsed
+        self.max_select_ms = max(self.max_select_ms, elapsed)
+        return chosen
+
+    def stats(self) -> dict:
+        arrays = self._arrays
+        return {
+            "numpy": np is not None,
+            "fitted_questions": len(self._params or {}),
+            "fitted_at": self.fitted_at,
+            "bank_questions": len(arrays) if arrays is not None else None,
+            "session_masks": len(self._masks),
+            "selections": self.selections,
+            "avg_select_ms": round(self.total_select_ms / self.selections, 4) if self.selections else 0.0,
+            "max_select_ms": round(self.max_select_ms, 4),
+        }
+
+
+adaptive_engine = AdaptiveEngine(
+    grid_points=adaptive_config["grid_points"],
+    theta_range=adaptive_config["theta_range"],
+    top_k=adaptive_config["top_k"],
+)
+
+
+@on_invalidation("adaptive")
+def _reload_remote_params(payload: dict | None):
+    """Paramètres ré-ajustés par un autre worker."""
+    adaptive_engine.reload()
+
+
+# --- Sessions adaptatives ---
+def _item(arrays: ItemArrays, ordinal: int) -> dict:
+    """Question posée, avec ses paramètres au moment du tirage (estimations stables en cours de session)."""
+    pos = arrays.position[ordinal]
+    return {
+        "ordinal": ordinal,
+        "a": float(arrays.a[pos]),
+        "b": float(arrays.b[pos]),
+        "q": dict(arrays.bank.questions[ordinal]),
+        "ok": None,
+    }
+
+
+def _session_state(session_id: str, doc: dict) -> dict:
+    """Forme renvoyée par l'API : niveau estimé, progression, question en cours (sans la correction)."""
+    items = doc["items"]
+    answered = [i for i in items if i["ok"] is not None]
+    current = None
+    if not doc["done"] and items and items[-1]["ok"] is None:
+        q = items[-1]["q"]
+        current = {"index": len(items) - 1, "qid": q["qid"], "question": q["question"],
+                   "theme": q["theme"], "test": q["test"], "choix": q["choix"]}
+    return {
+        "session_id": session_id,
+        "user": doc["user"],
+        "theme": doc.get("theme"),
+        "test": doc.get("test"),
+        "theta": round(doc["theta"], 4) + 0.0,  # pas de « -0.0 »
+        "se": round(doc["se"], 4),
+        "answered": len(answered),
+        "score": sum(1 for i in answered if i["ok"]),
+        "max_items": doc["max_items"],
+        "done": doc["done"],
+        "question": current,
+    }
+
+
+def start_session(username: str, theme: str | None = None, test: str | None = None,
+                  max_items: int | None = None, target_se: float | None = None) -> dict | None:
+    """Ouvre une session adaptative et tire la première question (None si aucune question disponible)."""
+    arrays = adaptive_engine.arrays()
+    theta, se = adaptive_engine.estimate([])
+    ordinal = adaptive_engine.select(arrays, theta, arrays.eligible(theme, test), set(), get_seen(username))
+    if ordinal is None:
+        return None
+    doc = {
+        "user": username,
+        "theme": theme,
+        "test": test,
+        "max_items": max_items or adaptive_config["max_items"],
+        "target_se": target_se or adaptive_config["target_se"],
+        "created_at": datetime.utcnow(),
+        "items": [_item(arrays, ordinal)],
+        "theta": theta,
+        "se": se,
+        "done": False,
+    }
+    session_id = get_store().insert_adaptive_session(doc)
+    return _session_state(session_id, doc)
+
+
+def get_session(session_id: str) -> dict | None:
+    doc = get_store().find_adaptive_session(session_id)
+    return _session_state(session_id, doc) if doc else None
+
+
+def answer(session_id: str, username: str, reponse: list[str]) -> dict | None:
+    """
+    Corrige la réponse à la question en cours, ré-estime le niveau et tire la question
+    suivante (ou termine la session). None si la session n'existe pas.
+    """
+    store = get_store()
+    doc = store.find_adaptive_session(session_id)
+    if doc is None:
+        return None
+    if doc["user"] != username:
+        raise PermissionError("Session d'un autre utilisateur")
+    items = doc["items"]
+    if doc["done"] or not items or items[-1]["ok"] is not None:
+        raise AdaptiveConflict("Session terminée")
+    item = items[-1]
+    q = item["q"]
+    ok = is_correct(frozenset(q["correct"]), reponse)
+    item["ok"] = ok
+    theta, se = adaptive_engine.estimate([(i["a"], i["b"], i["ok"]) for i in items])
+    done = len(items) >= doc["max_items"] or se <= doc["target_se"]
+    if not done:
+        arrays = adaptive_engine.arrays()
+        ordinal = adaptive_engine.select(arrays, theta, arrays.eligible(doc.get("theme"), doc.get("test")),
+                                         {i["ordinal"] for i in items}, get_seen(username), session=session_id)
+        if ordinal is None:
+            done = True
+        else:
+            items.append(_item(arrays, ordinal))
+    doc.update(theta=theta, se=se, done=done)
+    if not store.update_adaptive_session(session_id, doc["v"], {"items": items, "theta": theta, "se": se,
+                                                                "done": done}):
+        raise AdaptiveConflict("Réponse déjà enregistrée")
+    record_attempt(username, None, q["question"], reponse, ok, q["theme"], q["test"], q["choix"], qid=q["qid"])
+    record_seen(username, [item["ordinal"]])
+    return {**_session_state(session_id, doc), "correct": ok, "correct_answers": sorted(q["correct"])}
+
+
+if __name__ == "__main__":
+    # Ajustement hors ligne : python -m app.adaptive
+    print(fit_from_attempts())
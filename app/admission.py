@@ -0,0 +1,218 @@
+"""
+Contrôle d'admission et délestage des requêtes HTTP
+
+Chaque requête est rangée dans une classe (authentification bcrypt, traitements
+lourds d'administration / d'export, lectures courantes) dotée de sa propre limite
+de requêtes simultanées et de sa file d'attente. Une connexion en masse ou un gros
+export ne peut ainsi occuper qu'une partie du threadpool : les lectures des
+étudiants gardent leurs threads.
+
+La file suit le principe de CoDel : tant que le temps d'attente des requêtes
+admises reste sous `target_ms`, rien n'est rejeté. S'il reste au-dessus pendant
+tout un intervalle (`interval_ms`), la file est jugée engorgée : les nouvelles
+arrivées et les requêtes qui ont déjà trop attendu sont rejetées aussitôt (503 +
+`Retry-After`) au lieu d'expirer côté navigateur.
+"""
+import asyncio
+import time
+from collections import deque
+
+from .config import admission_config
+from .responses import FastJSONResponse
+
+# Routes jamais limitées : sondes, documentation, métriques d'admission, flux en direct (connexions longues)
+# Le frontend (/app) : fichiers sur disque, téléchargements audio longs
+_EXEMPT_PREFIXES = ("/healthz", "/readyz", "/docs", "/redoc", "/openapi.json", "/admin/admission", "/app/")
+_EXEMPT_SUFFIXES = ("/live/events",)
+
+# Routes hachant un mot de passe (bcrypt)
+_AUTH_ROUTES = {("POST", "/login"), ("POST", "/register")}
+
+# Traitements lourds : administration, exports, imports et générations en lot
+_BULK_PREFIXES = ("/admin/", "/stats/")
+_BULK_ROUTES = {("POST", "/questions/import"), ("POST", "/quiz/create_batch"), ("GET", "/users")}
+
+
+def classify(method: str, path: str, query_string: bytes = b"") -> str | None:
+    """Classe d'admission d'une requête (« auth », « bulk », « read »), None si elle n'est pas limitée."""
+    if path.startswith(_EXEMPT_PREFIXES) or path.endswith(_EXEMPT_SUFFIXES) or method == "OPTIONS":
+        return None
+    if (method, path) in _AUTH_ROUTES or (method == "PUT" and path.endswith("/password")):
+        return "auth"
+    if path.startswith(_BULK_PREFIXES) or (method, path) in _BULK_ROUTES:
+        return "bulk"
+    if path == "/questions" and method == "GET" and b"admin=true" in query_string:
+        return "bulk"  # export complet de la banque (mode admin)
+    return "read"
+
+
+class Rejected(Exception):
+    """Requête délestée ; reason : « queue_full », « overloaded » ou « timeout »."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionClass:
+    """Limite de concurrence et file d'attente CoDel d'une classe de requêtes (boucle asyncio)."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, target_ms: float,
+                 interval_ms: float, max_wait_ms: float, clock=time.monotonic):
+        self.name = name
+        self.clock = clock  # horloge des temps d'attente (injectable pour les tests)
+        self.limit = limit
+        self.max_queue = max_queue
+        self.target = target_ms / 1000
+        self.interval = interval_ms / 1000
+        self.max_wait = max_wait_ms / 1000
+        self.active = 0
+        self._waiters: deque = deque()  # (arrivée, future)
+        self._first_above: float | None = None
+        self.overloaded = False
+        # Métriques
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "overloaded": 0, "timeout": 0}
+        self.wait_ewma_ms = 0.0
+        self.service_ewma_ms = 0.0
+        self.max_queued = 0
+
+    # --- CoDel ---
+    def _observe(self, sojourn: float, now: float):
+        """Met à jour l'état d'engorgement à partir du temps d'attente d'une requête admise."""
+        self.wait_ewma_ms += 0.1 * (sojourn * 1000 - self.wait_ewma_ms)
+        if sojourn < self.target:
+            # Attente acceptable : fin de l'engorgement
+            self._first_above = None
+            self.overloaded = False
+        elif self._first_above is None:
+            self._first_above = now + self.interval
+        elif now >= self._first_above:
+            self.overloaded = True
+
+    def retry_after(self) -> int:
+        """Délai conseillé au client (s) : temps estimé pour écouler la file actuelle."""
+        per_slot = max(self.service_ewma_ms, 1.0) / 1000
+        estimate = (len(self._waiters) + 1) * per_slot / max(self.limit, 1)
+        return int(min(max(estimate, 1), 30))
+
+    def _reject(self, reason: str):
+        self.shed[reason] += 1
+        raise Rejected(reason, self.retry_after())
+
+    async def acquire(self):
+        """Attend une place (lève Rejected si la requête est délestée)."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+        if self.overloaded:
+            # File engorgée : rejet immédiat plutôt qu'une attente vouée à expirer
+            self._reject("overloaded")
+        arrived = self.clock()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((arrived, future))
+        self.max_queued = max(self.max_queued, len(self._waiters))
+        try:
+            admitted = await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            self._reject("timeout")
+        except asyncio.CancelledError:
+            # Client parti : si la place venait de nous être transmise, on la rend
+            if future.done() and not future.cancelled() and future.result():
+                self.release(0.0)
+            raise
+        if not admitted:
+            self._reject("overloaded")
+        self.admitted += 1
+
+    def release(self, service_s: float):
+        """Libère une place : transmise à la prochaine requête en attente, ou rendue."""
+        if service_s:
+            self.service_ewma_ms += 0.1 * (service_s * 1000 - self.service_ewma_ms)
+        now = self.clock()
+        while self._waiters:
+            arrived, future = self._waiters.popleft()
+            if future.done():  # expirée ou annulée
+                continue
+            sojourn = now - arrived
+            self._observe(sojourn, now)
+            if self.overloaded and sojourn > self.target:
+                future.set_result(False)  # a déjà trop attendu : délestée
+                continue
+            future.set_result(True)  # la place passe directement à cette requête
+            return
+        self.active -= 1
+        # File vide : fin de l'engorgement
+        self._first_above = None
+        self.overloaded = False
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_queued": self.max_queued,
+            "overloaded": self.overloaded,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "queue_wait_ewma_ms": round(self.wait_ewma_ms, 2),
+            "service_ewma_ms": round(self.service_ewma_ms, 2),
+        }
+
+
+class AdmissionController:
+    """Classes d'admission configurées (voir admission_config)."""
+
+    def __init__(self, classes: dict[str, dict], enabled: bool = True, clock=time.monotonic):
+        self.enabled = enabled
+        self._config = classes
+        self._clock = clock
+        self.classes: dict[str, AdmissionClass] = {}
+
+    def get(self, name: str) -> AdmissionClass:
+        # Créées à la demande : les futures appartiennent à la boucle du worker
+        cls = self.classes.get(name)
+        if cls is None:
+            cls = self.classes[name] = AdmissionClass(name, **self._config[name], clock=self._clock)
+        return cls
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "classes": {n: self.get(n).stats() for n in self._config}}
+
+
+admission = AdmissionController(admission_config["classes"], enabled=admission_config["enabled"])
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI : admet, met en file ou déleste (503 + Retry-After) chaque requête HTTP."""
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.enabled:
+            return await self.app(scope, receive, send)
+        name = classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        if name is None:
+            return await self.app(scope, receive, send)
+        cls = self.controller.get(name)
+        try:
+            await cls.acquire()
+        except Rejected as exc:
+            response = FastJSONResponse(
+                {"detail": "Service momentanément surchargé, réessayez plus tard",
+                 "class": name, "reason": exc.reason},
+                status_code=503,
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            return await response(scope, receive, send)
+        started = cls.clock()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            cls.release(cls.clock() - started)
@@ -0,0 +1,235 @@
+"""
+Rétention des sessions de quiz : archivage à froid sur disque local
+
+Les sessions plus anciennes que `SESSION_RETENTION_DAYS` quittent la collection
+`quiz_sessions` pour des fichiers NDJSON compressés en gzip, partitionnés par jour
+de création :
+
+    data/archive/quiz_sessions/2025/03/2025-03-14.ndjson.gz
+
+Chaque passage ajoute un membre gzip au fichier du jour (un fichier gzip peut en
+contenir plusieurs) ; les documents ne sont supprimés de MongoDB qu'une fois le
+fichier écrit et synchronisé sur disque. Un index TTL sur `created_at` supprime de
+toute façon les sessions plus vieilles que rétention + `SESSION_TTL_GRACE_DAYS`,
+même si l'archivage est arrêté.
+
+Un seul worker archive à la fois (bail dans la collection `locks`). Les archives
+sont sur le disque local : activer l'archivage sur un seul nœud, ou partager
+`ARCHIVE_DIR` entre les nœuds. Stockage MongoDB uniquement (`STORAGE_BACKEND=mongo`).
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from .config import archive_config
+from .questions import sessions_cache
+from .responses import dumps
+from .storage import get_store
+from .storage.mongo import get_db, get_sessions
+
+logger = logging.getLogger("miskatonic")
+
+_LEASE_ID = "archive_sessions"
+
+
+def ensure_indexes():
+    """Index de quiz_sessions : tri par date (liste, archivage) et TTL de secours."""
+    coll = get_sessions()
+    ttl = int(timedelta(days=archive_config["retention_days"] + archive_config["ttl_grace_days"]).total_seconds())
+    try:
+        coll.create_index("created_at", expireAfterSeconds=ttl)
+    except OperationFailure:
+        # Index existant avec un autre délai (configuration modifiée) : mise à jour en place
+        get_db().command("collMod", coll.name, index={"keyPattern": {"created_at": 1}, "expireAfterSeconds": ttl})
+    coll.create_index([("user", 1), ("created_at", -1)])
+
+
+def partition_path(day: datetime) -> str:
+    """Fichier d'archive des sessions créées le jour `day`."""
+    return os.path.join(archive_config["dir"], "quiz_sessions", f"{day:%Y}", f"{day:%m}", f"{day:%Y-%m-%d}.ndjson.gz")
+
+
+def _archive_record(doc: dict) -> dict:
+    record = {k: v for k, v in doc.items() if k != "_id"}
+    record["quiz_id"] = str(doc["_id"])
+    if isinstance(doc.get("created_at"), datetime):
+        record["created_at"] = doc["created_at"].isoformat()
+    return record
+
+
+def _append_partition(path: str, docs: list[dict]) -> int:
+    """Ajoute un membre gzip au fichier de la partition, synchronisé sur disque. Retourne les octets écrits."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    body = b"".join(dumps(_archive_record(doc)) + b"\n" for doc in docs)
+    member = gzip.compress(body, compresslevel=archive_config["gzip_level"])
+    with open(path, "ab") as f:
+        f.write(member)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(member)
+
+
+def find_archived_session(quiz_id: str) -> dict | None:
+    """
+    Cherche une session archivée en lisant en flux le fichier de son jour de création
+    (déduit de l'ObjectId), sans décompresser tout le fichier en mémoire. Seules les
+    lignes contenant l'identifiant sont décodées ; la clé quiz_id de premier niveau
+    est vérifiée (l'identifiant peut apparaître ailleurs dans une autre session).
+    """
+    try:
+        created = ObjectId(quiz_id).generation_time.replace(tzinfo=None)
+    except Exception:
+        return None
+    # created_at précède de quelques millisecondes l'ObjectId : la veille aussi, vers minuit
+    for day in (created, created - timedelta(days=1)):
+        path = partition_path(day)
+        if not os.path.exists(path):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if quiz_id in line:
+                    record = json.loads(line)
+                    if record.get("quiz_id") == quiz_id:
+                        return record
+    return None
+
+
+class SessionArchiver:
+    """Déplace périodiquement les sessions expirées vers les archives compressées."""
+
+    def __init__(self, retention_days: float = 90, batch_size: int = 1000,
+                 interval_s: float = 3600, lease_s: float = 600):
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval_s = interval_s
+        self.lease_s = lease_s
+        self.owner = uuid.uuid4().hex
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.runs = 0
+        self.archived = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.last_run: dict | None = None
+
+    def _acquire_lease(self) -> bool:
+        """Bail MongoDB : un seul archiveur actif parmi les workers."""
+        now = datetime.utcnow()
+        try:
+            get_db().locks.find_one_and_update(
+                {"_id": _LEASE_ID, "$or": [{"until": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "until": now + timedelta(seconds=self.lease_s)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return True
+        except DuplicateKeyError:
+            return False  # bail détenu par un autre worker
+
+    def _release_lease(self):
+        get_db().locks.update_one({"_id": _LEASE_ID, "owner": self.owner},
+                                  {"$set": {"until": datetime.utcnow()}})
+
+    def run_once(self) -> dict:
+        """Archive toutes les sessions plus anciennes que la rétention. Retourne le bilan du passage."""
+        if get_store().backend != "mongo":
+            return {"skipped": "archivage disponible avec le stockage MongoDB uniquement"}
+        with self._run_lock:
+            if not self._acquire_lease():
+                return {"skipped": "archivage en cours sur un autre worker"}
+            started = time.perf_counter()
+            cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+            archived, written, files = 0, 0, set()
+            try:
+                coll = get_sessions()
+                while not self._stop.is_set():
+                    docs = list(coll.find({"created_at": {"$lt": cutoff}}).sort("created_at", 1).limit(self.batch_size))
+                    if not docs:
+                        break
+                    partitions: dict[str, list[dict]] = {}
+                    for doc in docs:
+                        partitions.setdefault(partition_path(doc["created_at"]), []).append(doc)
+                    for path, part in partitions.items():
+                        written += _append_partition(path, part)
+                        files.add(path)
+                    # Suppression seulement après écriture durable de toutes les partitions du lot
+                    ids = [doc["_id"] for doc in docs]
+                    coll.delete_many({"_id": {"$in": ids}})
+                    # Sessions anciennes, rarement encore en cache ailleurs : seule la copie locale est retirée
+                    for oid in ids:
+                        sessions_cache.invalidate(str(oid))
+                    archived += len(docs)
+                    if not self._acquire_lease():  # prolonge le bail pour le lot suivant
+                        break
+            except Exception as exc:
+                self.errors += 1
+                logger.warning("Archivage des sessions interrompu (%s)", exc)
+            finally:
+                self._release_lease()
+            self.runs += 1
+            self.archived += archived
+            self.bytes_written += written
+            self.last_run = {
+                "at": datetime.utcnow().isoformat(),
+                "cutoff": cutoff.isoformat(),
+                "archived": archived,
+                "files": len(files),
+                "bytes": written,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            return self.last_run
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception as exc:  # MongoDB injoignable : nouvel essai au prochain intervalle
+                self.errors += 1
+                logger.warning("Archivage des sessions impossible (%s)", exc)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="session-archiver", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def stats(self) -> dict:
+        root = os.path.join(archive_config["dir"], "quiz_sessions")
+        files = size = 0
+        for dirpath, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(".ndjson.gz"):
+                    files += 1
+                    size += os.path.getsize(os.path.join(dirpath, name))
+        return {
+            "retention_days": self.retention_days,
+            "runs": self.runs,
+            "archived": self.archived,
+            "errors": self.errors,
+            "last_run": self.last_run,
+            "archive_files": files,
+            "archive_bytes": size,
+        }
+
+
+session_archiver = SessionArchiver(
+    retention_days=archive_config["retention_days"],
+    batch_size=archive_config["batch_size"],
+    interval_s=archive_config["interval_s"],
+)
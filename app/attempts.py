@@ -0,0 +1,142 @@
+"""
+Journal des tentatives (réponses des étudiants) en écriture différée
+
+Chaque réponse corrigée est ajoutée à un tampon mémoire borné ; un thread
+d'arrière-plan le vide vers le journal `attempts` du stockage par lots, dès que `batch_size` entrées sont en attente ou toutes les
+`flush_interval_s` secondes. Quand le tampon est plein, l'appelant attend
+(contre-pression) au plus `block_timeout_s` avant que l'entrée ne soit perdue.
+Le tampon est vidé à l'arrêt de l'application (lifespan).
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from .config import attempts_config
+from .storage import PartialWriteError, get_store
+
+logger = logging.getLogger("miskatonic")
+
+
+class AttemptBuffer:
+    """Tampon borné vidé par lots vers le stockage (une écriture groupée par lot)."""
+
+    def __init__(self, max_items: int = 10000, batch_size: int = 500,
+                 flush_interval_s: float = 1.0, block_timeout_s: float = 0.5, writer=None):
+        self.max_items = max_items
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.block_timeout_s = block_timeout_s
+        self._writer = writer or (lambda docs: get_store().insert_attempts(docs))
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stop = False
+        self._thread: threading.Thread | None = None
+        # Métriques
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.errors = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def record(self, doc: dict) -> bool:
+        """Ajoute une tentative ; attend si le tampon est plein. Retourne False si elle est perdue."""
+        with self._cond:
+            if len(self._items) >= self.max_items:
+                self.blocked += 1
+                self._cond.notify_all()
+                if not self._cond.wait_for(lambda: len(self._items) < self.max_items, self.block_timeout_s):
+                    self.dropped += 1
+                    return False
+            self._items.append(doc)
+            self.enqueued += 1
+            if len(self._items) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self) -> int:
+        """Écrit tout le contenu du tampon, par lots de batch_size. Retourne le nombre écrit."""
+        total = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    n = min(len(self._items), self.batch_size)
+                    batch = [self._items.popleft() for _ in range(n)]
+                    # De la place s'est libérée : on réveille les producteurs en attente
+                    self._cond.notify_all()
+                if not batch:
+                    return total
+                started = time.perf_counter()
+                try:
+                    self._writer(batch)
+                except Exception as exc:
+                    self.errors += 1
+                    logger.warning("Journal des tentatives : écriture impossible (%s)", exc)
+                    # Écriture partielle : seules les entrées non écrites sont remises en file
+                    retry = exc.failed if isinstance(exc, PartialWriteError) else batch
+                    self.written += len(batch) - len(retry)
+                    total += len(batch) - len(retry)
+                    with self._cond:
+                        # On remet le lot en tête si la place le permet, sinon il est perdu
+                        room = max(0, self.max_items - len(self._items))
+                        self._items.extendleft(reversed(retry[:room]))
+                        self.dropped += len(retry) - min(room, len(retry))
+                    return total
+                elapsed = (time.perf_counter() - started) * 1000
+                self.flushes += 1
+                self.last_flush_ms = round(elapsed, 2)
+                self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+                self.written += len(batch)
+                total += len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stop or len(self._items) >= self.batch_size,
+                                    self.flush_interval_s)
+                stopping = self._stop
+            self.flush()
+            if stopping:
+                return
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="attempts-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Arrête le thread après un dernier vidage complet du tampon."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "max_items": self.max_items,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "errors": self.errors,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+        }
+
+
+attempts_buffer = AttemptBuffer(
+    max_items=attempts_config["max_items"],
+    batch_size=attempts_config["batch_size"],
+    flush_interval_s=attempts_config["flush_interval_s"],
+    block_timeout_s=attempts_config["block_timeout_s"],
+)
@@ -0,0 +1,197 @@
+"""
+Caches mémoire en processus
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache simple à expiration, borné en nombre d'entrées (éviction LRU, thread-safe)."""
+
+    def __init__(self, ttl_seconds: float, max_items: int = 1024):
+        self.ttl = ttl_seconds
+        self.max_items = max_items
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """Retourne la valeur en cache, ou l'obtient via loader() et la mémorise."""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Supprime une entrée (ou tout le cache si key est None)."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CachedPayload:
+    """Contenu pré-sérialisé en JSON et ses variantes compressées (calculées une seule fois)."""
+
+    __slots__ = ("data", "body", "variants")
+
+    def __init__(self, data, body: bytes):
+        self.data = data
+        self.body = body
+        self.variants: dict[str, bytes] = {}
+
+    @property
+    def nbytes(self) -> int:
+        # Estimation : octets sérialisés + variantes compressées + surcoût fixe par entrée
+        return len(self.body) + sum(len(v) for v in self.variants.values()) + 256
+
+
+class _Flight:
+    """Chargement en cours pour une clé (partagé par les appelants concurrents)."""
+
+    __slots__ = ("event", "value", "error", "stale")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+        self.stale = False
+
+
+class ByteLRUCache:
+    """
+    Cache LRU borné en octets (valeurs exposant `nbytes`), avec chargement single-flight :
+    des défauts de cache simultanés sur la même clé ne déclenchent qu'un seul chargement,
+    les autres appelants attendent son résultat.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._bytes = 0
+        self._inflight: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _store(self, key, value):
+        size = value.nbytes
+        if size > self.max_bytes:
+            return
+        self._bytes += size - self._sizes.get(key, 0)
+        self._data[key] = value
+        self._sizes[key] = size
+        self._data.move_to_end(key)
+        while self._bytes > self.max_bytes and self._data:
+            old, _ = self._data.popitem(last=False)
+            self._bytes -= self._sizes.pop(old)
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def get_or_load(self, key, loader):
+        """Valeur en cache, sinon loader() (une seule exécution par clé à la fois). None n'est pas mis en cache."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = loader()
+            with self._lock:
+                # Pas de mise en cache si la clé a été invalidée pendant le chargement
+                if flight.value is not None and not flight.stale:
+                    self._store(key, flight.value)
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+        return flight.value
+
+    def refresh(self, key):
+        """Recalcule la taille d'une entrée modifiée en place (ex. variante compressée ajoutée)."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._store(key, value)
+
+    def invalidate(self, key=None):
+        """Supprime une entrée (ou tout le cache si key est None)."""
+        with self._lock:
+            for flight in (self._inflight.values() if key is None else [self._inflight.get(key)]):
+                if flight is not None:
+                    flight.stale = True
+            if key is None:
+                self._data.clear()
+                self._sizes.clear()
+                self._bytes = 0
+            elif key in self._data:
+                del self._data[key]
+                self._bytes -= self._sizes.pop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def __len__(self):
+        return len(self._data)
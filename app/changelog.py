@@ -0,0 +1,133 @@
+"""
+Journal des modifications de la banque de questions (synchronisation incrémentale)
+
+Chaque mutation (ajout, import, modification, suppression) ajoute une entrée au
+journal `question_changes` du stockage, avec un numéro croissant partagé entre
+workers. Un client qui a déjà la banque (page d'administration, miroir externe)
+ne récupère que les changements depuis son dernier numéro
+(`GET /questions/changes?since=...`) au lieu de tout recharger.
+
+Compaction, toutes les `compact_every` entrées ajoutées par un worker : seules les
+`max_entries` dernières entrées sont conservées, et seule la plus récente de chaque
+question (une entrée « insert »/« update » porte la question complète). Un client
+dont le numéro est antérieur au plancher de compaction, ou après un rechargement
+complet de la banque (ETL), doit se resynchroniser.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from .config import changelog_config
+from .storage import get_store
+
+logger = logging.getLogger("miskatonic")
+
+
+class QuestionChangeLog:
+    """Ajout, lecture et compaction du journal des modifications."""
+
+    def __init__(self, max_entries: int = 10000, compact_every: int = 500, page_limit: int = 1000,
+                 gap_wait_s: float = 5.0):
+        self.max_entries = max_entries
+        self.compact_every = compact_every
+        self.page_limit = page_limit
+        self.gap_wait_s = gap_wait_s
+        self._lock = threading.Lock()
+        self._since_compaction = 0
+
+    def record(self, op: str, questions: list[dict]):
+        """
+        Journalise une mutation : op « insert », « update » ou « delete », questions au
+        format de l'API (avec qid). Sans effet sur la mutation si l'écriture échoue.
+        """
+        if not questions:
+            return
+        now = datetime.utcnow()
+        entries = [{"op": op, "qid": q.get("qid"), "question": q if op != "delete" else None, "at": now}
+                   for q in questions]
+        try:
+            seqs = get_store().append_question_changes(entries)
+        except Exception as exc:
+            logger.warning("Journal des modifications : écriture impossible (%s)", exc)
+            return
+        with self._lock:
+            self._since_compaction += len(entries)
+            due = self._since_compaction >= self.compact_every
+            if due:
+                self._since_compaction = 0
+        if due:
+            self.compact(seqs[-1])
+
+    def record_reset(self) -> int:
+        """
+        Banque entièrement rechargée (ETL) : les entrées précédentes n'ont plus de sens,
+        tout client antérieur doit se resynchroniser. Retourne le nouveau plancher.
+        """
+        store = get_store()
+        seq = store.append_question_changes([{"op": "reset", "qid": None, "question": None,
+                                              "at": datetime.utcnow()}])[-1]
+        store.compact_question_changes(seq)
+        return seq
+
+    def compact(self, latest: int | None = None) -> int:
+        """Supprime les entrées trop anciennes ou remplacées. Retourne le nombre supprimé."""
+        store = get_store()
+        try:
+            if latest is None:
+                latest = store.question_changes_bounds()[1]
+            # Entrées récentes gardées : un trou récent signale une écriture en cours (voir since)
+            settled = datetime.utcnow() - timedelta(seconds=self.gap_wait_s)
+            return store.compact_question_changes(max(0, latest - self.max_entries), settled)
+        except Exception as exc:
+            logger.warning("Journal des modifications : compaction impossible (%s)", exc)
+            return 0
+
+    def since(self, seq: int | None, limit: int | None = None) -> dict:
+        """
+        Changements de numéro supérieur à seq, au plus limit. `resync` à True quand le
+        client est trop en retard (entrées compactées) ou en avance (autre base).
+        Sans seq : seulement le numéro courant, à lire avant un chargement complet.
+        """
+        store = get_store()
+        limit = max(1, min(limit or self.page_limit, self.page_limit))
+        entries = store.question_changes_since(seq, limit + 1) if seq is not None else []
+        # Bornes lues après les entrées : une compaction concurrente est forcément détectée
+        floor, latest = store.question_changes_bounds()
+        if seq is None:
+            return {"resync": False, "since": None, "seq": latest, "latest": latest, "has_more": False,
+                    "changes": []}
+        if seq < floor or seq > latest:
+            return {"resync": True, "since": seq, "seq": latest, "latest": latest, "floor": floor}
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        # Numéro réservé mais pas encore écrit (autre worker) : on s'arrête avant le trou,
+        # le client le relira au prochain appel
+        now = datetime.utcnow()
+        expected = seq + 1
+        for i, entry in enumerate(entries):
+            if entry["seq"] != expected and (now - entry["at"]).total_seconds() < self.gap_wait_s:
+                entries, has_more = entries[:i], True
+                break
+            expected = entry["seq"] + 1
+        return {
+            "resync": False,
+            "since": seq,
+            "seq": entries[-1]["seq"] if entries else seq,
+            "latest": latest,
+            "has_more": has_more,
+            "changes": [{
+                "seq": e["seq"],
+                "op": e["op"],
+                "qid": e.get("qid"),
+                "question": e.get("question"),
+                "at": e["at"].isoformat(),
+            } for e in entries],
+        }
+
+
+question_changes = QuestionChangeLog(
+    max_entries=changelog_config["max_entries"],
+    compact_every=changelog_config["compact_every"],
+    page_limit=changelog_config["page_limit"],
+    gap_wait_s=changelog_config["gap_wait_s"],
+)
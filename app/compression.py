@@ -0,0 +1,146 @@
+"""
+Compression des réponses HTTP (gzip, brotli si disponible)
+
+- `CompressionMiddleware` compresse à la volée les réponses JSON/HTML/CSS/JS
+  au-delà d'un seuil de taille, selon l'en-tête `Accept-Encoding` du client. Les
+  gros corps sont compressés dans le pool de threads ; un ETag amont reçoit le
+  suffixe de l'encodage (octets différents, comme app/static.py).
+- Pour les contenus immuables et très partagés (une session de quiz lue par toute
+  une classe), `payload_response()` compresse une seule fois et conserve les octets
+  dans l'entrée de cache pré-sérialisée (voir app/cache.py, CachedPayload).
+"""
+import gzip
+
+import anyio
+from fastapi import Request, Response
+
+from .config import compression_config
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+# Types de contenu qui gagnent à être compressés (l'audio et les images le sont déjà)
+_COMPRESSIBLE = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Flux longs (Server-Sent Events) : transmis tels quels, sans attendre le premier message
+_STREAMED = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Choisit l'encodage à utiliser (« br », « gzip » ou None) selon Accept-Encoding."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compresse body avec l'encodage demandé."""
+    if encoding == "br":
+        return brotli.compress(body, quality=compression_config["brotli_quality"])
+    return gzip.compress(body, compresslevel=compression_config["gzip_level"])
+
+
+def _encoded_etag(etag: bytes, encoding: str) -> bytes:
+    """ETag d'une variante compressée : « "x" » -> « "x-gzip" » (W/ conservé)."""
+    if etag.endswith(b'"'):
+        return etag[:-1] + f'-{encoding}"'.encode()
+    return etag
+
+
+def payload_response(request: Request, payload, cache=None, key=None) -> Response:
+    """
+    Réponse JSON pour un contenu pré-sérialisé (CachedPayload) : chaque variante
+    compressée est calculée une fois, conservée dans le payload, puis réutilisée
+    pour tous les clients. `cache.refresh(key)` met à jour la taille comptée.
+    """
+    body = payload.body
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding and len(body) >= compression_config["min_size"]:
+        compressed = payload.variants.get(encoding)
+        if compressed is None:
+            compressed = payload.variants[encoding] = compress(body, encoding)
+            if cache is not None:
+                cache.refresh(key)
+        body = compressed
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI : compresse les réponses non streamées au-delà du seuil."""
+
+    def __init__(self, app, min_size: int | None = None, thread_min_size: int | None = None):
+        self.app = app
+        self.min_size = compression_config["min_size"] if min_size is None else min_size
+        self.thread_min_size = (compression_config["thread_min_size"]
+                                if thread_min_size is None else thread_min_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        state = {"start": None, "done": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                ctype = next((v.decode("latin-1") for k, v in message.get("headers", [])
+                              if k.lower() == b"content-type"), "")
+                if ctype.startswith(_STREAMED):
+                    state["done"] = True
+                    return await send(message)
+                # On retient l'en-tête jusqu'à connaître le corps
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["done"]:
+                return await send(message)
+            state["done"] = True
+            start = state["start"]
+            headers = list(start.get("headers", []))
+            names = {k.lower() for k, _ in headers}
+            ctype = next((v.decode("latin-1") for k, v in headers if k.lower() == b"content-type"), "")
+            body = message.get("body", b"")
+            if (message.get("more_body") or b"content-encoding" in names
+                    or len(body) < self.min_size or not ctype.startswith(_COMPRESSIBLE)):
+                await send(start)
+                return await send(message)
+            if len(body) >= self.thread_min_size:
+                body = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            vary = [v.decode("latin-1") for k, v in headers if k.lower() == b"vary"]
+            headers = [(k, _encoded_etag(v, encoding) if k.lower() == b"etag" else v)
+                       for k, v in headers if k.lower() not in (b"content-length", b"vary")]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", ", ".join(vary + ["Accept-Encoding"]).encode("latin-1")),
+            ]
+            await send({"type": "http.response.start", "status": start["status"], "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
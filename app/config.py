@@ -1,6 +1,7 @@
 """
 Configuration et métadonnées de l'application FastAPI
 """
+import os
 
 app_config = {
     "title": "Miskatonic Quiz API",
@@ -17,7 +18,7 @@ app_config = {
     - **Sécurité** : Contrôle d'accès basé sur les rôles
 
     ### Bases de données :
-    - **MongoDB** : Stockage des questions et sessions de quiz
+    - **MongoDB** (ou SQLite, `STORAGE_BACKEND=sqlite`) : Stockage des questions et sessions de quiz
     - **SQLite** : Gestion des utilisateurs et authentification
 
     ### Utilisation :
@@ -51,6 +52,18 @@ app_config = {
             "name": "utilitaires",
             "description": "Endpoints d'aide (thèmes, tests disponibles)",
         },
+        {
+            "name": "administration",
+            "description": "Supervision et diagnostic (admin uniquement)",
+        },
+        {
+            "name": "statistiques",
+            "description": "Statistiques de difficulté des questions (prof/admin)",
+        },
+        {
+            "name": "supervision",
+            "description": "Sondes de vie et de disponibilité (/healthz, /readyz)",
+        },
     ]
 }
 
@@ -59,4 +72,207 @@ cors_config = {
     "allow_credentials": True,
     "allow_methods": ["*"],
     "allow_headers": ["*"],
-}
\ No newline at end of file
+}
+
+# --- Stockage des questions et sessions de quiz ---
+# « mongo » (par défaut) ou « sqlite » : fichier local, ou « :memory: » (tests, benchmarks), sans réseau
+storage_config = {
+    "backend": os.getenv("STORAGE_BACKEND", "mongo"),
+    "sqlite_path": os.getenv("STORAGE_SQLITE_PATH", "data/quiz.db"),
+    # Questions importées au démarrage si la base SQLite est vide
+    "seed_file": os.getenv("STORAGE_SEED", "questions.json"),
+}
+
+# --- Journal des modifications de la banque (synchronisation incrémentale) ---
+changelog_config = {
+    # Entrées conservées : au-delà, les plus anciennes sont supprimées (resynchronisation complète)
+    "max_entries": int(os.getenv("CHANGELOG_MAX_ENTRIES", "10000")),
+    # Compaction toutes les N entrées ajoutées par ce worker
+    "compact_every": int(os.getenv("CHANGELOG_COMPACT_EVERY", "500")),
+    # Taille de page maximale de GET /questions/changes
+    "page_limit": int(os.getenv("CHANGELOG_PAGE_LIMIT", "1000")),
+    # Trou de numérotation récent (écriture en cours sur un autre worker) : on attend au plus ce délai
+    "gap_wait_s": float(os.getenv("CHANGELOG_GAP_WAIT", "5")),
+}
+
+# --- Quiz adaptatif (modèle IRT à deux paramètres) ---
+adaptive_config = {
+    # Arrêt : nombre maximal de questions ou erreur type de l'estimation de niveau atteinte
+    "max_items": int(os.getenv("ADAPTIVE_MAX_ITEMS", "20")),
+    "target_se": float(os.getenv("ADAPTIVE_TARGET_SE", "0.35")),
+    # Tirage parmi les k questions les plus informatives (limite la surexposition des meilleures)
+    "top_k": int(os.getenv("ADAPTIVE_TOP_K", "3")),
+    # Grille d'estimation du niveau (EAP) : points répartis sur [-range, +range]
+    "grid_points": int(os.getenv("ADAPTIVE_GRID_POINTS", "81")),
+    "theta_range": float(os.getenv("ADAPTIVE_THETA_RANGE", "4")),
+    # Ajustement hors ligne : réponses minimales par question, nombre d'itérations
+    "min_responses": int(os.getenv("ADAPTIVE_MIN_RESPONSES", "20")),
+    "fit_iterations": int(os.getenv("ADAPTIVE_FIT_ITERATIONS", "100")),
+    "session_ttl_s": float(os.getenv("ADAPTIVE_SESSION_TTL", str(7 * 24 * 3600))),
+}
+
+# --- Détection des requêtes MongoDB lentes ---
+# Seuil, échantillonnage et limitation des explain (surchargeables par variables d'environnement)
+slow_query_config = {
+    "enabled": os.getenv("SLOW_QUERY_ENABLED", "1") == "1",
+    "threshold_ms": float(os.getenv("SLOW_QUERY_MS", "100")),
+    "explain_sample_rate": float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.2")),
+    "explain_per_minute": int(os.getenv("SLOW_QUERY_EXPLAIN_PER_MINUTE", "6")),
+    "buffer_size": int(os.getenv("SLOW_QUERY_BUFFER", "200")),
+}
+
+# --- Profilage échantillonné des requêtes (opt-in) ---
+# Déclenché par l'en-tête X-Profile: <admin> ou pour une fraction aléatoire des routes listées
+profiling_config = {
+    "dir": os.getenv("PROFILE_DIR", "data/profiles"),
+    "max_files": int(os.getenv("PROFILE_MAX_FILES", "50")),
+    "sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    "routes": [r.strip() for r in os.getenv("PROFILE_ROUTES", "/questions,/quiz").split(",") if r.strip()],
+    "interval_ms": float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+}
+
+# --- Démarrage (lifespan) et caches mémoire ---
+startup_config = {
+    "warmup": os.getenv("WARMUP", "1") == "1",
+    "warmup_sessions": int(os.getenv("WARMUP_SESSIONS", "20")),
+    "ping_timeout_s": float(os.getenv("MONGO_PING_TIMEOUT", "2")),
+    # Nombre de workers (variable lue aussi par uvicorn/gunicorn) : plus d'un exige le canal
+    # d'invalidation, sinon classements et caches divergent d'un worker à l'autre
+    "workers": int(os.getenv("WEB_CONCURRENCY", "1")),
+}
+
+cache_config = {
+    "lists_ttl": float(os.getenv("CACHE_LISTS_TTL", "60")),
+    "roles_ttl": float(os.getenv("CACHE_ROLES_TTL", "30")),
+    # Sessions de quiz pré-sérialisées (LRU borné en octets)
+    "sessions_max_bytes": int(os.getenv("CACHE_SESSIONS_MAX_BYTES", str(32 * 1024 * 1024))),
+    # Quiz autonomes (GET /quiz/{quiz_id}/bundle) pré-sérialisés
+    "bundles_max_bytes": int(os.getenv("CACHE_BUNDLES_MAX_BYTES", str(16 * 1024 * 1024))),
+}
+
+# --- Quiz autonomes (correction dans le navigateur) ---
+bundle_config = {
+    # Clé de dérivation des sels par session : identique sur tous les workers
+    "secret": os.getenv("BUNDLE_SECRET", "miskatonic-bundle").encode("utf-8")[:64],
+    # Durée de mise en cache navigateur d'un quiz autonome (sessions immuables)
+    "max_age_s": int(os.getenv("BUNDLE_MAX_AGE", "3600")),
+}
+
+# --- Invalidation des caches entre workers (collection plafonnée relue périodiquement) ---
+invalidation_config = {
+    "enabled": os.getenv("INVALIDATION_ENABLED", "1") == "1",
+    # Délai maximal avant qu'un worker voie la mutation faite par un autre
+    "poll_interval_s": float(os.getenv("INVALIDATION_POLL_INTERVAL", "0.5")),
+    "capped_bytes": int(os.getenv("INVALIDATION_CAPPED_BYTES", str(16 * 1024 * 1024))),
+    "capped_docs": int(os.getenv("INVALIDATION_CAPPED_DOCS", "20000")),
+}
+
+# --- Rétention des sessions de quiz (archives NDJSON gzip par jour) ---
+archive_config = {
+    "enabled": os.getenv("ARCHIVE_ENABLED", "1") == "1",
+    "dir": os.getenv("ARCHIVE_DIR", "data/archive"),
+    # Âge au-delà duquel une session quitte quiz_sessions pour les archives
+    "retention_days": float(os.getenv("SESSION_RETENTION_DAYS", "90")),
+    # Index TTL de secours : suppression à rétention + ce délai, même sans archivage
+    "ttl_grace_days": float(os.getenv("SESSION_TTL_GRACE_DAYS", "30")),
+    "interval_s": float(os.getenv("ARCHIVE_INTERVAL", "3600")),
+    "batch_size": int(os.getenv("ARCHIVE_BATCH_SIZE", "1000")),
+    "gzip_level": int(os.getenv("ARCHIVE_GZIP_LEVEL", "6")),
+}
+
+# --- Réserve de quiz pré-générés (POST /quiz/create) ---
+# Clés « thème:nombre » maintenues en permanence (« * » = tous thèmes)
+quiz_pool_config = {
+    "enabled": os.getenv("QUIZ_POOL_ENABLED", "1") == "1",
+    "size": int(os.getenv("QUIZ_POOL_SIZE", "20")),
+    "keys": [k.strip() for k in os.getenv("QUIZ_POOL_KEYS", "*:5,*:10").split(",") if k.strip()],
+    "max_dynamic_keys": int(os.getenv("QUIZ_POOL_DYNAMIC_KEYS", "8")),
+    "interval_s": float(os.getenv("QUIZ_POOL_INTERVAL", "5")),
+}
+
+# --- Frontend servi par l'API (/app) ---
+static_config = {
+    "enabled": os.getenv("STATIC_ENABLED", "1") == "1",
+    "source_dir": os.getenv("STATIC_SOURCE_DIR", "frontend"),
+    # Ressources versionnées, pages réécrites et variantes .gz/.br (préparées au démarrage)
+    "build_dir": os.getenv("STATIC_BUILD_DIR", "data/static"),
+    "prefix": "/app",
+    # Durée de cache des ressources versionnées (immuables)
+    "max_age_s": int(os.getenv("STATIC_MAX_AGE", str(365 * 24 * 3600))),
+    "min_compress_size": int(os.getenv("STATIC_MIN_COMPRESS_SIZE", "256")),
+}
+
+# --- Compression des réponses ---
+compression_config = {
+    "min_size": int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    "gzip_level": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    "brotli_quality": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5")),
+    # Corps plus gros : compressés dans le pool de threads, sans bloquer la boucle d'événements
+    "thread_min_size": int(os.getenv("COMPRESSION_THREAD_MIN_SIZE", "65536")),
+}
+
+# --- Journal des tentatives (écriture différée par lots) ---
+attempts_config = {
+    "max_items": int(os.getenv("ATTEMPTS_MAX_ITEMS", "10000")),
+    "batch_size": int(os.getenv("ATTEMPTS_BATCH_SIZE", "500")),
+    "flush_interval_s": float(os.getenv("ATTEMPTS_FLUSH_INTERVAL", "1")),
+    # Attente maximale d'une requête quand le tampon est plein (contre-pression)
+    "block_timeout_s": float(os.getenv("ATTEMPTS_BLOCK_TIMEOUT", "0.5")),
+}
+
+# --- Statistiques par question (compteurs $inc groupés) ---
+stats_config = {
+    "flush_interval_s": float(os.getenv("STATS_FLUSH_INTERVAL", "5")),
+}
+
+# --- Classements en direct par quiz ---
+leaderboard_config = {
+    "max_boards": int(os.getenv("LEADERBOARD_MAX_BOARDS", "200")),
+    # Un classement sans nouvelle réponse depuis ce délai est évincé (quiz terminé)
+    "idle_ttl_s": float(os.getenv("LEADERBOARD_IDLE_TTL", str(4 * 3600))),
+}
+
+# --- Quiz en direct (WebSocket / SSE) ---
+live_config = {
+    # Messages en attente par connexion avant déconnexion d'un client trop lent
+    "queue_size": int(os.getenv("LIVE_QUEUE_SIZE", "8")),
+    "max_subscribers": int(os.getenv("LIVE_MAX_SUBSCRIBERS", "5000")),
+    "heartbeat_s": float(os.getenv("LIVE_HEARTBEAT", "15")),
+}
+
+# --- Quasi-doublons de questions (MinHash / LSH) ---
+dedup_config = {
+    # Similarité de Jaccard estimée (5-grammes de caractères) à partir de laquelle deux intitulés sont des doublons.
+    # Des intitulés courts peuvent être proches sans être des doublons (« Supervised » / « Unsupervised ») :
+    # d'où le mode « flag » par défaut.
+    "threshold": float(os.getenv("DEDUP_THRESHOLD", "0.75")),
+    # « flag » : la question est ajoutée et les doublons signalés ; « reject » : ajout refusé (409)
+    "mode": os.getenv("DEDUP_MODE", "flag"),
+}
+
+
+# --- Contrôle d'admission (limites par classe de requêtes, file CoDel) ---
+# La somme des limites reste sous la taille du threadpool (40 threads par défaut) :
+# les lectures gardent toujours des threads libres.
+def _admission_class(prefix: str, limit: int, max_queue: int, target_ms: float, max_wait_ms: float) -> dict:
+    return {
+        "limit": int(os.getenv(f"ADMISSION_{prefix}_LIMIT", str(limit))),
+        "max_queue": int(os.getenv(f"ADMISSION_{prefix}_QUEUE", str(max_queue))),
+        # Attente tolérée avant que la file soit jugée engorgée (CoDel)
+        "target_ms": float(os.getenv(f"ADMISSION_{prefix}_TARGET_MS", str(target_ms))),
+        "interval_ms": float(os.getenv("ADMISSION_INTERVAL_MS", "100")),
+        "max_wait_ms": float(os.getenv(f"ADMISSION_{prefix}_MAX_WAIT_MS", str(max_wait_ms))),
+    }
+
+
+admission_config = {
+    "enabled": os.getenv("ADMISSION_ENABLED", "1") == "1",
+    "classes": {
+        # Connexion / inscription / mot de passe : bcrypt (~100 ms CPU par requête)
+        "auth": _admission_class("AUTH", 4, 64, 500, 3000),
+        # Administration, exports, imports et générations en lot
+        "bulk": _admission_class("BULK", 2, 16, 2000, 10000),
+        # Tout le reste (lectures de quiz, réponses) : requêtes courtes
+        "read": _admission_class("READ", 32, 512, 50, 2000),
+    },
+}
@@ -1,8 +1,24 @@
 import sqlite3
+from app.cache import TTLCache
+from app.config import cache_config
+from app.invalidation import on_invalidation, publish_invalidation
 from app.users_passwords import hash_password, verify_password
 
 DB_PATH = "data/users.db"
 
+# Rôles lus à chaque vérification de droits : mis en cache, invalidés entre workers
+_roles_cache = TTLCache(cache_config["roles_ttl"], max_items=10000)
+
+
+def _role_changed(username: str):
+    _roles_cache.invalidate(username)
+    publish_invalidation("users", {"username": username})
+
+
+@on_invalidation("users")
+def _apply_remote_role_change(payload: dict | None):
+    _roles_cache.invalidate(payload["username"] if payload else None)
+
 # --- Création de la table users avec rôles ---
 def init_db():
     """Initialise la base SQLite (crée la table users si elle n'existe pas)."""
@@ -70,6 +86,10 @@ def authenticate_user(username: str, password: str) -> tuple[bool, str | None]:
 # --- Rôle d'un utilisateur ---
 def get_user_role(username: str) -> str | None:
     """Retourne le rôle de l'utilisateur (prof/admin/eleve) ou None si inconnu."""
+    return _roles_cache.get_or_load(username, lambda: _load_user_role(username))
+
+
+def _load_user_role(username: str) -> str | None:
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
     cur.execute("SELECT role FROM users WHERE username=?", (username,))
@@ -99,6 +119,8 @@ def delete_user(username: str) -> bool:
     deleted = cur.rowcount > 0
     conn.commit()
     conn.close()
+    if deleted:
+        _role_changed(username)
     return deleted
 
 
@@ -113,6 +135,8 @@ def update_user_role(username: str, new_role: str) -> bool:
     updated = cur.rowcount > 0
     conn.commit()
     conn.close()
+    if updated:
+        _role_changed(username)
     return updated
 
 
@@ -0,0 +1,250 @@
+"""
+Détection des quasi-doublons de questions (MinHash / LSH)
+
+Chaque intitulé est réduit à l'ensemble de ses 5-grammes de caractères (texte
+normalisé : minuscules, sans accents ni ponctuation). Une signature MinHash de
+120 valeurs estime la similarité de Jaccard entre deux intitulés ; l'index LSH
+(24 bandes de 5 valeurs) ne compare une nouvelle question qu'aux questions
+partageant au moins une bande, au lieu de toute la banque. Deux intitulés à 0.75
+de similarité sont candidats dans 99.8 % des cas, à 0.2 dans moins de 1 % des cas.
+
+numpy (optionnel) accélère le calcul des signatures (minimum colonne par colonne).
+
+Utilisé par `POST /questions`, `POST /questions/import` et etl.py ; le rapport
+`GET /admin/duplicates` liste les groupes de quasi-doublons de la banque.
+"""
+import hashlib
+import re
+import threading
+from array import array
+from functools import lru_cache
+
+from .config import dedup_config
+from .generator import get_bank
+from .questions import on_questions_changed
+from .search import fold
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle
+    np = None
+
+NUM_PERM = 120
+BANDS = 24
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_WORDS_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Intitulé réduit à ses mots (minuscules, sans accents ni ponctuation)."""
+    return " ".join(_WORDS_RE.findall(fold(text or "")))
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hashes(shingle: str) -> bytes:
+    # NUM_PERM fonctions de hachage indépendantes d'un coup : un condensat SHAKE-128 de 4·NUM_PERM octets
+    return hashlib.shake_128(shingle.encode("utf-8")).digest(4 * NUM_PERM)
+
+
+def shingles(text: str) -> set[str]:
+    """5-grammes de caractères de l'intitulé normalisé (l'intitulé entier s'il est plus court)."""
+    norm = normalize(text)
+    if len(norm) <= SHINGLE_SIZE:
+        return {norm} if norm else set()
+    return {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> array | None:
+    """Signature MinHash (NUM_PERM entiers 32 bits), None pour un texte vide."""
+    rows = [_shingle_hashes(s) for s in shingles(text)]
+    if not rows:
+        return None
+    if np is not None:
+        matrix = np.frombuffer(b"".join(rows), dtype=np.uint32).reshape(len(rows), NUM_PERM)
+        return array("I", matrix.min(axis=0).tobytes())
+    return array("I", map(min, zip(*(array("I", row) for row in rows))))
+
+
+def similarity(a: array, b: array) -> float:
+    """Similarité de Jaccard estimée entre deux signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+class MinHashLSH:
+    """Index LSH de signatures MinHash, clés arbitraires (ordinal, position dans un lot...)."""
+
+    def __init__(self):
+        self.signatures: dict = {}
+        self._buckets: list[dict[bytes, set]] = [{} for _ in range(BANDS)]
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _bands(sig: array):
+        raw = sig.tobytes()
+        size = len(raw) // BANDS
+        for band in range(BANDS):
+            yield band, raw[band * size:(band + 1) * size]
+
+    def add(self, key, sig: array | None):
+        if sig is None:
+            return
+        with self._lock:
+            if key in self.signatures:
+                self.remove(key)
+            self.signatures[key] = sig
+            for band, h in self._bands(sig):
+                self._buckets[band].setdefault(h, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            sig = self.signatures.pop(key, None)
+            if sig is None:
+                return
+            for band, h in self._bands(sig):
+                bucket = self._buckets[band].get(h)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[band][h]
+
+    def clear(self):
+        """Vide l'index (le verrou est conservé : les requêtes en cours restent cohérentes)."""
+        with self._lock:
+            self.signatures = {}
+            self._buckets = [{} for _ in range(BANDS)]
+
+    def query(self, sig: array | None, threshold: float, exclude=None) -> list[tuple]:
+        """Clés dont la similarité estimée avec sig atteint threshold, les plus proches d'abord."""
+        if sig is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for band, h in self._bands(sig):
+                candidates.update(self._buckets[band].get(h, ()))
+            candidates.discard(exclude)
+            matches = [(key, similarity(sig, self.signatures[key])) for key in candidates]
+        return sorted(((k, s) for k, s in matches if s >= threshold), key=lambda m: -m[1])
+
+    def clusters(self, threshold: float) -> list[list]:
+        """Groupes de clés reliées par une similarité >= threshold (union-find sur les paires candidates)."""
+        parent: dict = {}
+
+        def find(x):
+            root = x
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while x != root:
+                parent[x], x = root, parent[x]
+            return root
+
+        with self._lock:
+            for buckets in self._buckets:
+                for bucket in buckets.values():
+                    if len(bucket) < 2:
+                        continue
+                    keys = sorted(bucket)
+                    for i, a in enumerate(keys):
+                        for b in keys[i + 1:]:
+                            ra, rb = find(a), find(b)
+                            # Paire déjà reliée (même groupe) : pas de comparaison
+                            if ra != rb and similarity(self.signatures[a], self.signatures[b]) >= threshold:
+                                parent[max(ra, rb)] = min(ra, rb)
+        groups: dict = {}
+        for key in parent:
+            groups.setdefault(find(key), set()).add(key)
+        return [sorted(members | {root}) for root, members in groups.items()]
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+# --- Index de la banque (clé = ordinal) ---
+dedup_index = MinHashLSH()
+_built = False
+_build_lock = threading.Lock()
+
+
+def get_dedup_index() -> MinHashLSH:
+    """Index du processus (construit depuis la banque au premier appel)."""
+    global _built
+    if not _built:
+        with _build_lock:
+            if not _built:
+                for ordinal, q in list(get_bank().questions.items()):
+                    dedup_index.add(ordinal, signature(q.get("question", "")))
+                _built = True
+    return dedup_index
+
+
+def find_near_duplicates(text: str, threshold: float | None = None, limit: int = 5) -> list[dict]:
+    """Questions de la banque proches de text (similarité estimée >= threshold)."""
+    threshold = dedup_config["threshold"] if threshold is None else threshold
+    index = get_dedup_index()
+    questions = get_bank().questions
+    results = []
+    for ordinal, sim in index.query(signature(text), threshold)[:limit]:
+        q = questions.get(ordinal)
+        if q is not None:
+            results.append({"qid": q.get("qid"), "question": q["question"], "theme": q["theme"],
+                            "test": q["test"], "similarity": round(sim, 3)})
+    return results
+
+
+def screen_batch(docs: list[dict], threshold: float | None = None) -> tuple[list[dict], list[dict]]:
+    """
+    Sépare un lot de questions à importer en (nouvelles, quasi-doublons). Chaque question
+    est comparée à la banque et aux questions du lot déjà acceptées.
+    """
+    threshold = dedup_config["threshold"] if threshold is None else threshold
+    index = get_dedup_index()
+    questions = get_bank().questions
+    batch = MinHashLSH()
+    accepted, duplicates = [], []
+    for position, doc in enumerate(docs):
+        sig = signature(doc.get("question", ""))
+        match = next(iter(index.query(sig, threshold)), None)
+        if match is not None and match[0] in questions:
+            duplicates.append({"index": position, "question": doc.get("question"),
+                               "duplicate_of": questions[match[0]]["question"], "similarity": round(match[1], 3)})
+            continue
+        match = next(iter(batch.query(sig, threshold)), None)
+        if match is not None:
+            duplicates.append({"index": position, "question": doc.get("question"),
+                               "duplicate_of": docs[match[0]].get("question"), "similarity": round(match[1], 3)})
+            continue
+        batch.add(position, sig)
+        accepted.append(doc)
+    return accepted, duplicates
+
+
+def duplicate_clusters(threshold: float | None = None) -> list[dict]:
+    """Groupes de quasi-doublons de la banque, les plus grands d'abord."""
+    threshold = dedup_config["threshold"] if threshold is None else threshold
+    questions = get_bank().questions
+    report = []
+    for members in get_dedup_index().clusters(threshold):
+        items = [{"qid": questions[o].get("qid"), "question": questions[o]["question"],
+                  "theme": questions[o]["theme"], "test": questions[o]["test"]} for o in members if o in questions]
+        if len(items) > 1:
+            report.append({"size": len(items), "questions": items})
+    report.sort(key=lambda c: -c["size"])
+    return report
+
+
+@on_questions_changed
+def _sync_dedup(event: str, doc: dict):
+    """Ajouts/suppressions répercutés sur l'index (s'il est construit)."""
+    global _built
+    if event == "reset":
+        with _build_lock:
+            dedup_index.clear()
+            _built = False
+        return
+    if not _built or doc.get("ordinal") is None:
+        return
+    if event in ("added", "updated"):
+        dedup_index.add(int(doc["ordinal"]), signature(doc.get("question", "")))
+    elif event == "deleted":
+        dedup_index.remove(int(doc["ordinal"]))
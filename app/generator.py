@@ -0,0 +1,413 @@
+"""
+Moteur de génération de quiz stratifié, sans répétition par étudiant
+
+La banque de questions est chargée une fois en mémoire. Chaque question porte un
+`ordinal` stable (attribué via le compteur partagé du stockage), ce qui permet
+de représenter les questions déjà vues par un étudiant sous forme de bitset
+compact (1 bit par ordinal) au lieu d'envoyer de longues listes `$nin` à Mongo.
+
+Un quiz est décrit par des quotas, par ex. « 4 BDD + 3 Python + 3 Docker » :
+    [{"theme": "BDD", "count": 4}, {"theme": "Python", "count": 3}, {"theme": "Docker", "count": 3}]
+Le tirage se fait par rejet aléatoire (coût proportionnel au nombre de questions
+demandées, pas à la taille de la banque), avec repli sur un filtrage complet
+quand l'étudiant a déjà vu la majorité des candidates.
+"""
+import random
+import threading
+
+from .cache import TTLCache
+from .questions import next_ordinals, on_questions_changed, question_id
+from .storage import get_store
+
+# Facteur de tentatives du tirage par rejet avant repli sur un filtrage complet
+_REJECTION_FACTOR = 64
+
+
+def _normalize(doc: dict) -> dict:
+    """Forme d'une question renvoyée au front (même normalisation que get_questions)."""
+    return {
+        "qid": doc.get("qid"),
+        "question": doc.get("question", ""),
+        "theme": doc.get("theme") or "Général",
+        "test": doc.get("test") or "Quiz",
+        "choix": doc.get("choix", []),
+        "correct": doc.get("correct", []),
+    }
+
+
+class _Ordinals:
+    """Liste d'ordinaux indexable (tirage aléatoire) à retrait en O(1) : échange avec le dernier."""
+
+    __slots__ = ("items", "positions")
+
+    def __init__(self):
+        self.items: list[int] = []
+        self.positions: dict[int, int] = {}
+
+    def append(self, ordinal: int):
+        if ordinal not in self.positions:
+            self.positions[ordinal] = len(self.items)
+            self.items.append(ordinal)
+
+    def discard(self, ordinal: int):
+        i = self.positions.pop(ordinal, None)
+        if i is None:
+            return
+        last = self.items.pop()
+        if i < len(self.items):
+            self.items[i] = last
+            self.positions[last] = i
+
+    def __getitem__(self, i: int) -> int:
+        return self.items[i]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class QuestionBank:
+    """
+    Banque de questions en mémoire, indexée par ordinal, thème et test.
+
+    Les index sont modifiés sous `_lock` ; `candidates` en renvoie une copie, et le
+    tirage (`generate`) les lit sous ce même verrou.
+    """
+
+    def __init__(self, docs: list[dict] | None = None):
+        self.questions: dict[int, dict] = {}
+        self.by_theme: dict[str, _Ordinals] = {}
+        self.by_test: dict[str, _Ordinals] = {}
+        self.by_theme_test: dict[tuple[str, str], _Ordinals] = {}
+        self.all = _Ordinals()
+        self.version = 0
+        self._lock = threading.Lock()
+        for doc in docs or []:
+            self._add(doc)
+
+    def _add(self, doc: dict):
+        ordinal = int(doc["ordinal"])
+        q = _normalize(doc)
+        self.questions[ordinal] = q
+        self.all.append(ordinal)
+        self.by_theme.setdefault(q["theme"], _Ordinals()).append(ordinal)
+        self.by_test.setdefault(q["test"], _Ordinals()).append(ordinal)
+        self.by_theme_test.setdefault((q["theme"], q["test"]), _Ordinals()).append(ordinal)
+
+    def add(self, doc: dict):
+        """Ajoute une question (doc Mongo avec ordinal) à la banque."""
+        with self._lock:
+            self._add(doc)
+            self.version += 1
+
+    def remove(self, ordinal: int):
+        """Retire une question de la banque par son ordinal."""
+        with self._lock:
+            q = self.questions.pop(ordinal, None)
+            if q is None:
+                return
+            self.all.discard(ordinal)
+            for index in (self.by_theme.get(q["theme"]), self.by_test.get(q["test"]),
+                          self.by_theme_test.get((q["theme"], q["test"]))):
+                if index is not None:
+                    index.discard(ordinal)
+            self.version += 1
+
+    def _candidates(self, theme: str | None, test: str | None) -> _Ordinals | tuple:
+        # Index vivant : à lire sous _lock
+        if theme and test:
+            return self.by_theme_test.get((theme, test), ())
+        if theme:
+            return self.by_theme.get(theme, ())
+        if test:
+            return self.by_test.get(test, ())
+        return self.all
+
+    def candidates(self, theme: str | None = None, test: str | None = None) -> list[int]:
+        """Ordinaux candidats pour un couple thème/test (None = pas de filtre), copie instantanée."""
+        with self._lock:
+            return list(self._candidates(theme, test))
+
+    def __len__(self):
+        return len(self.questions)
+
+
+# --- Bitsets « déjà vues » ---
+def is_seen(bits: bytearray | None, ordinal: int) -> bool:
+    byte = ordinal >> 3
+    return bits is not None and byte < len(bits) and bool(bits[byte] & (1 << (ordinal & 7)))
+
+
+def mark_seen(bits: bytearray, ordinals) -> bytearray:
+    """Positionne les bits des ordinaux (agrandit le bitset si besoin)."""
+    for ordinal in ordinals:
+        byte = ordinal >> 3
+        if byte >= len(bits):
+            bits.extend(b"\x00" * (byte + 1 - len(bits)))
+        bits[byte] |= 1 << (ordinal & 7)
+    return bits
+
+
+# --- Tirage stratifié ---
+def _draw(bank: QuestionBank, candidates: _Ordinals | list[int], count: int, taken: set,
+          seen: bytearray | None, rng: random.Random) -> list[int]:
+    """Tire `count` ordinaux parmi les candidats, hors `taken` et hors questions vues."""
+    chosen: list[int] = []
+    n = len(candidates)
+    # Jamais plus que la réserve : le nombre d'essais est borné par sa taille, pas par la demande
+    count = min(count, n)
+    if count <= 0:
+        return chosen
+    attempts = 0
+    while len(chosen) < count and attempts < count * _REJECTION_FACTOR:
+        attempts += 1
+        ordinal = candidates[rng.randrange(n)]
+        if ordinal in taken or is_seen(seen, ordinal):
+            continue
+        taken.add(ordinal)
+        chosen.append(ordinal)
+    if len(chosen) < count:
+        # Repli : la plupart des candidates sont vues ou déjà prises, on filtre tout
+        rest = [o for o in candidates if o not in taken and not is_seen(seen, o)]
+        extra = rng.sample(rest, min(count - len(chosen), len(rest)))
+        taken.update(extra)
+        chosen.extend(extra)
+    if len(chosen) < count:
+        # Tout a été vu : on réautorise les questions déjà vues plutôt que de rendre un quiz incomplet
+        rest = [o for o in candidates if o not in taken]
+        extra = rng.sample(rest, min(count - len(chosen), len(rest)))
+        taken.update(extra)
+        chosen.extend(extra)
+    return chosen
+
+
+def generate(bank: QuestionBank, quotas: list[dict], seen: bytearray | None = None,
+             rng: random.Random | None = None) -> list[dict]:
+    """
+    Génère un quiz selon les quotas [{"theme", "test", "count"}], sans doublon,
+    en excluant si possible les ordinaux marqués dans `seen`.
+    """
+    rng = rng or random
+    taken: set = set()
+    out: list[dict] = []
+    # Sous le verrou de la banque : index et questions cohérents pendant le tirage (coût ∝ demande)
+    with bank._lock:
+        for quota in quotas:
+            candidates = bank._candidates(quota.get("theme"), quota.get("test"))
+            for ordinal in _draw(bank, candidates, int(quota.get("count", 0)), taken, seen, rng):
+                out.append({**bank.questions[ordinal], "ordinal": ordinal})
+    return out
+
+
+def generate_variants(bank: QuestionBank, quotas: list[dict], n: int, max_overlap: int | None = None,
+                      rng: random.Random | None = None, retries: int = 5) -> tuple[list[list[dict]], int]:
+    """
+    Génère n variantes distinctes d'un même quiz depuis un seul jeu de candidates en mémoire.
+
+    Chaque quota parcourt ses candidates dans un ordre mélangé, de façon circulaire :
+    les questions sont ainsi réparties uniformément entre les variantes (recouvrement
+    minimal). Si `max_overlap` est fixé, une variante qui partage plus de questions que
+    cette limite avec une variante précédente est retirée (jusqu'à `retries` fois).
+    Retourne (variantes, recouvrement maximal observé entre deux variantes).
+    """
+    rng = rng or random
+    cursors = []
+    for quota in quotas:
+        order = bank.candidates(quota.get("theme"), quota.get("test"))
+        rng.shuffle(order)
+        cursors.append([order, 0, int(quota.get("count", 0))])
+
+    def next_variant() -> list[int]:
+        picked: list[int] = []
+        taken: set = set()
+        for cursor in cursors:
+            order, pos, count = cursor
+            if not order:
+                continue
+            want = min(count, len(order))
+            got = 0
+            scanned = 0
+            while got < want and scanned < 2 * len(order):
+                if pos >= len(order):
+                    # Tour complet : on remélange pour ne pas reproduire les mêmes groupes
+                    rng.shuffle(order)
+                    pos = 0
+                ordinal = order[pos]
+                pos += 1
+                scanned += 1
+                if ordinal in taken:
+                    continue
+                taken.add(ordinal)
+                picked.append(ordinal)
+                got += 1
+            cursor[1] = pos
+        return picked
+
+    variants: list[list[int]] = []
+    sets: list[frozenset] = []
+    distinct: set = set()
+    worst = 0
+    for _ in range(int(n)):
+        best = None
+        for _attempt in range(retries + 1):
+            candidate = next_variant()
+            key = frozenset(candidate)
+            overlap = max((len(key & other) for other in sets), default=0)
+            if key in distinct:
+                overlap = len(key)
+            if best is None or overlap < best[2]:
+                best = (candidate, key, overlap)
+            if key not in distinct and (max_overlap is None or overlap <= max_overlap):
+                break
+        candidate, key, overlap = best
+        variants.append(candidate)
+        sets.append(key)
+        distinct.add(key)
+        worst = max(worst, overlap)
+    with bank._lock:
+        # Questions supprimées depuis la copie des candidates : écartées
+        return [[dict(bank.questions[o]) for o in v if o in bank.questions] for v in variants], worst
+
+
+# --- Chargement de la banque et attribution des ordinaux ---
+_bank: QuestionBank | None = None
+_bank_lock = threading.Lock()
+
+
+def _assign_missing_ordinals(store, docs: list[dict]):
+    """Attribue un ordinal aux questions qui n'en ont pas encore (données existantes, ETL)."""
+    missing = [d for d in docs if d.get("ordinal") is None]
+    if not missing:
+        return
+    # Le compteur ne doit jamais redescendre sous un ordinal existant
+    top = max((int(d["ordinal"]) for d in docs if d.get("ordinal") is not None), default=0)
+    store.raise_ordinal_counter(top)
+    ordinals = next_ordinals(len(missing))
+    # Un autre worker a pu attribuer certains ordinaux en parallèle : on garde les valeurs retenues
+    actual = store.set_missing("ordinal", {doc["_id"]: o for doc, o in zip(missing, ordinals)})
+    for doc in missing:
+        doc["ordinal"] = actual[doc["_id"]]
+
+
+def _assign_missing_qids(store, docs: list[dict]):
+    """Attribue un identifiant stable (qid) aux questions qui n'en ont pas encore (données existantes, ETL)."""
+    missing = [d for d in docs if not d.get("qid")]
+    if not missing:
+        return
+    taken = {d["qid"] for d in docs if d.get("qid")}
+    qids = {}
+    for doc in missing:
+        qid = question_id(doc)
+        if qid in taken:
+            # Contenu identique à une autre question : l'ordinal distingue les deux
+            qid = question_id(doc, salt=f"#{doc['ordinal']}")
+        taken.add(qid)
+        qids[doc["_id"]] = qid
+    actual = store.set_missing("qid", qids)
+    for doc in missing:
+        doc["qid"] = actual[doc["_id"]]
+
+
+def backfill_question_ids() -> int:
+    """
+    Complète ordinal et qid des questions qui n'en ont pas (données antérieures), sans
+    attendre le chargement de la banque : appelé au démarrage, même sans préchauffage.
+    Retourne le nombre de questions complétées.
+    """
+    store = get_store()
+    if not store.count_missing_ids():
+        return 0
+    docs = store.all_questions()
+    missing = sum(1 for d in docs if not d.get("qid") or d.get("ordinal") is None)
+    _assign_missing_ordinals(store, docs)
+    _assign_missing_qids(store, docs)
+    return missing
+
+
+def load_bank() -> QuestionBank:
+    """Charge toute la banque depuis le stockage (une seule requête)."""
+    store = get_store()
+    docs = store.all_questions()
+    _assign_missing_ordinals(store, docs)
+    _assign_missing_qids(store, docs)
+    return QuestionBank(docs)
+
+
+def get_bank() -> QuestionBank:
+    """Banque du processus courant (chargée au premier appel)."""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = load_bank()
+    return _bank
+
+
+def invalidate_bank():
+    """Force le rechargement de la banque au prochain appel."""
+    global _bank
+    with _bank_lock:
+        _bank = None
+
+
+def bank_loaded() -> QuestionBank | None:
+    """Banque si elle est déjà chargée (sans déclencher de chargement)."""
+    return _bank
+
+
+@on_questions_changed
+def _sync_bank(event: str, doc: dict):
+    """Répercute ajouts/suppressions sur la banque chargée (pas de rechargement complet)."""
+    if event == "reset":
+        invalidate_bank()
+        return
+    bank = _bank
+    if bank is None or doc.get("ordinal") is None:
+        return
+    if event == "added":
+        bank.add(doc)
+    elif event == "updated":
+        bank.remove(int(doc["ordinal"]))
+        bank.add(doc)
+    elif event == "deleted":
+        bank.remove(int(doc["ordinal"]))
+
+
+# --- Questions vues par étudiant (bitsets persistés par le stockage) ---
+_seen_cache = TTLCache(600, max_items=5000)
+
+
+def get_seen(username: str) -> bytearray:
+    """Bitset des questions déjà vues par un étudiant."""
+    bits = _seen_cache.get(username)
+    if bits is None:
+        bits = bytearray(get_store().load_seen(username)[0])
+        _seen_cache.set(username, bits)
+    return bits
+
+
+def record_seen(username: str, ordinals: list[int]):
+    """Marque des questions comme vues et persiste le bitset (fusion optimiste entre workers)."""
+    store = get_store()
+    for _ in range(3):
+        stored, version = store.load_seen(username)
+        bits = mark_seen(bytearray(stored), ordinals)
+        if store.save_seen(username, bytes(bits), version):
+            _seen_cache.set(username, bits)
+            return
+    # Conflits répétés : on garde au moins la vue locale à jour
+    _seen_cache.set(username, mark_seen(get_seen(username), ordinals))
+
+
+def generate_quiz(quotas: list[dict], username: str | None = None) -> list[dict]:
+    """Génère un quiz stratifié ; si username est fourni, évite ses questions déjà vues et les marque."""
+    bank = get_bank()
+    seen = get_seen(username) if username else None
+    questions = generate(bank, quotas, seen)
+    if username and questions:
+        record_seen(username, [q["ordinal"] for q in questions])
+    for q in questions:
+        q.pop("ordinal", None)
+    return questions
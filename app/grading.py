@@ -0,0 +1,264 @@
+"""
+Correction des réponses à partir de la clé de correction d'une session de quiz
+
+La clé (une entrée par position dans la session : qid, bonnes réponses, thème, test,
+choix) est construite une seule fois par session, à partir de la session en cache,
+puis conservée en mémoire : corriger un quiz complet ne coûte plus aucune lecture de
+la collection questions. Une réponse désigne sa question par qid ; le texte seul ne
+suffit que s'il est unique dans la session (deux questions de même intitulé mais de
+choix différents restent distinctes).
+
+Quiz « autonome » (`GET /quiz/{quiz_id}/bundle`) : les bonnes réponses y figurent
+sous forme d'empreintes SHA-256 salées par session et par question de l'ensemble
+trié des bonnes réponses. Le navigateur corrige chaque question localement en
+hachant la sélection de l'étudiant ; seules les réponses finales sont envoyées,
+une fois, et le serveur les vérifie avec le même hachage. Le sel étant fourni au
+client et les choix peu nombreux, une empreinte se retrouve en au plus 2^n - 1
+essais : elle dissuade seulement la lecture directe (quiz d'entraînement).
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from .attempts import attempts_buffer
+from .cache import TTLCache, ByteLRUCache, CachedPayload
+from .config import bundle_config, cache_config
+from .invalidation import on_invalidation
+from .leaderboard import leaderboards
+from .questions import get_quiz_session_by_id
+from .responses import dumps
+from .stats import question_stats
+
+# Clés de correction par quiz_id (sessions immuables : TTL long, nombre borné)
+_answer_keys = TTLCache(3600, max_items=2000)
+# Quiz autonomes pré-sérialisés, par quiz_id
+bundles_cache = ByteLRUCache(cache_config["bundles_max_bytes"])
+
+
+class AnswerKey:
+    """Clé de correction d'une session : une entrée par position, retrouvée par qid ou par texte."""
+
+    __slots__ = ("items", "by_qid", "by_text")
+
+    def __init__(self, questions: list[dict]):
+        self.items = [{
+            "qid": q.get("qid"),
+            "question": q.get("question", ""),
+            "correct": frozenset(q.get("correct", [])),
+            "theme": q.get("theme"),
+            "test": q.get("test"),
+            "choix": q.get("choix") or [],
+        } for q in questions]
+        self.by_qid = {item["qid"]: i for i, item in enumerate(self.items) if item["qid"]}
+        # Texte présent plusieurs fois : ambigu (None), seule la réponse par qid est reconnue
+        self.by_text: dict[str, int | None] = {}
+        for i, item in enumerate(self.items):
+            self.by_text[item["question"]] = None if item["question"] in self.by_text else i
+
+    def find(self, qid: str | None = None, question: str | None = None) -> int | None:
+        """Position de la question désignée par qid, sinon par texte s'il est unique (None sinon)."""
+        if qid:
+            return self.by_qid.get(qid)
+        return self.by_text.get(question)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def build_answer_key(session: dict) -> AnswerKey:
+    """Clé de correction d'une session."""
+    return AnswerKey(session.get("questions", []))
+
+
+def get_answer_key(quiz_id: str) -> AnswerKey | None:
+    """Clé de correction d'un quiz (None si le quiz n'existe pas)."""
+    key = _answer_keys.get(quiz_id)
+    if key is None:
+        session = get_quiz_session_by_id(quiz_id)
+        if session is None:
+            return None
+        key = build_answer_key(session)
+        _answer_keys.set(quiz_id, key)
+    return key
+
+
+def invalidate_answer_key(quiz_id: str):
+    _answer_keys.invalidate(quiz_id)
+    bundles_cache.invalidate(quiz_id)
+    leaderboards.drop(quiz_id)
+
+
+@on_invalidation("sessions")
+def _drop_remote_answer_key(payload: dict | None):
+    """Quiz supprimé par un autre worker (ou remise à zéro : toutes les clés)."""
+    if payload is None:
+        _answer_keys.invalidate()
+        bundles_cache.invalidate()
+    else:
+        invalidate_answer_key(payload["quiz_id"])
+
+
+def is_correct(expected: frozenset, reponse: list[str]) -> bool:
+    """Comparaison exacte entre réponses sélectionnées et bonnes réponses."""
+    return set(reponse) == expected
+
+
+def record_attempt(username: str, quiz_id: str | None, question: str, reponse: list[str], correct: bool,
+                   theme: str | None = None, test: str | None = None, choix: list[str] | None = None,
+                   index: int | None = None, qid: str | None = None):
+    """
+    Ajoute une réponse corrigée au journal des tentatives (écriture différée), aux
+    compteurs de difficulté de la question et au classement du quiz. Avec quiz_id,
+    index est la position de la question dans la session (voir AnswerKey.find) ;
+    sinon, qid identifie la question et choix (ses options) borne les compteurs par choix.
+    """
+    if quiz_id and index is not None:
+        key = _answer_keys.get(quiz_id)
+        if key is not None and index < len(key):
+            item = key.items[index]
+            qid = qid or item["qid"]
+            if theme is None and test is None:
+                theme, test = item["theme"], item["test"]
+            choix = item["choix"] if choix is None else choix
+            leaderboards.record(quiz_id, len(key), username, str(index), correct)
+    question_stats.record(qid, question, reponse, correct, theme, test, choix)
+    attempts_buffer.record({
+        "user": username,
+        "quiz_id": quiz_id,
+        "qid": qid,
+        "question": question,
+        "reponse": list(reponse),
+        "correct": correct,
+        "at": datetime.now(timezone.utc),
+    })
+
+
+def grade_submission(quiz_id: str, answers: list[dict], username: str | None = None) -> dict | None:
+    """
+    Corrige toutes les réponses d'un étudiant pour un quiz.
+    Retourne le détail par question et le score, ou None si le quiz n'existe pas.
+    Si username est fourni, chaque réponse reconnue est journalisée.
+    """
+    key = get_answer_key(quiz_id)
+    if key is None:
+        return None
+    results = []
+    by_index = {}
+    for answer in answers:
+        index = key.find(answer.get("qid"), answer["question"])
+        if index is None:
+            results.append({"qid": answer.get("qid"), "question": answer["question"], "correct": False,
+                            "unknown": True})
+        else:
+            # Une réponse par question (la dernière fait foi) : pas de score au-delà du total
+            by_index[index] = answer
+    score = 0
+    for index, answer in by_index.items():
+        item = key.items[index]
+        ok = is_correct(item["correct"], answer["reponse"])
+        score += ok
+        if username is not None:
+            record_attempt(username, quiz_id, item["question"], answer["reponse"], ok, index=index)
+        results.append({
+            "qid": item["qid"],
+            "question": item["question"],
+            "correct": ok,
+            "correct_answers": sorted(item["correct"]),
+        })
+    return {"quiz_id": quiz_id, "score": score, "total": len(key), "results": results}
+
+
+# --- Quiz autonome (correction dans le navigateur) ---
+def session_salt(quiz_id: str) -> str:
+    """Sel propre à la session, stable entre workers (dérivé de BUNDLE_SECRET)."""
+    return hashlib.blake2b(quiz_id.encode("utf-8"), key=bundle_config["secret"], digest_size=16).hexdigest()
+
+
+def answer_hash(salt: str, index: int, reponse) -> str:
+    """
+    Empreinte d'un ensemble de réponses pour la question n° index :
+    SHA-256 de « sel|index|réponses distinctes triées, séparées par U+001F ».
+    Calcul identique côté navigateur (crypto.subtle.digest).
+    """
+    content = f"{salt}|{index}|" + "\x1f".join(sorted(set(reponse)))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def build_bundle(quiz_id: str, session: dict) -> dict:
+    """Quiz autonome : questions et choix, bonnes réponses remplacées par leur empreinte."""
+    salt = session_salt(quiz_id)
+    return {
+        "quiz_id": quiz_id,
+        "name": session.get("name"),
+        "theme": session.get("theme"),
+        "salt": salt,
+        "hash": "sha256",
+        "questions": [
+            {
+                "index": i,
+                "qid": q.get("qid"),
+                "question": q.get("question", ""),
+                "theme": q.get("theme"),
+                "test": q.get("test"),
+                "choix": q.get("choix", []),
+                "answer_hash": answer_hash(salt, i, q.get("correct", [])),
+            }
+            for i, q in enumerate(session.get("questions", []))
+        ],
+    }
+
+
+def _load_bundle_payload(quiz_id: str) -> CachedPayload | None:
+    session = get_quiz_session_by_id(quiz_id)
+    if session is None:
+        return None
+    bundle = build_bundle(quiz_id, session)
+    return CachedPayload(bundle, dumps(bundle))
+
+
+def get_bundle_payload(quiz_id: str) -> CachedPayload | None:
+    """Quiz autonome pré-sérialisé (construit une fois par quiz)."""
+    return bundles_cache.get_or_load(quiz_id, lambda: _load_bundle_payload(quiz_id))
+
+
+def verify_bundle_submission(quiz_id: str, answers: list[dict], username: str,
+                             claimed_score: int | None = None) -> dict | None:
+    """
+    Vérifie les réponses finales d'un quiz autonome : chaque sélection est hachée
+    comme dans le navigateur et comparée à l'empreinte du quiz. Les réponses sont
+    journalisées comme une soumission classique. None si le quiz n'existe pas.
+    """
+    payload = get_bundle_payload(quiz_id)
+    key = get_answer_key(quiz_id)
+    if payload is None or key is None:
+        return None
+    bundle = payload.data
+    questions = bundle["questions"]
+    results = []
+    score = 0
+    # Une réponse par question (la dernière fait foi) : pas de score au-delà du total
+    answers = list({answer["index"]: answer for answer in answers}.values())
+    for answer in answers:
+        index = answer["index"]
+        if index >= len(questions):
+            results.append({"index": index, "correct": False, "unknown": True})
+            continue
+        q = questions[index]
+        ok = answer_hash(bundle["salt"], index, answer["reponse"]) == q["answer_hash"]
+        score += ok
+        record_attempt(username, quiz_id, q["question"], answer["reponse"], ok, q["theme"], q["test"],
+                       q.get("choix"), index=index)
+        results.append({
+            "index": index,
+            "question": q["question"],
+            "correct": ok,
+            "correct_answers": sorted(key.items[index]["correct"]) if index < len(key) else [],
+        })
+    return {
+        "quiz_id": quiz_id,
+        "username": username,
+        "score": score,
+        "total": len(questions),
+        "claimed_score": claimed_score,
+        "verified": claimed_score is None or claimed_score == score,
+        "results": results,
+    }
@@ -0,0 +1,180 @@
+"""
+Canal d'invalidation des caches entre workers (plusieurs processus, plusieurs nœuds)
+
+Chaque worker garde des données en mémoire : banque de questions et index dérivés,
+listes de thèmes/tests, sessions pré-sérialisées, clés de correction, rôles. Après
+chaque mutation, la couche de données publie un événement (sujet + contenu) dans la
+collection plafonnée `invalidations`. Chaque worker relit cette collection toutes
+les `INVALIDATION_POLL_INTERVAL` secondes et transmet les événements des autres
+processus aux abonnés du sujet (`@on_invalidation("questions")`) : un cache périmé
+est corrigé au plus tard après un intervalle de relecture.
+
+Pas de change stream (ni replica set) : dans une collection plafonnée, l'ordre
+naturel est l'ordre d'insertion ; le worker lit du plus récent jusqu'au dernier
+événement déjà vu. Si ce dernier a été écrasé (retard supérieur à la capacité de la
+collection), les abonnés reçoivent une remise à zéro (contenu None).
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from pymongo.errors import CollectionInvalid
+
+from .config import invalidation_config
+
+logger = logging.getLogger("miskatonic")
+
+
+class InvalidationChannel:
+    """Publication et relecture périodique des événements d'invalidation."""
+
+    def __init__(self, poll_interval_s: float = 0.5, capped_bytes: int = 16 * 1024 * 1024,
+                 capped_docs: int = 20000):
+        self.poll_interval_s = poll_interval_s
+        self.capped_bytes = capped_bytes
+        self.capped_docs = capped_docs
+        self.origin: str | None = None
+        self._collection = None  # fabrique de la collection, fournie au démarrage
+        self._handlers: dict[str, list] = {}
+        self._last_id = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.published = 0
+        self.received = 0
+        self.resets = 0
+        self.errors = 0
+        self.last_poll_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def subscribe(self, topic: str, callback):
+        """Enregistre callback(payload) pour les événements du sujet venant d'autres workers."""
+        self._handlers.setdefault(topic, []).append(callback)
+
+    def publish(self, topic: str, payload: dict):
+        """Publie un événement (sans effet tant que le canal n'est pas démarré)."""
+        if self._collection is None:
+            return
+        try:
+            self._collection().insert_one({
+                "topic": topic,
+                "payload": payload,
+                "origin": self.origin,
+                "at": datetime.utcnow(),
+            })
+            self.published += 1
+        except Exception as exc:
+            # Les autres workers se recaleront à l'expiration de leurs caches (TTL)
+            self.errors += 1
+            logger.warning("Invalidation « %s » non publiée (%s)", topic, exc)
+
+    def _dispatch(self, topic: str, payload: dict | None):
+        for callback in self._handlers.get(topic, ()):
+            try:
+                callback(payload)
+            except Exception as exc:
+                logger.warning("Invalidation « %s » : abonné en échec (%s)", topic, exc)
+
+    def poll(self) -> int:
+        """Applique les événements publiés depuis la dernière relecture. Retourne leur nombre."""
+        started = time.perf_counter()
+        coll = self._collection()
+        new = []
+        found = self._last_id is None
+        for doc in coll.find({}, sort=[("$natural", -1)], batch_size=16):
+            if doc["_id"] == self._last_id:
+                found = True
+                break
+            new.append(doc)
+        if new:
+            self._last_id = new[0]["_id"]
+        if not found:
+            # Événements perdus (écrasés dans la collection plafonnée) : remise à zéro
+            self.resets += 1
+            logger.warning("Invalidation : retard trop important, caches remis à zéro")
+            for topic in self._handlers:
+                self._dispatch(topic, None)
+            new = []
+        now = datetime.utcnow()
+        for doc in reversed(new):
+            if doc.get("origin") == self.origin:
+                continue  # déjà appliqué localement
+            self.received += 1
+            self.max_lag_ms = max(self.max_lag_ms, (now - doc["at"]).total_seconds() * 1000)
+            self._dispatch(doc.get("topic"), doc.get("payload"))
+        self.last_poll_ms = round((time.perf_counter() - started) * 1000, 2)
+        return len(new)
+
+    def _ensure_collection(self):
+        coll = self._collection()
+        try:
+            coll.database.create_collection(coll.name, capped=True, size=self.capped_bytes,
+                                            max=self.capped_docs)
+        except CollectionInvalid:
+            pass  # déjà créée (autre worker)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval_s):
+            try:
+                self.poll()
+            except Exception as exc:
+                self.errors += 1
+                logger.warning("Invalidation : relecture impossible (%s)", exc)
+
+    def attach(self, collection_factory):
+        """Publication seule, sans relecture (scripts comme l'ETL) : crée la collection plafonnée si besoin."""
+        self._collection = collection_factory
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._ensure_collection()
+
+    def start(self, collection_factory):
+        """Crée la collection plafonnée si besoin, se place après le dernier événement et lance la relecture."""
+        self.attach(collection_factory)
+        last = collection_factory().find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        self._last_id = last["_id"] if last else None
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self._collection = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._thread is not None,
+            "origin": self.origin,
+            "poll_interval_s": self.poll_interval_s,
+            "published": self.published,
+            "received": self.received,
+            "resets": self.resets,
+            "errors": self.errors,
+            "last_poll_ms": self.last_poll_ms,
+            "max_lag_ms": round(self.max_lag_ms, 2),
+        }
+
+
+invalidation_channel = InvalidationChannel(
+    poll_interval_s=invalidation_config["poll_interval_s"],
+    capped_bytes=invalidation_config["capped_bytes"],
+    capped_docs=invalidation_config["capped_docs"],
+)
+
+
+def on_invalidation(topic: str):
+    """Décorateur : callback(payload) appelé pour chaque événement du sujet publié par un autre worker."""
+    def register(callback):
+        invalidation_channel.subscribe(topic, callback)
+        return callback
+    return register
+
+
+def publish_invalidation(topic: str, payload: dict | None):
+    invalidation_channel.publish(topic, payload)
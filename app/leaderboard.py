@@ -0,0 +1,164 @@
+"""
+Classements en direct par session de quiz
+
+Chaque réponse corrigée met à jour le score de l'étudiant (une question compte au
+plus une fois : la dernière réponse fait foi). Les scores sont des entiers bornés
+par le nombre de questions du quiz : un arbre de Fenwick indexé par score donne
+le rang d'un étudiant en O(log n), et des seaux par score (ordre d'arrivée)
+servent le top-k sans tri. Les classements inactifs sont évincés (TTL, LRU),
+ainsi qu'à la suppression du quiz.
+
+Plusieurs workers / nœuds : les classements vivent en mémoire de chaque worker.
+Chaque réponse enregistrée est donc aussi publiée sur le canal d'invalidation
+(sujet « leaderboard ») et rejouée par les autres workers : tous convergent après
+un intervalle de relecture. Un worker démarré (ou dont le classement a été évincé)
+en cours de quiz ne connaît que les réponses arrivées depuis. Sans canal (SQLite,
+`INVALIDATION_ENABLED=0`), lancer un seul worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from .config import leaderboard_config
+from .invalidation import on_invalidation, publish_invalidation
+
+
+class Leaderboard:
+    """Classement d'un quiz : scores de 0 à max_score."""
+
+    def __init__(self, max_score: int):
+        self.max_score = max_score
+        self._tree = [0] * (max_score + 2)  # Fenwick, indices 1..max_score+1 (score + 1)
+        self._scores: dict[str, int] = {}
+        self._answers: dict[str, dict[str, bool]] = {}
+        # Seaux par score : dict utilisé comme ensemble ordonné (ex aequo : premier arrivé d'abord)
+        self._buckets: list[dict] = [{} for _ in range(max_score + 1)]
+        self._lock = threading.Lock()
+        self.updated_at = time.monotonic()
+
+    def _add(self, score: int, delta: int):
+        i = score + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_le(self, score: int) -> int:
+        """Nombre d'étudiants ayant un score <= score."""
+        i, total = min(score, self.max_score) + 1, 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def record(self, username: str, question: str, correct: bool) -> int:
+        """Enregistre une réponse corrigée et retourne le nouveau score de l'étudiant."""
+        with self._lock:
+            self.updated_at = time.monotonic()
+            answers = self._answers.setdefault(username, {})
+            previous = self._scores.get(username)
+            answers[question] = bool(correct)
+            score = min(sum(answers.values()), self.max_score)
+            if previous == score:
+                return score
+            if previous is not None:
+                self._add(previous, -1)
+                del self._buckets[previous][username]
+            self._add(score, 1)
+            self._buckets[score][username] = None
+            self._scores[username] = score
+            return score
+
+    def rank(self, username: str) -> dict | None:
+        """Rang (1 = meilleur, ex aequo au même rang) et score d'un étudiant."""
+        with self._lock:
+            score = self._scores.get(username)
+            if score is None:
+                return None
+            above = len(self._scores) - self._count_le(score)
+            return {"username": username, "score": score, "rank": above + 1}
+
+    def top(self, k: int) -> list[dict]:
+        """Les k meilleurs, du meilleur score au plus faible."""
+        result = []
+        with self._lock:
+            above = 0
+            for score in range(self.max_score, -1, -1):
+                bucket = self._buckets[score]
+                for username in bucket:
+                    if len(result) >= k:
+                        return result
+                    result.append({"username": username, "score": score, "rank": above + 1})
+                above += len(bucket)
+        return result
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class LeaderboardRegistry:
+    """Classements par quiz_id, bornés en nombre (LRU) et évincés après inactivité."""
+
+    def __init__(self, max_boards: int = 200, idle_ttl_s: float = 4 * 3600):
+        self.max_boards = max_boards
+        self.idle_ttl_s = idle_ttl_s
+        self._boards: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_ttl_s
+        for quiz_id in [q for q, b in self._boards.items() if b.updated_at < deadline]:
+            del self._boards[quiz_id]
+            self.evicted += 1
+
+    def record(self, quiz_id: str, max_score: int, username: str, question: str, correct: bool) -> int:
+        """Enregistre une réponse corrigée et la publie aux autres workers. Retourne le score."""
+        score = self.apply(quiz_id, max_score, username, question, correct)
+        publish_invalidation("leaderboard", {"quiz_id": quiz_id, "max_score": max_score, "username": username,
+                                             "question": question, "correct": bool(correct)})
+        return score
+
+    def apply(self, quiz_id: str, max_score: int, username: str, question: str, correct: bool) -> int:
+        """Enregistre une réponse dans le classement local (sans publication)."""
+        with self._lock:
+            board = self._boards.get(quiz_id)
+            if board is None:
+                self._evict_idle()
+                board = self._boards[quiz_id] = Leaderboard(max_score)
+                while len(self._boards) > self.max_boards:
+                    self._boards.popitem(last=False)
+                    self.evicted += 1
+            self._boards.move_to_end(quiz_id)
+        return board.record(username, question, correct)
+
+    def get(self, quiz_id: str) -> Leaderboard | None:
+        with self._lock:
+            return self._boards.get(quiz_id)
+
+    def drop(self, quiz_id: str):
+        """Supprime le classement d'un quiz (quiz supprimé)."""
+        with self._lock:
+            self._boards.pop(quiz_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "boards": len(self._boards),
+                "max_boards": self.max_boards,
+                "participants": sum(len(b) for b in self._boards.values()),
+                "evicted": self.evicted,
+            }
+
+
+leaderboards = LeaderboardRegistry(
+    max_boards=leaderboard_config["max_boards"],
+    idle_ttl_s=leaderboard_config["idle_ttl_s"],
+)
+
+
+@on_invalidation("leaderboard")
+def _apply_remote_answer(payload: dict | None):
+    """Réponse enregistrée par un autre worker (remise à zéro : les classements en cours sont gardés)."""
+    if payload is not None:
+        leaderboards.apply(payload["quiz_id"], payload["max_score"], payload["username"],
+                           payload["question"], payload["correct"])
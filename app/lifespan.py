@@ -0,0 +1,118 @@
+"""
+Cycle de vie de l'application (démarrage / arrêt)
+
+Toutes les ressources sont créées ici, dans chaque processus worker, et non à
+l'import des modules : base SQLite, stockage des questions, préchauffage des caches.
+Le worker ne se déclare prêt (/readyz) qu'une fois ces étapes terminées.
+"""
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+from .archive import session_archiver, ensure_indexes as ensure_session_indexes
+from .attempts import attempts_buffer
+from .config import (startup_config, quiz_pool_config, invalidation_config, archive_config, static_config,
+                     storage_config)
+from .database import init_db
+from .generator import backfill_question_ids, get_bank
+from .invalidation import invalidation_channel
+from .questions import ping, warm_up, ensure_indexes, seed_questions
+from .quiz_pool import quiz_pool
+from .search import get_search_index
+from .static import static_site
+from .stats import question_stats
+from .storage import get_store, close_store
+from .storage.mongo import get_db
+
+logger = logging.getLogger("miskatonic")
+
+# État partagé avec les sondes /healthz et /readyz
+startup_state = {
+    "ready": False,
+    "import_ms": None,
+    "startup_ms": None,
+    "warmup": None,
+    "static": None,
+    "seeded": None,
+    "backfilled": None,
+    "error": None,
+}
+
+
+_startup_lock = threading.Lock()
+
+
+def complete_startup():
+    """
+    Étapes du démarrage qui dépendent des bases (idempotent) : appelé par le lifespan,
+    puis par /readyz tant que le worker n'est pas prêt (stockage lancé après l'API).
+    Lève une exception si une étape échoue.
+    """
+    with _startup_lock:
+        if startup_state["ready"]:
+            return
+        init_db()
+        store = get_store()
+        if not ping(startup_config["ping_timeout_s"]):
+            raise RuntimeError(f"Stockage {store.backend} injoignable")
+        ensure_indexes()
+        # TTL des sessions et canal d'invalidation : propres à MongoDB (SQLite : un seul nœud)
+        mongo = store.backend == "mongo"
+        if startup_config["workers"] > 1 and not (mongo and invalidation_config["enabled"]):
+            raise RuntimeError("Plusieurs workers (WEB_CONCURRENCY) sans canal d'invalidation : "
+                               "classements et caches propres à chaque worker")
+        if mongo:
+            ensure_session_indexes()
+        else:
+            startup_state["seeded"] = seed_questions(storage_config["seed_file"])
+        # Questions sans qid ni ordinal : complétées avant toute lecture (liste, accès par qid)
+        startup_state["backfilled"] = backfill_question_ids()
+        if mongo and invalidation_config["enabled"]:
+            # Avant le préchauffage : aucune mutation d'un autre worker n'est manquée
+            invalidation_channel.start(lambda: get_db().invalidations)
+        attempts_buffer.start()
+        question_stats.start()
+        if startup_config["warmup"]:
+            startup_state["warmup"] = warm_up(startup_config["warmup_sessions"])
+            startup_state["warmup"]["bank"] = len(get_bank())
+            startup_state["warmup"]["search_terms"] = get_search_index().stats()["terms"]
+        if quiz_pool_config["enabled"]:
+            quiz_pool.start()
+        if mongo and archive_config["enabled"]:
+            session_archiver.start()
+        startup_state.update(ready=True, error=None)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Initialise les ressources du worker, puis les libère à l'arrêt."""
+    started = time.perf_counter()
+    if static_config["enabled"]:
+        # Indépendant des bases : le frontend est servi même si le stockage est injoignable
+        try:
+            startup_state["static"] = await run_in_threadpool(static_site.build)
+        except Exception as exc:
+            logger.warning("Frontend non construit : %s", exc)
+    try:
+        await run_in_threadpool(complete_startup)
+    except Exception as exc:
+        # Le worker reste vivant (/healthz) mais non prêt (/readyz) ; /readyz réessaie
+        startup_state["error"] = str(exc)
+        logger.warning("Démarrage incomplet : %s", exc)
+    startup_state["startup_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    logger.info("Import %.1f ms, démarrage %.1f ms",
+                startup_state["import_ms"] or 0, startup_state["startup_ms"])
+    try:
+        yield
+    finally:
+        startup_state["ready"] = False
+        quiz_pool.stop()
+        await run_in_threadpool(session_archiver.stop)
+        await run_in_threadpool(invalidation_channel.stop)
+        # Dernier vidage du journal des tentatives avant de fermer le client
+        await run_in_threadpool(attempts_buffer.stop)
+        await run_in_threadpool(question_stats.stop)
+        close_store()
@@ -0,0 +1,175 @@
+"""
+Mode quiz en direct : diffusion asyncio par session (WebSocket / SSE)
+
+Le professeur fait avancer les questions ; chaque message est sérialisé une seule
+fois (texte JSON pour WebSocket, trame `data:` pour SSE) puis déposé dans la file
+bornée de chaque connexion. Une connexion dont la file est pleine (client trop
+lent) est déconnectée plutôt que de ralentir la diffusion aux autres.
+
+Le hub vit dans la boucle asyncio du worker : le professeur et ses étudiants
+doivent être servis par le même processus (un worker, ou affinité de session).
+"""
+import asyncio
+
+from .config import live_config
+from .responses import dumps
+
+
+class LiveMessage:
+    """Message pré-sérialisé, partagé par toutes les connexions."""
+
+    __slots__ = ("text", "sse")
+
+    def __init__(self, content: dict):
+        body = dumps(content)
+        self.text = body.decode("utf-8")
+        self.sse = b"data: " + body + b"\n\n"
+
+
+# Marqueur de fin de flux (diffusion terminée ou client déconnecté)
+_CLOSE = None
+
+
+class Subscriber:
+    """File d'attente bornée d'une connexion (une place de plus, réservée au marqueur de fin)."""
+
+    __slots__ = ("queue", "maxsize", "dropped", "closed")
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize + 1)
+        self.maxsize = maxsize
+        self.dropped = False
+        self.closed = False
+
+    def offer(self, message: LiveMessage) -> bool:
+        """Dépose un message sans bloquer ; False si la file est pleine."""
+        if self.queue.qsize() >= self.maxsize:
+            return False
+        self.queue.put_nowait(message)
+        return True
+
+    def close(self, discard: bool = False):
+        """
+        Place le marqueur de fin après les messages en attente (le message `end` est livré).
+        discard : abandonne d'abord ces messages (client parti ou trop lent).
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if discard:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+    async def messages(self):
+        """Messages à envoyer au client, jusqu'au marqueur de fin."""
+        while True:
+            message = await self.queue.get()
+            if message is _CLOSE:
+                return
+            yield message
+
+
+class LiveChannel:
+    """Connexions et état courant d'une session en direct."""
+
+    def __init__(self, quiz_id: str):
+        self.quiz_id = quiz_id
+        self.subscribers: set[Subscriber] = set()
+        self.current: LiveMessage | None = None
+        self.index: int = -1
+        self.sent = 0
+        self.dropped = 0
+
+
+class LiveHub:
+    """Canaux de diffusion par quiz_id (à utiliser depuis la boucle asyncio)."""
+
+    def __init__(self, queue_size: int = 8, max_subscribers: int = 5000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._channels: dict[str, LiveChannel] = {}
+
+    def channel(self, quiz_id: str) -> LiveChannel | None:
+        return self._channels.get(quiz_id)
+
+    def subscribe(self, quiz_id: str) -> Subscriber | None:
+        """Nouvelle connexion ; reçoit d'abord la question en cours. None si le canal est plein."""
+        channel = self._channels.get(quiz_id)
+        if channel is None:
+            channel = self._channels[quiz_id] = LiveChannel(quiz_id)
+        if len(channel.subscribers) >= self.max_subscribers:
+            return None
+        sub = Subscriber(self.queue_size)
+        if channel.current is not None:
+            sub.offer(channel.current)
+        channel.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, quiz_id: str, sub: Subscriber):
+        channel = self._channels.get(quiz_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(sub)
+        if not channel.subscribers and channel.current is None:
+            del self._channels[quiz_id]
+
+    def publish(self, quiz_id: str, content: dict, index: int | None = None) -> dict:
+        """Diffuse un message à toutes les connexions du quiz (sérialisé une seule fois)."""
+        channel = self._channels.get(quiz_id)
+        if channel is None:
+            channel = self._channels[quiz_id] = LiveChannel(quiz_id)
+        message = LiveMessage(content)
+        channel.current = message
+        if index is not None:
+            channel.index = index
+        delivered = dropped = 0
+        for sub in list(channel.subscribers):
+            if sub.closed:
+                continue  # client parti, pas encore désinscrit
+            if sub.offer(message):
+                delivered += 1
+            else:
+                # Client trop lent : déconnecté
+                sub.dropped = True
+                sub.close(discard=True)
+                channel.subscribers.discard(sub)
+                dropped += 1
+        channel.sent += delivered
+        channel.dropped += dropped
+        return {"delivered": delivered, "dropped": dropped}
+
+    def close(self, quiz_id: str) -> int:
+        """Termine la session en direct : toutes les connexions reçoivent la fin de flux."""
+        channel = self._channels.pop(quiz_id, None)
+        if channel is None:
+            return 0
+        for sub in channel.subscribers:
+            sub.close()
+        return len(channel.subscribers)
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(c.subscribers) for c in self._channels.values()),
+            "sent": sum(c.sent for c in self._channels.values()),
+            "dropped": sum(c.dropped for c in self._channels.values()),
+        }
+
+
+def question_message(session: dict, index: int) -> dict | None:
+    """Message « question » pour l'étudiant (sans les bonnes réponses)."""
+    questions = session.get("questions", [])
+    if not 0 <= index < len(questions):
+        return None
+    q = questions[index]
+    return {
+        "type": "question",
+        "quiz_id": session.get("quiz_id"),
+        "index": index,
+        "total": len(questions),
+        "question": {k: q.get(k) for k in ("question", "theme", "test", "choix")},
+    }
+
+
+live_hub = LiveHub(queue_size=live_config["queue_size"], max_subscribers=live_config["max_subscribers"])
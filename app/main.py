@@ -2,24 +2,50 @@
 Miskatonic Quiz API - Point d'entrée principal
 
 API simple et bien organisée pour la gestion de quiz universitaires.
+Aucune ressource n'est ouverte à l'import : voir app/lifespan.py.
 """
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .config import app_config, cors_config
-from .database import init_db
-from .routes import auth_routes, questions_routes, quiz_routes, utilities_routes
+from .admission import AdmissionMiddleware
+from .compression import CompressionMiddleware
+from .config import app_config, cors_config, static_config
+from .lifespan import lifespan, startup_state
+from .profiling import ProfilingMiddleware
+from .responses import FastJSONResponse
+from .routes import auth_routes, questions_routes, quiz_routes, utilities_routes, admin_routes, health_routes, stats_routes, live_routes, frontend_routes, adaptive_routes
+
 
+# Initialisation de l'application (ressources ouvertes dans le lifespan, par worker)
+app = FastAPI(**app_config, default_response_class=FastJSONResponse, lifespan=lifespan)
 
-# Initialisation de l'application
-app = FastAPI(**app_config)
-init_db()
+# Contrôle d'admission : limites par classe de requêtes, délestage 503 + Retry-After
+app.add_middleware(AdmissionMiddleware)
 
-# Configuration CORS
+# Configuration CORS (englobe les 503 du contrôle d'admission)
 app.add_middleware(CORSMiddleware, **cors_config)
 
+# Compression gzip/brotli au-delà de COMPRESSION_MIN_SIZE octets
+app.add_middleware(CompressionMiddleware)
+
+# Profilage échantillonné (inactif tant qu'aucune requête n'est sélectionnée)
+app.add_middleware(ProfilingMiddleware)
+
 # Enregistrement des routes
 app.include_router(auth_routes.router)
 app.include_router(questions_routes.router)
+app.include_router(adaptive_routes.router)
 app.include_router(quiz_routes.router)
-app.include_router(utilities_routes.router)
\ No newline at end of file
+app.include_router(live_routes.router)
+app.include_router(utilities_routes.router)
+app.include_router(stats_routes.router)
+app.include_router(admin_routes.router)
+app.include_router(health_routes.router)
+if static_config["enabled"]:
+    app.include_router(frontend_routes.router)
+
+startup_state["import_ms"] = round((time.perf_counter() - _import_started) * 1000, 2)
\ No newline at end of file
@@ -7,6 +7,7 @@ from typing import List
 
 class Question(BaseModel):
     """Modèle d'une question de quiz complète"""
+    qid: str | None = Field(None, description="Identifiant stable de la question", example="3f9a1c07d2b84e61")
     question: str = Field(..., description="Texte de la question", example="Quelle est la capitale de la France ?")
     theme: str = Field(..., description="Thème/matière de la question", example="Géographie")
     test: str = Field(..., description="Type de test/examen", example="Culture générale")
@@ -31,22 +32,108 @@ class QuestionInput(BaseModel):
     correct: List[str] = Field(..., description="Bonnes réponses", example=["4"])
 
 
+class QuestionUpdate(BaseModel):
+    """Modification d'une question (seuls les champs fournis sont modifiés)"""
+    username: str = Field(..., description="Nom d'utilisateur (pour vérification des droits)", example="prof_martin")
+    question: str | None = Field(None, description="Texte de la question", example="Combien font 2+2 ?")
+    theme: str | None = Field(None, description="Thème de la question", example="Mathématiques")
+    test: str | None = Field(None, description="Type de test", example="Calcul mental")
+    choix: List[str] | None = Field(None, description="Réponses possibles", example=["3", "4", "5", "6"])
+    correct: List[str] | None = Field(None, description="Bonnes réponses", example=["4"])
+
+
+class QuestionImport(BaseModel):
+    """Import groupé de questions"""
+    username: str = Field(..., description="Nom d'utilisateur (pour vérification des droits)", example="prof_martin")
+    questions: List[Question] = Field(..., description="Questions à importer", max_length=5000)
+
+
+class QuotaInput(BaseModel):
+    """Quota de questions pour un thème et/ou un test (génération stratifiée)"""
+    theme: str | None = Field(None, description="Thème ciblé (tous si absent)", example="BDD")
+    test: str | None = Field(None, description="Test ciblé (tous si absent)", example="Test de positionnement")
+    count: int = Field(..., description="Nombre de questions à tirer", example=4, ge=1, le=50)
+
+
 class QuizInput(BaseModel):
     """Paramètres de création d'un quiz"""
     username: str = Field(..., description="Créateur du quiz", example="prof_martin")
     limit: int = Field(default=5, description="Nombre de questions", example=10, ge=1, le=50)
     name: str | None = Field(None, description="Nom du quiz", example="Quiz de révision")
     theme: str | None = Field(None, description="Filtrage par thème", example="Mathématiques")
+    quotas: List[QuotaInput] | None = Field(None, description="Quotas par thème/test (remplace limit et theme)",
+                                            example=[{"theme": "BDD", "count": 4}, {"theme": "Python", "count": 3}])
+
+
+class QuizBatchInput(BaseModel):
+    """Création d'une variante de quiz par étudiant pour toute une classe"""
+    username: str = Field(..., description="Créateur des quiz", example="prof_martin")
+    class_size: int = Field(..., description="Nombre de variantes (une par étudiant)", example=30, ge=1, le=1000)
+    limit: int = Field(default=10, description="Nombre de questions par variante", example=10, ge=1, le=50)
+    name: str | None = Field(None, description="Nom du quiz (suffixé par le numéro de variante)", example="Partiel BDD")
+    theme: str | None = Field(None, description="Filtrage par thème", example="BDD")
+    test: str | None = Field(None, description="Filtrage par test", example="Test de validation")
+    quotas: List[QuotaInput] | None = Field(None, description="Quotas par thème/test (remplace limit, theme et test)")
+    max_overlap: int | None = Field(None, description="Questions communes maximum entre deux variantes", example=3, ge=0)
 
 
 class AnswerInput(BaseModel):
     """Réponse d'un étudiant à une question"""
     username: str = Field(..., description="Nom de l'étudiant", example="etudiant_marie")
     quiz_id: str | None = Field(None, description="ID de session de quiz", example="quiz_123456")
+    qid: str | None = Field(None, description="Identifiant de la question (accès direct)", example="3f9a1c07d2b84e61")
+    question: str = Field(..., description="Question à laquelle on répond", example="Combien font 2+2 ?")
+    reponse: List[str] = Field(..., description="Réponses sélectionnées", example=["4"])
+
+
+class SubmittedAnswer(BaseModel):
+    """Réponse à une question dans une soumission groupée"""
+    qid: str | None = Field(None, description="Identifiant de la question (requis si l'intitulé apparaît plusieurs fois dans le quiz)", example="3f9a1c07d2b84e61")
     question: str = Field(..., description="Question à laquelle on répond", example="Combien font 2+2 ?")
     reponse: List[str] = Field(..., description="Réponses sélectionnées", example=["4"])
 
 
+class QuizSubmission(BaseModel):
+    """Soumission de toutes les réponses d'un étudiant pour un quiz"""
+    username: str = Field(..., description="Nom de l'étudiant", example="etudiant_marie")
+    answers: List[SubmittedAnswer] = Field(..., description="Réponses, une par question", max_length=200)
+
+
+class BundleAnswer(BaseModel):
+    """Réponse finale à une question d'un quiz autonome"""
+    index: int = Field(..., ge=0, description="Position de la question dans le quiz", example=0)
+    reponse: List[str] = Field(..., description="Réponses sélectionnées", example=["4"])
+
+
+class BundleSubmission(BaseModel):
+    """Réponses finales d'un quiz autonome, corrigé dans le navigateur"""
+    username: str = Field(..., description="Nom de l'étudiant", example="etudiant_marie")
+    score: int | None = Field(None, ge=0, description="Score calculé par le navigateur (vérifié)", example=4)
+    answers: List[BundleAnswer] = Field(..., description="Réponses, une par question", max_length=200)
+
+
+class AdaptiveStart(BaseModel):
+    """Ouverture d'une session de quiz adaptatif"""
+    username: str = Field(..., description="Nom de l'étudiant", example="etudiant_marie")
+    theme: str | None = Field(None, description="Filtrage par thème", example="BDD")
+    test: str | None = Field(None, description="Filtrage par test", example="Test de positionnement")
+    max_items: int | None = Field(None, description="Nombre maximum de questions", example=20, ge=1, le=50)
+    target_se: float | None = Field(None, description="Arrêt dès que l'erreur type du niveau est inférieure",
+                                    example=0.35, gt=0)
+
+
+class AdaptiveAnswer(BaseModel):
+    """Réponse à la question en cours d'une session adaptative"""
+    username: str = Field(..., description="Nom de l'étudiant", example="etudiant_marie")
+    reponse: List[str] = Field(..., description="Réponses sélectionnées", example=["4"])
+
+
+class LiveControlInput(BaseModel):
+    """Commande du professeur pour un quiz en direct"""
+    username: str = Field(..., description="Nom d'utilisateur (prof/admin)", example="prof_martin")
+    index: int | None = Field(None, description="Question à afficher (suivante si absent)", example=0, ge=0)
+
+
 # --- Modèles pour la gestion des utilisateurs ---
 
 class UserInfo(BaseModel):
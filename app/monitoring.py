@@ -0,0 +1,214 @@
+"""
+Détection des requêtes MongoDB lentes avec capture automatique d'explain
+
+Un CommandListener pymongo mesure chaque commande visant les collections
+`questions` et `quiz_sessions`. Au-delà du seuil configuré, la commande est
+enregistrée dans un tampon circulaire ; une partie d'entre elles (échantillonnée
+et limitée par minute) est ensuite rejouée en `explain` dans un thread dédié
+pour relever le plan gagnant, les documents examinés/retournés et les COLLSCAN.
+"""
+import copy
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from bson import json_util
+from pymongo import monitoring
+
+from .config import slow_query_config
+
+# Collections surveillées et commandes que MongoDB sait expliquer
+WATCHED_COLLECTIONS = {"questions", "quiz_sessions"}
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "delete", "update", "findAndModify"}
+
+# Champs de session/transport à retirer avant de rejouer la commande en explain
+_STRIPPED_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+# Champs conservés dans le rapport pour identifier la forme de la requête
+_QUERY_FIELDS = ("filter", "pipeline", "query", "key", "sort", "limit", "deletes", "updates")
+
+
+def _explainable_command(command: dict) -> dict:
+    """Copie la commande sans les champs internes ($db, lsid, $clusterTime...)."""
+    return {
+        k: copy.deepcopy(v)
+        for k, v in command.items()
+        if not k.startswith("$") and k not in _STRIPPED_FIELDS
+    }
+
+
+def _to_json(value) -> dict:
+    """Convertit un fragment de commande (ObjectId, datetime...) en JSON étendu affichable."""
+    try:
+        return json.loads(json_util.dumps(value))
+    except Exception:
+        return {"repr": repr(value)[:500]}
+
+
+def _find_key(doc, key: str):
+    """Recherche récursive d'une clé dans un document explain (formes find/aggregate)."""
+    if isinstance(doc, dict):
+        if key in doc:
+            return doc[key]
+        for value in doc.values():
+            found = _find_key(value, key)
+            if found is not None:
+                return found
+    elif isinstance(doc, list):
+        for value in doc:
+            found = _find_key(value, key)
+            if found is not None:
+                return found
+    return None
+
+
+def _plan_stages(plan) -> list[str]:
+    """Liste des étapes d'un plan d'exécution, de la racine vers les feuilles."""
+    stages: list[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("queryPlan", "inputStage", "inputStages", "shards"):
+            child = plan.get(key)
+            if isinstance(child, list):
+                for c in child:
+                    stages.extend(_plan_stages(c))
+            elif child is not None:
+                stages.extend(_plan_stages(child))
+    return stages
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Résume la sortie d'explain : plan gagnant, docs examinés vs retournés, COLLSCAN."""
+    planner = _find_key(explain, "queryPlanner") or {}
+    stats = _find_key(explain, "executionStats") or {}
+    stages = _plan_stages(planner.get("winningPlan", {}))
+    return {
+        "winning_plan": " <- ".join(stages) if stages else None,
+        "collscan": "COLLSCAN" in stages,
+        "index_used": "IXSCAN" in stages or "IDHACK" in stages or "EXPRESS_IXSCAN" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Listener pymongo qui repère les commandes lentes et planifie leur explain."""
+
+    def __init__(self, threshold_ms: float = 100.0, explain_sample_rate: float = 0.2,
+                 explain_per_minute: int = 6, buffer_size: int = 200):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_per_minute = explain_per_minute
+        self.findings: deque = deque(maxlen=buffer_size)
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+        self._explain_times: deque = deque()
+        self._explain_queue: queue.Queue = queue.Queue(maxsize=32)
+        self._worker: threading.Thread | None = None
+        self._client = None
+
+    def attach(self, client):
+        """Associe le client Mongo utilisé pour rejouer les explain."""
+        self._client = client
+
+    # --- Événements pymongo ---
+    def started(self, event):
+        if event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        coll = event.command.get(event.command_name)
+        if coll not in WATCHED_COLLECTIONS:
+            return
+        with self._lock:
+            # Garde-fou : ne jamais laisser grossir la table des commandes en vol
+            if len(self._pending) > 1000:
+                self._pending.clear()
+            self._pending[(event.connection_id, event.request_id)] = (
+                event.database_name, coll, event.command
+            )
+
+    def succeeded(self, event):
+        self._finish(event, ok=True)
+
+    def failed(self, event):
+        self._finish(event, ok=False)
+
+    def _finish(self, event, ok: bool):
+        with self._lock:
+            entry = self._pending.pop((event.connection_id, event.request_id), None)
+        if entry is None:
+            return
+        duration_ms = event.duration_micros / 1000.0
+        if duration_ms < self.threshold_ms:
+            return
+        database, coll, command = entry
+        replay = _explainable_command(command)
+        finding = {
+            "at": datetime.utcnow().isoformat(),
+            "collection": coll,
+            "command": event.command_name,
+            "duration_ms": round(duration_ms, 2),
+            "ok": ok,
+            "query": _to_json({k: v for k, v in replay.items() if k in _QUERY_FIELDS}),
+            "explain": None,
+        }
+        self.findings.append(finding)
+        if ok and self._should_explain():
+            try:
+                self._explain_queue.put_nowait((database, replay, finding))
+                self._ensure_worker()
+            except queue.Full:
+                pass
+
+    # --- Explain échantillonné et limité ---
+    def _should_explain(self) -> bool:
+        if self._client is None or random.random() >= self.explain_sample_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._explain_times and now - self._explain_times[0] > 60:
+                self._explain_times.popleft()
+            if len(self._explain_times) >= self.explain_per_minute:
+                return False
+            self._explain_times.append(now)
+        return True
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+                self._worker.start()
+
+    def _explain_loop(self):
+        while True:
+            database, replay, finding = self._explain_queue.get()
+            try:
+                raw = self._client[database].command("explain", replay, verbosity="executionStats")
+                finding["explain"] = summarize_explain(raw)
+            except Exception as exc:
+                finding["explain"] = {"error": str(exc)[:200]}
+
+    # --- Consultation ---
+    def recent(self, limit: int = 50, collscan_only: bool = False) -> list[dict]:
+        """Retourne les dernières requêtes lentes (plus récentes en premier)."""
+        items = list(self.findings)
+        items.reverse()
+        if collscan_only:
+            items = [f for f in items if (f.get("explain") or {}).get("collscan")]
+        return items[:max(0, int(limit))]
+
+    def clear(self):
+        self.findings.clear()
+
+
+slow_query_listener = SlowQueryListener(
+    threshold_ms=slow_query_config["threshold_ms"],
+    explain_sample_rate=slow_query_config["explain_sample_rate"],
+    explain_per_minute=slow_query_config["explain_per_minute"],
+    buffer_size=slow_query_config["buffer_size"],
+)
@@ -0,0 +1,212 @@
+"""
+Profilage échantillonné des requêtes HTTP (opt-in)
+
+Le middleware ne fait rien tant que la requête n'est pas sélectionnée : soit un
+admin envoie l'en-tête `X-Profile: <username>`, soit la route fait partie de
+`PROFILE_ROUTES` et le tirage aléatoire passe sous `PROFILE_SAMPLE_RATE`.
+
+Les requêtes sélectionnées sont échantillonnées par un thread qui relève les piles
+Python à intervalle fixe. Seuls les threads de la requête sont relevés : la boucle
+d'événements qui l'a reçue (routes async) et, pour les routes synchrones, le thread
+du pool qui exécute sa fonction ; les autres threads (tâches de fond, autres
+échantillonneurs) sont ignorés. Le résultat est écrit au format « collapsed stacks »
+(`.folded`, lisible par flamegraph.pl ou speedscope) accompagné d'un fichier
+`.json` (route, durée, statut), dans un répertoire borné en nombre de fichiers.
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import profiling_config
+from .database import get_user_role
+
+PROFILE_HEADER = b"x-profile"
+
+# Fonctions « au repos » : une pile qui se termine ici est un thread inactif
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+# Threads des échantillonneurs actifs : jamais relevés
+_sampler_threads: set[int] = set()
+
+
+class StackSampler:
+    """
+    Échantillonneur de piles : relève sys._current_frames() à intervalle fixe.
+
+    threads : identifiants des threads suivis (None : tous). entry : fonction sans
+    argument renvoyant l'objet code de la route (ou None) ; un thread dont la pile
+    l'exécute est relevé aussi (route synchrone exécutée dans le pool).
+    """
+
+    def __init__(self, interval_ms: float = 5.0, threads: set[int] | None = None, entry=None):
+        self.interval = max(interval_ms, 0.5) / 1000.0
+        self.threads = threads
+        self.entry = entry
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        _sampler_threads.add(threading.get_ident())
+        try:
+            while not self._stop.wait(self.interval):
+                entry = self.entry() if self.entry is not None else None
+                for tid, frame in sys._current_frames().items():
+                    if tid in _sampler_threads:
+                        continue
+                    leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                    if leaf in _IDLE_LEAVES:
+                        continue
+                    stack = []
+                    target = self.threads is None or tid in self.threads
+                    while frame is not None:
+                        code = frame.f_code
+                        target = target or code is entry
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                        frame = frame.f_back
+                    if target:
+                        stack.reverse()
+                        self.stacks[";".join(stack)] += 1
+                self.samples += 1
+        finally:
+            _sampler_threads.discard(threading.get_ident())
+
+    def collapsed(self) -> str:
+        """Sortie au format collapsed stacks : « f1;f2;f3 N » par ligne."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+# --- Stockage borné des profils ---
+def _profile_dir() -> str:
+    path = profiling_config["dir"]
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_profile(sampler: StackSampler, meta: dict) -> str:
+    """Écrit le profil (.folded + .json) puis supprime les plus anciens au-delà de la limite."""
+    path = _profile_dir()
+    route = re.sub(r"[^A-Za-z0-9]+", "_", meta["path"]).strip("_") or "root"
+    name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{meta['method']}_{route}_{int(meta['duration_ms'])}ms"
+    with open(os.path.join(path, name + ".folded"), "w", encoding="utf-8") as f:
+        f.write(sampler.collapsed())
+    with open(os.path.join(path, name + ".json"), "w", encoding="utf-8") as f:
+        json.dump({**meta, "name": name, "samples": sampler.samples}, f)
+    _prune(path, profiling_config["max_files"])
+    return name
+
+
+def _prune(path: str, max_files: int):
+    metas = sorted(f for f in os.listdir(path) if f.endswith(".json"))
+    for old in metas[:max(0, len(metas) - max_files)]:
+        base = old[:-len(".json")]
+        for ext in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(path, base + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> list[dict]:
+    """Liste les profils capturés (plus récents en premier)."""
+    path = profiling_config["dir"]
+    if not os.path.isdir(path):
+        return []
+    out = []
+    for f in sorted(os.listdir(path), reverse=True):
+        if not f.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(path, f), encoding="utf-8") as fh:
+                out.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def profile_path(name: str) -> str | None:
+    """Chemin du fichier .folded d'un profil existant (None si inconnu)."""
+    if not re.fullmatch(r"[A-Za-z0-9_]+", name or ""):
+        return None
+    path = os.path.join(profiling_config["dir"], name + ".folded")
+    return path if os.path.isfile(path) else None
+
+
+# --- Middleware ASGI ---
+class ProfilingMiddleware:
+    """Middleware ASGI : profile uniquement les requêtes sélectionnées (coût quasi nul sinon)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = await self._trigger(scope)
+        if trigger is None:
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        # Threads suivis : la boucle d'événements courante, et le thread du pool qui exécute
+        # la route (scope["endpoint"] est posé par le routeur, sur ce même scope)
+        sampler = StackSampler(profiling_config["interval_ms"], threads={threading.get_ident()},
+                               entry=lambda: getattr(scope.get("endpoint"), "__code__", None))
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1")[:200],
+                "status": status["code"],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "trigger": trigger,
+                "at": datetime.utcnow().isoformat(),
+            }
+            await run_in_threadpool(save_profile, sampler, meta)
+
+    async def _trigger(self, scope) -> str | None:
+        """Raison du profilage (« header:<admin> » ou « sample »), None sinon."""
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER:
+                username = value.decode("latin-1").strip()
+                if username and await run_in_threadpool(get_user_role, username) == "admin":
+                    return f"header:{username}"
+                return None
+        rate = profiling_config["sample_rate"]
+        if rate > 0 and random.random() < rate:
+            path = scope["path"]
+            if any(path.startswith(prefix) for prefix in profiling_config["routes"]):
+                return "sample"
+        return None
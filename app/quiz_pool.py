@@ -0,0 +1,175 @@
+"""
+Réserve de quiz pré-générés pour rendre POST /quiz/create quasi instantané
+
+Un thread d'arrière-plan maintient, pour chaque combinaison populaire
+(thème, nombre de questions), une petite file de tirages prêts à l'emploi,
+construits depuis la banque en mémoire (app/generator.py). `create_quiz` prend
+un tirage dans la file, y appose le créateur et le nom, puis l'enregistre ;
+si la file est vide, on retombe sur la génération à la demande.
+
+Toute modification de la banque (ajout/suppression de question) invalide la
+réserve : les tirages construits avant la modification sont jetés.
+
+Seuls les thèmes présents dans la banque comptent dans la demande par combinaison
+(le thème vient du client) ; à chaque intervalle, les compteurs sont divisés par deux
+et les thèmes retirés de la banque depuis sont oubliés.
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from .config import quiz_pool_config
+from .generator import generate, get_bank
+from .questions import on_questions_changed
+
+logger = logging.getLogger("miskatonic")
+
+
+def _parse_keys(spec: list[str]) -> list[tuple[str | None, int]]:
+    """« *:5 », « BDD:10 » -> [(None, 5), ("BDD", 10)]"""
+    keys = []
+    for item in spec:
+        theme, _, limit = item.rpartition(":")
+        try:
+            keys.append((None if theme in ("", "*") else theme, int(limit)))
+        except ValueError:
+            continue
+    return keys
+
+
+class QuizPool:
+    """Files bornées de tirages pré-générés, rechargées par un thread d'arrière-plan."""
+
+    def __init__(self, size: int = 20, keys: list[tuple[str | None, int]] | None = None,
+                 max_dynamic_keys: int = 8, interval_s: float = 5.0):
+        self.size = size
+        self.static_keys = list(keys or [])
+        self.max_dynamic_keys = max_dynamic_keys
+        self.interval_s = interval_s
+        self._pools: dict[tuple, deque] = {}
+        self._demand: Counter = Counter()
+        self._decayed_at = time.monotonic()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.hits = 0
+        self.misses = 0
+
+    # --- Consommation ---
+    def take(self, theme: str | None, limit: int) -> list[dict] | None:
+        """Retire un tirage prêt pour (theme, limit), ou None si la file est vide."""
+        key = (theme or None, int(limit))
+        known = key[0] is None or bool(get_bank().by_theme.get(key[0]))
+        with self._lock:
+            if known:
+                self._demand[key] += 1
+            pool = self._pools.get(key)
+            entry = None
+            while pool:
+                generation, questions = pool.popleft()
+                if generation == self._generation:
+                    entry = questions
+                    break
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            low = known and (pool is None or len(pool) < self.size // 2)
+        if low:
+            self._wake.set()
+        return entry
+
+    def invalidate(self):
+        """Jette tous les tirages (la banque a changé)."""
+        with self._lock:
+            self._generation += 1
+            self._pools.clear()
+        self._wake.set()
+
+    # --- Rechargement ---
+    def keys(self) -> list[tuple[str | None, int]]:
+        """Combinaisons maintenues : clés configurées + plus demandées."""
+        with self._lock:
+            popular = [k for k, _ in self._demand.most_common(self.max_dynamic_keys)]
+        return list(dict.fromkeys(self.static_keys + popular))
+
+    def _decay_demand(self, bank):
+        """Au plus une fois par intervalle : demande divisée par deux, thèmes inconnus de la banque retirés."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._decayed_at < self.interval_s:
+                return
+            self._decayed_at = now
+            self._demand = Counter({
+                key: count // 2 for key, count in self._demand.items()
+                if count >= 2 and (key[0] is None or bank.by_theme.get(key[0]))
+            })
+
+    def refill(self):
+        """Complète chaque file jusqu'à `size` tirages."""
+        bank = get_bank()
+        self._decay_demand(bank)
+        for theme, limit in self.keys():
+            with self._lock:
+                generation = self._generation
+                missing = self.size - len(self._pools.get((theme, limit), ()))
+            if missing <= 0 or not bank.candidates(theme):
+                continue
+            built = []
+            for _ in range(missing):
+                questions = generate(bank, [{"theme": theme, "count": limit}])
+                for q in questions:
+                    q.pop("ordinal", None)
+                if len(questions) == limit:
+                    built.append((generation, questions))
+            with self._lock:
+                if generation == self._generation:
+                    self._pools.setdefault((theme, limit), deque(maxlen=self.size)).extend(built)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refill()
+            except Exception as exc:
+                logger.warning("Réserve de quiz : rechargement impossible (%s)", exc)
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="quiz-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self._generation,
+                "demand_keys": len(self._demand),
+                "pools": {f"{k[0] or '*'}:{k[1]}": len(v) for k, v in self._pools.items()},
+            }
+
+
+quiz_pool = QuizPool(
+    size=quiz_pool_config["size"],
+    keys=_parse_keys(quiz_pool_config["keys"]),
+    max_dynamic_keys=quiz_pool_config["max_dynamic_keys"],
+    interval_s=quiz_pool_config["interval_s"],
+)
+
+
+@on_questions_changed
+def _expire_pool(event: str, doc: dict):
+    quiz_pool.invalidate()
@@ -0,0 +1,34 @@
+"""
+Réponses JSON rapides
+
+`FastJSONResponse` sérialise avec orjson (repli sur json de la stdlib si orjson
+n'est pas installé). Elle sert de classe de réponse par défaut de l'application.
+
+Les routes qui renvoient de grandes listes déjà normalisées par app/questions.py
+retournent directement une instance de `FastJSONResponse` : FastAPI ne repasse
+alors ni par la validation pydantic du `response_model` ni par `jsonable_encoder`
+(le `response_model` reste déclaré pour la documentation OpenAPI).
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Sérialise en JSON compact (UTF-8)."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON sérialisée par orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,74 @@
+"""
+Routes du quiz adaptatif (une question à la fois, choisie selon le niveau estimé)
+"""
+from fastapi import APIRouter, HTTPException
+
+from ..adaptive import AdaptiveConflict, answer, get_session, start_session
+from ..models import AdaptiveAnswer, AdaptiveStart
+from ..responses import FastJSONResponse
+
+router = APIRouter(prefix="/quiz/adaptive", tags=["quiz"])
+
+
+@router.post("",
+    summary="Démarrer un quiz adaptatif",
+    description="""
+    Ouvre une session adaptative et renvoie la première question (sans la correction).
+
+    Après chaque réponse, le niveau de l'étudiant (`theta`, échelle centrée réduite)
+    est ré-estimé et la question suivante est celle qui apporte le plus d'information
+    à ce niveau, parmi les questions du thème/test pas encore posées (et pas encore
+    vues par l'étudiant tant qu'il en reste).
+
+    **Fin de session :** après `max_items` questions, dès que l'erreur type `se` du niveau
+    passe sous `target_se`, ou quand il n'y a plus de question disponible.
+
+    **Difficulté et discrimination** des questions : ajustées hors ligne sur le journal des
+    tentatives (`POST /admin/adaptive/fit` ou `python -m app.adaptive`).
+    """,
+    responses={404: {"description": "Aucune question pour ce thème/test"}}
+)
+def start_adaptive_quiz(params: AdaptiveStart):
+    state = start_session(params.username, params.theme, params.test, params.max_items, params.target_se)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Aucune question disponible")
+    return FastJSONResponse(state)
+
+
+@router.post("/{session_id}/answer",
+    summary="Répondre à la question en cours",
+    description="""
+    Corrige la réponse à la question en cours, met à jour le niveau estimé et renvoie
+    la question suivante (`question` à null quand la session est terminée, `done` à true).
+
+    La réponse est ajoutée au journal des tentatives et aux statistiques par question,
+    comme pour un quiz classique.
+    """,
+    responses={
+        403: {"description": "Session d'un autre utilisateur"},
+        404: {"description": "Session non trouvée"},
+        409: {"description": "Session terminée, ou réponse déjà enregistrée"},
+    }
+)
+def answer_adaptive_quiz(session_id: str, body: AdaptiveAnswer):
+    try:
+        result = answer(session_id, body.username, body.reponse)
+    except PermissionError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+    except AdaptiveConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Session non trouvée")
+    return FastJSONResponse(result)
+
+
+@router.get("/{session_id}",
+    summary="État d'une session adaptative",
+    description="Niveau estimé, progression et question en cours (reprise après rechargement de la page).",
+    responses={404: {"description": "Session non trouvée"}}
+)
+def get_adaptive_quiz(session_id: str):
+    state = get_session(session_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Session non trouvée")
+    return FastJSONResponse(state)
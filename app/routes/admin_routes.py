@@ -0,0 +1,276 @@
+"""
+Routes d'administration et de diagnostic (admin uniquement)
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from ..responses import FastJSONResponse
+from ..utils import require_admin
+from ..adaptive import adaptive_engine, fit_from_attempts
+from ..archive import session_archiver, find_archived_session
+from ..attempts import attempts_buffer
+from ..stats import question_stats
+from ..leaderboard import leaderboards
+from ..live import live_hub
+from ..admission import admission
+from ..search import search_index
+from ..dedup import duplicate_clusters
+from ..invalidation import invalidation_channel
+from ..monitoring import slow_query_listener
+from ..profiling import list_profiles, profile_path
+from ..quiz_pool import quiz_pool
+from ..static import static_site
+from ..questions import sessions_cache
+
+router = APIRouter(prefix="/admin", tags=["administration"])
+
+
+@router.get("/slow_queries",
+    summary="Requêtes MongoDB lentes récentes",
+    description="""
+    Retourne les dernières commandes MongoDB (collections `questions` et `quiz_sessions`)
+    ayant dépassé le seuil configuré (`SLOW_QUERY_MS`).
+
+    **Prérequis :** Rôle `admin` uniquement
+
+    Une partie des requêtes lentes (échantillonnée et limitée par minute) est rejouée
+    en `explain` : le champ `explain` indique alors le plan gagnant, les documents
+    examinés vs retournés et la présence d'un `COLLSCAN` (index manquant).
+
+    **Exemple :** `/admin/slow_queries?admin_username=admin&collscan_only=true`
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_slow_queries(admin_username: str, limit: int = 50, collscan_only: bool = False):
+    """Lister les requêtes lentes détectées (admin uniquement)"""
+    require_admin(admin_username)
+    return {
+        "threshold_ms": slow_query_listener.threshold_ms,
+        "items": slow_query_listener.recent(limit, collscan_only),
+    }
+
+
+@router.delete("/slow_queries")
+def clear_slow_queries(admin_username: str):
+    """Vider le tampon des requêtes lentes (admin uniquement)"""
+    require_admin(admin_username)
+    slow_query_listener.clear()
+    return {"message": "Tampon des requêtes lentes vidé"}
+
+
+@router.get("/profiles",
+    summary="Profils de requêtes capturés",
+    description="""
+    Liste les profils échantillonnés enregistrés par le middleware de profilage
+    (route, méthode, statut, durée, nombre d'échantillons, déclencheur).
+
+    **Prérequis :** Rôle `admin` uniquement
+
+    **Déclenchement :**
+    - En-tête `X-Profile: <admin_username>` sur n'importe quelle requête
+    - Ou tirage aléatoire (`PROFILE_SAMPLE_RATE`) sur les routes de `PROFILE_ROUTES`
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_profiles(admin_username: str):
+    """Lister les profils capturés (admin uniquement)"""
+    require_admin(admin_username)
+    return list_profiles()
+
+
+@router.get("/profiles/{name}",
+    summary="Télécharger un profil (collapsed stacks)",
+    description="Retourne le fichier `.folded`, compatible flamegraph.pl et speedscope.",
+    responses={
+        403: {"description": "Accès refusé (admin requis)"},
+        404: {"description": "Profil non trouvé"}
+    }
+)
+def download_profile(name: str, admin_username: str):
+    """Télécharger un profil (admin uniquement)"""
+    require_admin(admin_username)
+    path = profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    return FileResponse(path, media_type="text/plain", filename=f"{name}.folded")
+
+
+@router.get("/quiz_pool",
+    summary="État de la réserve de quiz pré-générés",
+    description="Nombre de tirages prêts par combinaison `thème:nombre`, succès/échecs de la réserve.",
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_quiz_pool_stats(admin_username: str):
+    """Statistiques de la réserve de quiz (admin uniquement)"""
+    require_admin(admin_username)
+    return quiz_pool.stats()
+
+
+@router.get("/cache",
+    summary="État du cache des sessions de quiz",
+    description="""
+    Cache des sessions : taille (entrées, octets), taux de succès et lectures Mongo évitées
+    par coalescence. Classements en direct : nombre de quiz suivis, participants, évictions.
+    Index de recherche : questions et termes indexés.
+    Canal d'invalidation entre workers : événements publiés / reçus, retard maximal observé.
+    Frontend (/app) : fichiers servis, ressources versionnées, variantes pré-compressées.
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_cache_stats(admin_username: str):
+    """Statistiques du cache des sessions (admin uniquement)"""
+    require_admin(admin_username)
+    return {
+        "quiz_sessions": sessions_cache.stats(),
+        "leaderboards": leaderboards.stats(),
+        "search_index": search_index.stats(),
+        "invalidation": invalidation_channel.stats(),
+        "static": static_site.stats(),
+    }
+
+
+@router.get("/attempts",
+    summary="État du journal des tentatives",
+    description="""
+    Profondeur du tampon d'écriture différée, entrées écrites / perdues, nombre
+    d'attentes dues à la contre-pression et durée des derniers `bulk_write`.
+    Inclut l'état des compteurs par question en attente d'écriture (`question_stats`).
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_attempts_stats(admin_username: str):
+    """Statistiques du journal des tentatives (admin uniquement)"""
+    require_admin(admin_username)
+    return {**attempts_buffer.stats(), "question_stats": question_stats.stats()}
+
+
+@router.get("/live",
+    summary="État des quiz en direct",
+    description="Canaux ouverts, connexions WebSocket/SSE, messages livrés et clients lents déconnectés.",
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_live_stats(admin_username: str):
+    """Statistiques du mode direct (admin uniquement)"""
+    require_admin(admin_username)
+    return live_hub.stats()
+
+
+@router.get("/admission",
+    summary="Contrôle d'admission",
+    description="""
+    Par classe de requêtes (`auth`, `bulk`, `read`) : limite et requêtes en cours, file
+    d'attente, état d'engorgement (CoDel), requêtes admises et délestées (503) par motif,
+    temps d'attente et de traitement moyens (EWMA). Cette route n'est jamais délestée.
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_admission_stats(admin_username: str):
+    """Métriques du contrôle d'admission (admin uniquement)"""
+    require_admin(admin_username)
+    return admission.stats()
+
+
+@router.get("/adaptive",
+    summary="État du quiz adaptatif",
+    description="""
+    Paramètres IRT chargés (questions ajustées, date du dernier ajustement), taille des
+    tableaux pré-calculés de la banque, nombre de sélections de questions et leur durée
+    moyenne / maximale (ms), disponibilité de numpy.
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_adaptive_stats(admin_username: str):
+    """Statistiques du quiz adaptatif (admin uniquement)"""
+    require_admin(admin_username)
+    return adaptive_engine.stats()
+
+
+@router.post("/adaptive/fit",
+    summary="Ajuster les paramètres IRT des questions",
+    description="""
+    Ré-estime difficulté et discrimination de chaque question sur tout le journal des
+    tentatives (modèle 2PL) et recharge les paramètres sur tous les workers. Seules les
+    questions ayant au moins `ADAPTIVE_MIN_RESPONSES` réponses sont ajustées.
+
+    Calcul en mémoire : à lancer hors des heures de cours sur un gros journal
+    (ou via `python -m app.adaptive`).
+    """,
+    responses={
+        403: {"description": "Accès refusé (admin requis)"},
+        503: {"description": "numpy non installé"},
+    }
+)
+def fit_adaptive(admin_username: str):
+    """Ajuster les paramètres IRT (admin uniquement)"""
+    require_admin(admin_username)
+    try:
+        return fit_from_attempts()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+
+@router.get("/archive",
+    summary="État de l'archivage des sessions",
+    description="""
+    Rétention des sessions de quiz : passages effectués, sessions archivées, dernier
+    bilan (date limite, fichiers touchés, octets écrits), nombre et taille des fichiers
+    d'archive NDJSON gzip présents sur ce nœud.
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_archive_stats(admin_username: str):
+    """Statistiques de l'archivage (admin uniquement)"""
+    require_admin(admin_username)
+    return session_archiver.stats()
+
+
+@router.post("/archive/run",
+    summary="Lancer l'archivage des sessions",
+    description="""
+    Archive immédiatement les sessions plus anciennes que `SESSION_RETENTION_DAYS`
+    (sans attendre le passage périodique). Sans effet si un autre worker archive déjà.
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def run_archive(admin_username: str):
+    """Lancer l'archivage (admin uniquement)"""
+    require_admin(admin_username)
+    return session_archiver.run_once()
+
+
+@router.get("/archive/sessions/{quiz_id}",
+    summary="Consulter une session archivée",
+    description="""
+    Retrouve une session de quiz sortie de `quiz_sessions` : le jour de création est
+    déduit de l'identifiant, puis le fichier d'archive de ce jour est lu en flux
+    (décompression progressive, sans tout charger en mémoire).
+    """,
+    responses={
+        403: {"description": "Accès refusé (admin requis)"},
+        404: {"description": "Session absente des archives de ce nœud"}
+    }
+)
+def get_archived_session(quiz_id: str, admin_username: str):
+    """Session archivée (admin uniquement)"""
+    require_admin(admin_username)
+    session = find_archived_session(quiz_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session non trouvée dans les archives")
+    return FastJSONResponse(session)
+
+
+@router.get("/duplicates",
+    summary="Groupes de questions quasi identiques",
+    description="""
+    Regroupe les questions de la banque dont les intitulés sont proches (MinHash/LSH,
+    similarité estimée >= `threshold`, par défaut `DEDUP_THRESHOLD`), les plus grands
+    groupes d'abord. À utiliser pour fusionner ou supprimer les reformulations.
+
+    **Exemple :** `/admin/duplicates?admin_username=admin&threshold=0.7`
+    """,
+    responses={403: {"description": "Accès refusé (admin requis)"}}
+)
+def get_duplicates(admin_username: str, threshold: float | None = None):
+    """Rapport des quasi-doublons (admin uniquement)"""
+    require_admin(admin_username)
+    clusters = duplicate_clusters(threshold)
+    return FastJSONResponse({"clusters": len(clusters), "groups": clusters})
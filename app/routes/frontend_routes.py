@@ -0,0 +1,27 @@
+"""
+Frontend servi par l'API sous /app (pages, feuilles de style, audio)
+
+Ressources versionnées en cache immuable, variantes pré-compressées, requêtes
+conditionnelles et partielles : voir app/static.py.
+"""
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import RedirectResponse
+
+from ..static import static_response
+
+router = APIRouter(prefix="/app", include_in_schema=False)
+
+
+@router.api_route("", methods=["GET", "HEAD"])
+def frontend_root():
+    """/app -> /app/ (les liens relatifs des pages partent du répertoire)"""
+    return RedirectResponse("/app/", status_code=308)
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+def frontend_file(path: str, request: Request):
+    """Page ou ressource du frontend (index.html par défaut)"""
+    response = static_response(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    return response
@@ -0,0 +1,49 @@
+"""
+Sondes de vie et de disponibilité (orchestrateur, load balancer)
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from ..lifespan import complete_startup, startup_state
+
+router = APIRouter(tags=["supervision"])
+
+
+@router.get("/healthz",
+    summary="Sonde de vie",
+    description="Répond dès que le processus sert des requêtes, sans toucher aux bases de données."
+)
+def healthz():
+    """Le processus est vivant"""
+    return {"status": "ok"}
+
+
+@router.get("/readyz",
+    summary="Sonde de disponibilité",
+    description="""
+    Indique si le worker est prêt à recevoir du trafic : SQLite initialisée,
+    stockage des questions joignable (MongoDB, ou SQLite si `STORAGE_BACKEND=sqlite`)
+    et caches préchauffés (si `WARMUP=1`).
+
+    Retourne aussi les durées mesurées : import des modules (`import_ms`)
+    et démarrage jusqu'à disponibilité (`startup_ms`).
+    """,
+    responses={503: {"description": "Worker pas encore prêt ou stockage injoignable"}}
+)
+async def readyz():
+    """Le worker est prêt à servir"""
+    if not startup_state["ready"] and startup_state["error"]:
+        # Nouvelle tentative si le démarrage a échoué (ex. MongoDB lancé après l'API) :
+        # mêmes étapes que le lifespan (index, threads d'écriture, réserve, canal...)
+        try:
+            await run_in_threadpool(complete_startup)
+        except Exception as exc:
+            startup_state["error"] = str(exc)
+    body = {
+        "status": "ready" if startup_state["ready"] else "starting",
+        "import_ms": startup_state["import_ms"],
+        "startup_ms": startup_state["startup_ms"],
+        "warmup": startup_state["warmup"],
+        "error": startup_state["error"],
+    }
+    return JSONResponse(body, status_code=200 if startup_state["ready"] else 503)
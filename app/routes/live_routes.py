@@ -0,0 +1,142 @@
+"""
+Routes du mode quiz en direct (rythmé par le professeur)
+"""
+import asyncio
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..config import live_config
+from ..live import live_hub, question_message
+from ..models import LiveControlInput
+from ..questions import get_quiz_session_payload
+from ..utils import require_prof_or_admin
+
+router = APIRouter(prefix="/quiz", tags=["quiz"])
+
+
+async def _load_session(quiz_id: str) -> dict:
+    payload = await run_in_threadpool(get_quiz_session_payload, quiz_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Quiz non trouvé")
+    return payload.data
+
+
+@router.post("/{quiz_id}/live/advance",
+    summary="Afficher la question suivante (quiz en direct)",
+    description="""
+    Pousse une question à tous les étudiants connectés au quiz en direct
+    (`/quiz/{quiz_id}/live/ws` ou `/quiz/{quiz_id}/live/events`).
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    Sans `index`, passe à la question suivante. Les bonnes réponses ne sont pas envoyées ;
+    les étudiants répondent via `POST /answer` avec le `quiz_id`.
+
+    **Retour :** question affichée et nombre de connexions servies / déconnectées
+    (clients trop lents, file de `LIVE_QUEUE_SIZE` messages pleine).
+    """,
+    responses={
+        400: {"description": "Index hors du quiz"},
+        403: {"description": "Accès refusé (prof/admin requis)"},
+        404: {"description": "Quiz non trouvé"}
+    }
+)
+async def live_advance(quiz_id: str, control: LiveControlInput):
+    """Avancer le quiz en direct (prof/admin uniquement)"""
+    await run_in_threadpool(require_prof_or_admin, control.username)
+    session = await _load_session(quiz_id)
+    channel = live_hub.channel(quiz_id)
+    index = control.index if control.index is not None else (channel.index + 1 if channel else 0)
+    message = question_message(session, index)
+    if message is None:
+        raise HTTPException(status_code=400, detail="Index hors du quiz")
+    return {"index": index, "total": message["total"], **live_hub.publish(quiz_id, message, index)}
+
+
+@router.post("/{quiz_id}/live/end",
+    summary="Terminer le quiz en direct",
+    description="Envoie un message `end` puis ferme toutes les connexions du quiz.",
+    responses={403: {"description": "Accès refusé (prof/admin requis)"}}
+)
+async def live_end(quiz_id: str, control: LiveControlInput):
+    """Terminer le quiz en direct (prof/admin uniquement)"""
+    await run_in_threadpool(require_prof_or_admin, control.username)
+    live_hub.publish(quiz_id, {"type": "end", "quiz_id": quiz_id})
+    # Laisse aux connexions le temps de recevoir le message de fin
+    await asyncio.sleep(0)
+    return {"closed": live_hub.close(quiz_id)}
+
+
+@router.get("/{quiz_id}/live/events",
+    summary="Suivre un quiz en direct (Server-Sent Events)",
+    description="""
+    Flux `text/event-stream` : la question en cours est envoyée dès la connexion,
+    puis chaque nouvelle question poussée par le professeur (`data: {...}`).
+    Un commentaire `: ping` est envoyé toutes les `LIVE_HEARTBEAT` secondes.
+    """,
+    responses={
+        404: {"description": "Quiz non trouvé"},
+        503: {"description": "Trop de connexions sur ce quiz"}
+    }
+)
+async def live_events(quiz_id: str):
+    """Flux SSE d'un quiz en direct"""
+    await _load_session(quiz_id)
+    sub = live_hub.subscribe(quiz_id)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Trop de connexions sur ce quiz")
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), live_config["heartbeat_s"])
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message.sse
+        finally:
+            live_hub.unsubscribe(quiz_id, sub)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/{quiz_id}/live/ws")
+async def live_websocket(websocket: WebSocket, quiz_id: str):
+    """Suivre un quiz en direct (WebSocket) : messages JSON texte, fin de flux = fermeture."""
+    payload = await run_in_threadpool(get_quiz_session_payload, quiz_id)
+    if payload is None:
+        await websocket.close(code=4404)
+        return
+    sub = live_hub.subscribe(quiz_id)
+    if sub is None:
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+
+    async def watch_disconnect():
+        # Les messages du client sont ignorés : seule la déconnexion nous intéresse
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sub.close(discard=True)
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        async for message in sub.messages():
+            await websocket.send_text(message.text)
+        if not watcher.done():
+            await websocket.close(code=1008 if sub.dropped else 1000)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        live_hub.unsubscribe(quiz_id, sub)
@@ -1,11 +1,20 @@
 """
 Routes de gestion des questions
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import List
-from ..models import Question, QuestionInput
+from ..changelog import question_changes
+from ..config import dedup_config
+from ..dedup import find_near_duplicates, screen_batch
+from ..models import Question, QuestionInput, QuestionImport, QuestionUpdate
+from ..responses import FastJSONResponse
 from ..utils import require_prof_or_admin
-from ..questions import get_questions, add_question, delete_question_by_text, collection
+from ..questions import (
+    get_questions, add_question, add_questions, delete_question_by_text, list_all_questions,
+    find_identical_question, get_question_by_id, update_question, delete_question_by_id,
+)
+from ..generator import generate_quiz
+from ..search import get_search_index
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
@@ -23,6 +32,7 @@ router = APIRouter(prefix="/questions", tags=["questions"])
     - Retourne un échantillon aléatoire de questions
     - Filtrage possible par `theme`
     - Limite configurable avec `limit`
+    - Avec `username` : évite les questions déjà vues par cet étudiant (et les marque comme vues)
     
     ### Mode Administration (Prof/Admin)
     - `admin=true` + `username` requis
@@ -54,7 +64,8 @@ router = APIRouter(prefix="/questions", tags=["questions"])
         403: {"description": "Accès refusé (mode admin sans autorisation)"}
     }
 )
-def get_questions_list(limit: int = 5, theme: str | None = None, admin: bool = False, username: str | None = None):
+def get_questions_list(limit: int = Query(5, ge=1, le=50, description="Nombre de questions (50 maximum)"),
+                       theme: str | None = None, admin: bool = False, username: str | None = None):
     """
     Récupérer des questions
     - Mode normal: échantillon aléatoire pour quiz
@@ -66,20 +77,112 @@ def get_questions_list(limit: int = 5, theme: str | None = None, admin: bool = F
         require_prof_or_admin(username)
         
         # Retourner toutes les questions (avec limite pour éviter surcharge)
-        docs = collection.find().limit(200)
-        questions = []
-        for doc in docs:
-            questions.append({
-                "question": doc.get("question", ""),
-                "theme": doc.get("theme") or "Général",
-                "test": doc.get("test") or "Quiz",
-                "choix": doc.get("choix", []),
-                "correct": doc.get("correct", []),
-            })
-        return questions
+        questions = list_all_questions(200)
+    elif username:
+        # Mode normal avec étudiant identifié : tirage sans répétition (bitset des questions vues)
+        questions = generate_quiz([{"theme": theme, "count": limit}], username)
     else:
         # Mode normal: échantillon aléatoire
-        return get_questions(limit, theme)
+        questions = get_questions(limit, theme)
+    # Données déjà normalisées par app/questions.py : pas de re-validation pydantic
+    return FastJSONResponse(questions)
+
+
+@router.get("/search",
+    summary="Rechercher des questions (plein texte)",
+    description="""
+    Recherche dans le texte des questions et de leurs choix, classée par pertinence (BM25).
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    - Insensible à la casse et aux accents (`reseau` trouve « réseau »), élisions
+      et mots vides ignorés (`l'index` = `index`), pluriels simples regroupés
+    - Le texte de la question pèse plus que les choix
+    - Filtres optionnels `theme` et `test` ; `limit` (20 par défaut, 100 maximum)
+
+    Servie par un index inversé en mémoire, construit au démarrage et mis à jour à
+    chaque ajout/suppression de question.
+
+    **Exemple :** `/questions/search?q=index%20mongodb&username=prof1&theme=BDD`
+    """,
+    responses={
+        200: {
+            "description": "Questions triées par pertinence",
+            "content": {
+                "application/json": {
+                    "example": [{
+                        "question": "Quel index MongoDB accélère une recherche par préfixe ?",
+                        "theme": "BDD",
+                        "test": "Test de validation",
+                        "choix": ["B-tree", "Hash", "Texte"],
+                        "correct": ["B-tree"],
+                        "score": 7.4211
+                    }]
+                }
+            }
+        },
+        403: {"description": "Accès refusé (prof/admin requis)"}
+    }
+)
+def search_questions(q: str, username: str, theme: str | None = None, test: str | None = None, limit: int = 20):
+    """Recherche plein texte (prof/admin uniquement)"""
+    require_prof_or_admin(username)
+    limit = max(1, min(limit, 100))
+    return FastJSONResponse(get_search_index().search(q, limit, theme, test))
+
+
+@router.get("/autocomplete",
+    summary="Autocomplétion de la recherche",
+    description="""
+    Suggestions pendant la saisie : le dernier mot est complété par préfixe
+    (`terms`, les plus fréquents d'abord) et les questions correspondantes sont
+    proposées (`questions`, classées BM25).
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    **Exemple :** `/questions/autocomplete?q=jointure%20ext&username=prof1`
+    """,
+    responses={403: {"description": "Accès refusé (prof/admin requis)"}}
+)
+def autocomplete_questions(q: str, username: str, limit: int = 10):
+    """Autocomplétion (prof/admin uniquement)"""
+    require_prof_or_admin(username)
+    limit = max(1, min(limit, 50))
+    return FastJSONResponse(get_search_index().autocomplete(q, limit))
+
+
+@router.get("/changes",
+    summary="Modifications de la banque depuis un numéro (synchronisation incrémentale)",
+    description="""
+    Retourne les ajouts (`insert`), modifications (`update`) et suppressions (`delete`)
+    de questions de numéro supérieur à `since`, dans l'ordre. Une entrée `insert`/`update`
+    porte la question complète (à appliquer comme un remplacement par `qid`), une entrée
+    `delete` seulement le `qid`.
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    **Utilisation :**
+    1. Sans `since` : numéro courant (`seq`), à lire *avant* le chargement complet
+       (`/questions?admin=true`)
+    2. Ensuite `since=<seq>` : appliquer `changes`, retenir le nouveau `seq`, recommencer
+       tant que `has_more` est vrai
+
+    **Resynchronisation (410) :** client trop en retard (entrées anciennes compactées,
+    `CHANGELOG_MAX_ENTRIES`) ou banque rechargée entièrement (ETL) : recharger toute la
+    banque et repartir du `seq` renvoyé.
+
+    **Exemple :** `/questions/changes?since=1200&username=prof1`
+    """,
+    responses={
+        403: {"description": "Accès refusé (prof/admin requis)"},
+        410: {"description": "Resynchronisation complète nécessaire"},
+    }
+)
+def get_question_changes(username: str, since: int | None = None, limit: int | None = None):
+    """Journal des modifications (prof/admin uniquement)"""
+    require_prof_or_admin(username)
+    result = question_changes.since(since, limit)
+    return FastJSONResponse(result, status_code=410 if result["resync"] else 200)
 
 
 @router.post("",
@@ -100,28 +203,98 @@ def get_questions_list(limit: int = 5, theme: str | None = None, admin: bool = F
     - `test` : Défaut "Quiz"
     
     **Note :** Les questions sont immédiatement disponibles pour la génération de quiz.
+
+    **Identifiant :** la réponse contient le `qid` de la question (condensat de l'intitulé
+    et des choix), utilisable ensuite avec `GET/PUT/DELETE /questions/{qid}`. Une question
+    identique (même intitulé et mêmes choix) est refusée (409).
+
+    **Quasi-doublons :** l'intitulé est comparé à la banque (MinHash/LSH). Les questions
+    trop proches (similarité >= `DEDUP_THRESHOLD`) sont signalées dans `near_duplicates`,
+    ou l'ajout est refusé (409) si `DEDUP_MODE=reject`.
     """,
     responses={
         200: {"description": "Question ajoutée avec succès"},
         400: {"description": "Erreur dans les données fournies"},
-        403: {"description": "Droits insuffisants (prof/admin requis)"}
+        403: {"description": "Droits insuffisants (prof/admin requis)"},
+        409: {"description": "Question identique existante, ou quasi-doublon (DEDUP_MODE=reject)"}
     }
 )
 def add_new_question(q: QuestionInput):
     """Ajouter une nouvelle question (prof/admin uniquement)"""
     require_prof_or_admin(q.username)
-    
-    success = add_question({
+
+    doc = {
         "question": q.question,
         "theme": q.theme or "Général",
         "test": q.test or "Quiz",
         "choix": q.choix,
         "correct": q.correct,
-    })
+    }
+    existing = find_identical_question(doc)
+    if existing:
+        raise HTTPException(status_code=409, detail={
+            "message": "Cette question existe déjà",
+            "qid": existing["qid"],
+        })
+
+    duplicates = find_near_duplicates(q.question)
+    if duplicates and dedup_config["mode"] == "reject":
+        raise HTTPException(status_code=409, detail={
+            "message": "Une question quasi identique existe déjà",
+            "near_duplicates": duplicates,
+        })
+    
+    qid = add_question(doc)
     
-    if not success:
+    if not qid:
         raise HTTPException(status_code=400, detail="Erreur lors de l'ajout de la question")
-    return {"message": "Question ajoutée avec succès"}
+    if duplicates:
+        return {"message": "Question ajoutée avec succès", "qid": qid, "near_duplicates": duplicates}
+    return {"message": "Question ajoutée avec succès", "qid": qid}
+
+
+@router.post("/import",
+    summary="Importer des questions en lot",
+    description="""
+    Ajoute jusqu'à 5000 questions en une seule écriture MongoDB.
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    Chaque question est comparée à la banque et aux questions précédentes du lot
+    (MinHash/LSH). Avec `DEDUP_MODE=reject`, les quasi-doublons sont écartés ; sinon
+    ils sont importés et listés dans `near_duplicates`. Les questions strictement
+    identiques à une question existante (même `qid`) ne sont jamais réimportées.
+
+    **Retour :** nombre de questions importées et quasi-doublons détectés
+    (`index` dans le lot, `duplicate_of`, `similarity`).
+    """,
+    responses={
+        200: {
+            "description": "Import terminé",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "inserted": 41,
+                        "near_duplicates": [{
+                            "index": 7,
+                            "question": "Kafka est système de messagerie",
+                            "duplicate_of": "Kafka est un système de messagerie",
+                            "similarity": 0.783
+                        }]
+                    }
+                }
+            }
+        },
+        403: {"description": "Droits insuffisants (prof/admin requis)"}
+    }
+)
+def import_questions(payload: QuestionImport):
+    """Importer des questions en lot (prof/admin uniquement)"""
+    require_prof_or_admin(payload.username)
+    docs = [q.model_dump() for q in payload.questions]
+    accepted, duplicates = screen_batch(docs)
+    to_insert = accepted if dedup_config["mode"] == "reject" else docs
+    return {"inserted": add_questions(to_insert), "near_duplicates": duplicates}
 
 
 @router.delete("",
@@ -148,4 +321,87 @@ def delete_question(username: str, question: str):
     deleted_count = delete_question_by_text(question)
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail="Question non trouvée")
-    return {"message": f"{deleted_count} question(s) supprimée(s)"}
\ No newline at end of file
+    return {"message": f"{deleted_count} question(s) supprimée(s)"}
+
+@router.get("/{qid}",
+    summary="Obtenir une question par identifiant",
+    description="""
+    Retourne une question à partir de son `qid` (accès direct par index unique).
+
+    **Prérequis :** Rôle `prof` ou `admin`
+    """,
+    responses={
+        200: {"description": "Question trouvée"},
+        404: {"description": "Question non trouvée"},
+        403: {"description": "Droits insuffisants (prof/admin requis)"}
+    }
+)
+def get_question(qid: str, username: str):
+    """Obtenir une question par identifiant (prof/admin uniquement)"""
+    require_prof_or_admin(username)
+    question = get_question_by_id(qid)
+    if not question:
+        raise HTTPException(status_code=404, detail="Question non trouvée")
+    return question
+
+
+@router.put("/{qid}",
+    summary="Modifier une question",
+    description="""
+    Modifie les champs fournis d'une question (`question`, `theme`, `test`, `choix`, `correct`).
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    **Note :** le `qid` reste celui attribué à la création, même si l'intitulé change :
+    les liens et statistiques qui y font référence restent valides. L'unicité porte en
+    revanche sur le contenu actuel : une modification qui rendrait la question identique
+    à une autre (même intitulé et mêmes choix) est refusée (409).
+    """,
+    responses={
+        200: {"description": "Question modifiée"},
+        404: {"description": "Question non trouvée"},
+        409: {"description": "Une autre question a déjà ce contenu"},
+        403: {"description": "Droits insuffisants (prof/admin requis)"}
+    }
+)
+def update_existing_question(qid: str, changes: QuestionUpdate):
+    """Modifier une question (prof/admin uniquement)"""
+    require_prof_or_admin(changes.username)
+    fields = changes.model_dump(exclude={"username"}, exclude_none=True)
+    if "question" in fields or "choix" in fields:
+        current = get_question_by_id(qid)
+        if not current:
+            raise HTTPException(status_code=404, detail="Question non trouvée")
+        existing = find_identical_question({**current, **fields}, exclude_qid=qid)
+        if existing:
+            raise HTTPException(status_code=409, detail={
+                "message": "Une autre question a déjà ce contenu",
+                "qid": existing["qid"],
+            })
+    question = update_question(qid, fields)
+    if not question:
+        raise HTTPException(status_code=404, detail="Question non trouvée")
+    return question
+
+
+@router.delete("/{qid}",
+    summary="Supprimer une question par identifiant",
+    description="""
+    Supprime la question identifiée par `qid`.
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    **⚠️ Attention :** Action irréversible !
+    """,
+    responses={
+        200: {"description": "Question supprimée"},
+        404: {"description": "Question non trouvée"},
+        403: {"description": "Droits insuffisants (prof/admin requis)"}
+    }
+)
+def delete_question_by_qid(qid: str, username: str):
+    """Supprimer une question par identifiant (prof/admin uniquement)"""
+    require_prof_or_admin(username)
+    if not delete_question_by_id(qid):
+        raise HTTPException(status_code=404, detail="Question non trouvée")
+    return {"message": "Question supprimée", "qid": qid}
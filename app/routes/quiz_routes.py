@@ -1,13 +1,31 @@
 """
 Routes de gestion des quiz
 """
-from fastapi import APIRouter, HTTPException
-from ..models import QuizInput
+import hashlib
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from ..config import bundle_config
+from ..models import QuizInput, QuizBatchInput, QuizSubmission, BundleSubmission
+from ..responses import FastJSONResponse
+from ..compression import payload_response
 from ..utils import require_prof_or_admin
 from ..database import get_user_role
+from ..generator import generate_quiz, generate_variants, get_bank
+from ..grading import (
+    grade_submission,
+    invalidate_answer_key,
+    bundles_cache,
+    get_bundle_payload,
+    verify_bundle_submission,
+)
+from ..leaderboard import leaderboards
+from ..quiz_pool import quiz_pool
 from ..questions import (
     create_quiz_session,
+    create_quiz_sessions_batch,
     get_quiz_session_by_id,
+    get_quiz_session_payload,
+    sessions_cache,
     delete_quiz_session,
     list_quiz_sessions
 )
@@ -20,29 +38,250 @@ def create_quiz(quiz: QuizInput):
     """Créer une session de quiz (prof/admin uniquement)"""
     require_prof_or_admin(quiz.username)
     
-    if quiz.limit not in (5, 10):
+    questions = None
+    limit = quiz.limit
+    if quiz.quotas:
+        # Génération stratifiée : « 4 BDD + 3 Python + 3 Docker »
+        limit = sum(q.count for q in quiz.quotas)
+        if limit > 50:
+            raise HTTPException(status_code=400, detail="Quotas trop élevés (50 questions maximum)")
+        questions = generate_quiz([q.model_dump() for q in quiz.quotas])
+    elif quiz.limit not in (5, 10):
         raise HTTPException(status_code=400, detail="Nombre de questions invalide (5 ou 10 seulement)")
+    else:
+        # Tirage pré-généré par la réserve (None si vide : génération à la demande)
+        questions = quiz_pool.take(quiz.theme, quiz.limit)
     
-    quiz_id, questions = create_quiz_session(quiz.username, quiz.limit, quiz.name, quiz.theme)
+    quiz_id, questions = create_quiz_session(quiz.username, limit, quiz.name, quiz.theme, questions)
     if not quiz_id:
         raise HTTPException(status_code=500, detail="Impossible de créer le quiz")
     
-    return {
+    return FastJSONResponse({
         "quiz_id": quiz_id,
         "questions": questions,
-        "limit": quiz.limit,
+        "limit": limit,
         "name": quiz.name,
         "theme": quiz.theme
+    })
+
+
+@router.post("/create_batch",
+    summary="Créer une variante de quiz par étudiant",
+    description="""
+    Génère `class_size` variantes distinctes d'un même quiz (une par étudiant, pour limiter
+    la copie), à partir d'un seul jeu de questions candidates chargé en mémoire, puis les
+    enregistre en une seule écriture.
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    **Recouvrement :** les questions sont réparties uniformément entre les variantes ;
+    `max_overlap` borne le nombre de questions communes entre deux variantes quand la
+    banque est assez grande (le recouvrement réellement obtenu est renvoyé).
+    """,
+    responses={
+        200: {"description": "Identifiants des quiz créés (ordre des variantes)"},
+        400: {"description": "Paramètres invalides ou aucune question disponible"},
+        403: {"description": "Droits insuffisants (prof/admin requis)"}
     }
+)
+def create_quiz_batch(batch: QuizBatchInput):
+    """Créer une variante de quiz par étudiant (prof/admin uniquement)"""
+    require_prof_or_admin(batch.username)
+
+    if batch.quotas:
+        quotas = [q.model_dump() for q in batch.quotas]
+        if sum(q["count"] for q in quotas) > 50:
+            raise HTTPException(status_code=400, detail="Quotas trop élevés (50 questions maximum)")
+    else:
+        quotas = [{"theme": batch.theme, "test": batch.test, "count": batch.limit}]
+
+    variants, overlap = generate_variants(get_bank(), quotas, batch.class_size, batch.max_overlap)
+    if not variants or not variants[0]:
+        raise HTTPException(status_code=400, detail="Aucune question disponible pour ces critères")
+
+    batch_id, quiz_ids = create_quiz_sessions_batch(batch.username, variants, batch.name, batch.theme)
+    return FastJSONResponse({
+        "batch_id": batch_id,
+        "quiz_ids": quiz_ids,
+        "count": len(quiz_ids),
+        "limit": len(variants[0]),
+        "max_overlap": overlap,
+    })
 
 
 @router.get("/{quiz_id}")
-def get_quiz(quiz_id: str):
+def get_quiz(quiz_id: str, request: Request):
     """Récupérer une session de quiz par son ID"""
-    quiz = get_quiz_session_by_id(quiz_id)
-    if not quiz:
+    payload = get_quiz_session_payload(quiz_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Quiz non trouvé")
-    return quiz
+    # Session immuable lue par toute la classe : sérialisée et compressée une seule fois
+    return payload_response(request, payload, sessions_cache, quiz_id)
+
+
+@router.post("/{quiz_id}/submit",
+    summary="Soumettre toutes les réponses d'un quiz",
+    description="""
+    Corrige en une seule requête toutes les réponses d'un étudiant, à partir de la clé
+    de correction de la session (construite une fois par quiz et gardée en mémoire).
+
+    **Retour :** résultat par question (`correct`, `correct_answers`) et score global.
+    Chaque réponse désigne sa question par `qid` (ou par son intitulé s'il est unique
+    dans le quiz) ; une question absente ou ambiguë est signalée par `unknown: true`.
+
+    Chaque réponse est ajoutée au journal des tentatives (écriture différée par lots).
+    """,
+    responses={404: {"description": "Quiz non trouvé"}}
+)
+def submit_quiz(quiz_id: str, submission: QuizSubmission):
+    """Corriger toutes les réponses d'un quiz en une fois"""
+    result = grade_submission(quiz_id, [a.model_dump() for a in submission.answers], submission.username)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Quiz non trouvé")
+    result["username"] = submission.username
+    return result
+
+
+@router.get("/{quiz_id}/bundle",
+    summary="Quiz autonome (correction dans le navigateur)",
+    description="""
+    Quiz complet à corriger côté client, sans un appel `/answer` par question.
+
+    Les bonnes réponses n'y figurent pas directement : chaque question porte `answer_hash`,
+    le SHA-256 hexadécimal de `salt + "|" + index + "|" + réponses` où `réponses` est
+    l'ensemble des bonnes réponses, sans doublon, trié et joint par le caractère U+001F.
+    Le navigateur hache la sélection de l'étudiant de la même façon et compare.
+
+    Le sel est propre à la session mais envoyé au client : avec quelques choix par
+    question, une empreinte se retrouve en une quinzaine d'essais. Cela dissuade
+    seulement la lecture directe des réponses (quiz d'entraînement, pas d'évaluation notée).
+
+    La réponse est immuable : mise en cache par le navigateur (`Cache-Control`,
+    `ETag` propre à chaque encodage, `304 Not Modified`).
+
+    **Fin du quiz :** `POST /quiz/{quiz_id}/bundle/submit` avec toutes les réponses.
+    """,
+    responses={
+        200: {
+            "description": "Quiz autonome",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "quiz_id": "507f1f77bcf86cd799439011",
+                        "name": "Révisions",
+                        "theme": "Mathématiques",
+                        "salt": "9b1f0c3e5a7d4e2f8c6b1a0d3e5f7a9c",
+                        "hash": "sha256",
+                        "questions": [{
+                            "index": 0,
+                            "qid": "3f9a1c07d2b84e61",
+                            "question": "Combien font 2+2 ?",
+                            "theme": "Mathématiques",
+                            "test": "Calcul mental",
+                            "choix": ["3", "4", "5", "6"],
+                            "answer_hash": "5d41402abc4b2a76b9719d911017c592..."
+                        }]
+                    }
+                }
+            }
+        },
+        304: {"description": "Quiz inchangé (If-None-Match)"},
+        404: {"description": "Quiz non trouvé"}
+    }
+)
+def get_quiz_bundle(quiz_id: str, request: Request):
+    """Quiz autonome, bonnes réponses hachées"""
+    payload = get_bundle_payload(quiz_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Quiz non trouvé")
+    response = payload_response(request, payload, bundles_cache, quiz_id)
+    # ETag propre à l'encodage servi (octets différents), comme pour le frontend
+    etag = hashlib.blake2b(payload.body, digest_size=8).hexdigest()
+    encoding = response.headers.get("content-encoding")
+    etag = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    cache_headers = {"ETag": etag, "Cache-Control": f"private, max-age={bundle_config['max_age_s']}",
+                     "Vary": "Accept-Encoding"}
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in inm.split(",")}
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+    return response
+
+
+@router.post("/{quiz_id}/bundle/submit",
+    summary="Soumettre les réponses d'un quiz autonome",
+    description="""
+    Envoi unique des réponses finales d'un quiz corrigé dans le navigateur.
+
+    Le serveur hache chaque sélection comme le navigateur et la compare à l'empreinte
+    du quiz : le score retourné est celui du serveur. `verified` indique si le score
+    annoncé par le client (`score`, optionnel) est confirmé.
+
+    **Retour :** score, résultat par question avec les bonnes réponses (correction).
+    Les réponses sont journalisées et comptent pour le classement du quiz.
+    """,
+    responses={404: {"description": "Quiz non trouvé"}}
+)
+def submit_quiz_bundle(quiz_id: str, submission: BundleSubmission):
+    """Vérifier les réponses finales d'un quiz autonome"""
+    result = verify_bundle_submission(
+        quiz_id, [a.model_dump() for a in submission.answers], submission.username, submission.score
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Quiz non trouvé")
+    return result
+
+
+@router.get("/{quiz_id}/leaderboard",
+    summary="Classement en direct d'un quiz",
+    description="""
+    Classement mis à jour à chaque réponse corrigée (`/answer` avec `quiz_id`,
+    `/quiz/{quiz_id}/submit`) : une question compte au plus une fois par étudiant,
+    la dernière réponse fait foi.
+
+    **Paramètres :**
+    - `k` : nombre d'étudiants en tête retournés (10 par défaut, 100 maximum)
+    - `username` : ajoute le rang et le score de cet étudiant (`me`)
+
+    Les ex aequo partagent le même rang. Les classements sans activité depuis
+    `LEADERBOARD_IDLE_TTL` secondes sont libérés ; un quiz sans réponse récente
+    renvoie donc un classement vide.
+
+    **Exemple :** `/quiz/507f1f77bcf86cd799439011/leaderboard?k=5&username=etudiant_marie`
+    """,
+    responses={
+        200: {
+            "description": "Classement",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "quiz_id": "507f1f77bcf86cd799439011",
+                        "participants": 212,
+                        "top": [{"username": "etudiant_paul", "score": 10, "rank": 1}],
+                        "me": {"username": "etudiant_marie", "score": 7, "rank": 18}
+                    }
+                }
+            }
+        },
+        404: {"description": "Quiz non trouvé"}
+    }
+)
+def get_leaderboard(quiz_id: str, k: int = 10, username: str | None = None):
+    """Top-k et rang d'un étudiant pour un quiz"""
+    board = leaderboards.get(quiz_id)
+    if board is None and get_quiz_session_payload(quiz_id) is None:
+        raise HTTPException(status_code=404, detail="Quiz non trouvé")
+    k = max(1, min(k, 100))
+    result = {
+        "quiz_id": quiz_id,
+        "participants": len(board) if board else 0,
+        "top": board.top(k) if board else [],
+    }
+    if username:
+        result["me"] = board.rank(username) if board else None
+    return result
 
 
 @router.delete("/{quiz_id}")
@@ -57,6 +296,7 @@ def delete_quiz(quiz_id: str, username: str):
         require_prof_or_admin(username)
     
     deleted = delete_quiz_session(quiz_id)
+    invalidate_answer_key(quiz_id)
     return {"message": "Quiz supprimé", "deleted": deleted}
 
 
@@ -69,7 +309,7 @@ def list_quizzes(username: str, max_items: int = 50, scope: str | None = None):
     
     # Admin peut voir tous les quiz avec scope=all
     if role == "admin" and scope == "all":
-        return list_quiz_sessions(None, max_items)
+        return FastJSONResponse(list_quiz_sessions(None, max_items))
     
     # Sinon, seulement ses propres quiz
-    return list_quiz_sessions(username, max_items)
\ No newline at end of file
+    return FastJSONResponse(list_quiz_sessions(username, max_items))
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Routes de statistiques de difficulté des questions
+"""
+from fastapi import APIRouter, HTTPException
+from ..responses import FastJSONResponse
+from ..utils import require_prof_or_admin
+from ..stats import list_question_stats
+
+router = APIRouter(prefix="/stats", tags=["statistiques"])
+
+
+@router.get("/questions",
+    summary="Questions triées par difficulté",
+    description="""
+    Retourne, pour chaque question déjà corrigée, le nombre de tentatives, le taux de
+    réussite et la part des étudiants ayant sélectionné chaque choix.
+
+    **Prérequis :** Rôle `prof` ou `admin`
+
+    **Paramètres :**
+    - `theme`, `test` : filtres optionnels
+    - `order` : `hardest` (taux de réussite croissant, par défaut) ou `easiest`
+    - `min_attempts` : ignore les questions trop peu tentées (1 par défaut)
+    - `limit` : nombre de questions retournées (50 par défaut, 500 maximum)
+
+    Les compteurs sont maintenus au fil des corrections (`/answer`, `/quiz/{quiz_id}/submit`)
+    et écrits par lots toutes les `STATS_FLUSH_INTERVAL` secondes : ils peuvent avoir
+    quelques secondes de retard.
+
+    **Exemple :** `/stats/questions?username=prof_martin&theme=BDD&order=hardest&min_attempts=20`
+    """,
+    responses={
+        200: {
+            "description": "Statistiques par question",
+            "content": {
+                "application/json": {
+                    "example": [{
+                        "question": "Combien font 2+2 ?",
+                        "theme": "Mathématiques",
+                        "test": "Calcul mental",
+                        "attempts": 120,
+                        "correct": 54,
+                        "success_rate": 0.45,
+                        "choices": {"4": {"count": 54, "rate": 0.45}, "5": {"count": 60, "rate": 0.5}}
+                    }]
+                }
+            }
+        },
+        400: {"description": "Paramètre `order` invalide"},
+        403: {"description": "Accès refusé (prof/admin requis)"}
+    }
+)
+def get_question_stats(username: str, theme: str | None = None, test: str | None = None,
+                       order: str = "hardest", min_attempts: int = 1, limit: int = 50):
+    """Statistiques de difficulté par question (prof/admin uniquement)"""
+    require_prof_or_admin(username)
+    if order not in ("hardest", "easiest"):
+        raise HTTPException(status_code=400, detail="order doit valoir 'hardest' ou 'easiest'")
+    limit = max(1, min(limit, 500))
+    return FastJSONResponse(list_question_stats(theme, test, order, min_attempts, limit))
@@ -4,7 +4,15 @@ Routes utilitaires (thèmes, tests, etc.)
 from fastapi import APIRouter, HTTPException
 from typing import List
 from ..models import AnswerInput
-from ..questions import list_themes, list_tests, collection
+from ..grading import get_answer_key, is_correct, record_attempt
+from ..questions import (
+    list_themes,
+    list_tests,
+    list_themes_for_test,
+    list_tests_for_theme,
+    find_question_by_text,
+    get_question_by_id
+)
 
 router = APIRouter(tags=["utilitaires"])
 
@@ -36,21 +44,13 @@ def get_themes_for_test(test_name: str):
     if not test_name:
         return list_themes()
     
-    try:
-        themes = collection.distinct("theme", {"test": test_name})
-        return sorted([t for t in themes if isinstance(t, str) and t.strip()])
-    except Exception:
-        return []
+    return list_themes_for_test(test_name)
 
 
 @router.get("/tests_by_theme/{theme}", response_model=List[str])
 def get_tests_for_theme(theme: str):
     """Récupérer les tests disponibles pour un thème donné"""
-    try:
-        tests = collection.distinct("test", {"theme": theme})
-        return sorted([t for t in tests if isinstance(t, str) and t.strip()])
-    except Exception:
-        return []
+    return list_tests_for_theme(theme)
 
 
 @router.post("/answer",
@@ -65,6 +65,11 @@ def get_tests_for_theme(theme: str):
     
     **Exemple :** Si la bonne réponse est ["A", "C"] et que l'étudiant répond ["A", "C"], 
     le résultat sera `true`. Si il répond ["A"] ou ["A", "B", "C"], ce sera `false`.
+
+    **Avec `quiz_id` :** la correction utilise la clé de la session en mémoire, sans
+    lecture de la collection questions. La question est désignée par `qid` ; le texte
+    seul suffit s'il est unique dans la session. Pour corriger un quiz entier en une requête,
+    voir `POST /quiz/{quiz_id}/submit`.
     """,
     responses={
         200: {
@@ -80,12 +85,24 @@ def get_tests_for_theme(theme: str):
 )
 def check_answer(answer: AnswerInput):
     """Vérifier si une réponse est correcte"""
-    question_doc = collection.find_one({"question": answer.question})
+    if answer.quiz_id:
+        key = get_answer_key(answer.quiz_id)
+        index = key.find(answer.qid, answer.question) if key is not None else None
+        if index is not None:
+            ok = is_correct(key.items[index]["correct"], answer.reponse)
+            record_attempt(answer.username, answer.quiz_id, answer.question, answer.reponse, ok, index=index)
+            return {"correct": ok}
+
+    # Accès direct par identifiant si le client le fournit, sinon par texte exact
+    question_doc = get_question_by_id(answer.qid) if answer.qid else None
+    if question_doc is None:
+        question_doc = find_question_by_text(answer.question)
     if not question_doc:
         raise HTTPException(status_code=404, detail="Question non trouvée")
     
-    correct_answers = set(question_doc.get("correct", []))
-    user_answers = set(answer.reponse)
-    is_correct = (user_answers == correct_answers)
-    
-    return {"correct": is_correct}
\ No newline at end of file
+    correct_answers = frozenset(question_doc.get("correct", []))
+    ok = is_correct(correct_answers, answer.reponse)
+    record_attempt(answer.username, answer.quiz_id, answer.question, answer.reponse, ok,
+                   question_doc.get("theme"), question_doc.get("test"), question_doc.get("choix"),
+                   qid=question_doc.get("qid"))
+    return {"correct": ok}
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""
+Recherche plein texte dans la banque de questions (index inversé en mémoire)
+
+- Normalisation française : minuscules, accents et ligatures retirés (« élève » ->
+  « eleve », « cœur » -> « coeur »), élisions coupées (« l'index » -> « index »),
+  mots vides ignorés, pluriel simple retiré (« requêtes » -> « requete »).
+- Classement BM25 sur le texte de la question (poids 2) et les choix (poids 1).
+- Autocomplétion par préfixe : vocabulaire trié, recherche par bisect.
+
+L'index est construit au démarrage à partir de la banque (app/generator.py, sans
+nouvelle lecture MongoDB) puis tenu à jour à chaque ajout/suppression de question.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+from .generator import get_bank
+from .questions import on_questions_changed
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_LIGATURES = (("œ", "oe"), ("æ", "ae"), ("ß", "ss"))
+
+STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette d dans de des du elle en est et etre eux il ils je la le les
+leur leurs lui ma mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui
+sa se ses son sont sur ta te tes toi ton tu un une vos votre vous y l c j m n s t
+quel quelle quels quelles quoi comment lequel laquelle
+""".split())
+
+# Pondération des champs dans la fréquence d'un terme
+_FIELD_WEIGHTS = (("question", 2), ("choix", 1))
+
+# Listes « champions » : pour un terme présent dans plus de CHAMPION_MIN_DF questions,
+# seules ses CHAMPION_SIZE meilleures occurrences (impact BM25) servent à trouver les
+# candidats, ensuite notés exactement. Les termes fréquents ont un idf faible : le
+# classement de tête est préservé sans parcourir des dizaines de milliers d'entrées.
+CHAMPION_MIN_DF = 2000
+CHAMPION_SIZE = 500
+
+
+def fold(text: str) -> str:
+    """Minuscules, sans accents ni ligatures."""
+    text = str(text).lower()
+    if text.isascii():
+        return text
+    for ligature, letters in _LIGATURES:
+        text = text.replace(ligature, letters)
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def stem(token: str) -> str:
+    """Racinisation légère : pluriels en -s / -ux (« tables » -> « table », « réseaux » -> « reseau »)."""
+    if len(token) > 3 and (token.endswith("ux") or (token[-1] == "s" and token[-2:] not in ("ss", "us", "is"))):
+        return token[:-1]
+    return token
+
+
+@lru_cache(maxsize=200_000)
+def _term(token: str) -> str | None:
+    return None if token in STOPWORDS else stem(token)
+
+
+def tokenize(text: str) -> list[str]:
+    """Termes indexés d'un texte (normalisés, sans mots vides)."""
+    return [term for term in map(_term, _TOKEN_RE.findall(fold(text))) if term is not None]
+
+
+class SearchIndex:
+    """Index inversé BM25 des questions, indexées par ordinal."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[int, int]] = {}
+        self.doc_terms: dict[int, dict[str, int]] = {}
+        self.doc_len: dict[int, int] = {}
+        self.docs: dict[int, dict] = {}
+        self.terms: list[str] = []  # vocabulaire trié (autocomplétion)
+        self.total_len = 0
+        self.built = False
+        self._champions: dict[str, list[int]] = {}
+        self._lock = threading.RLock()
+
+    def _add(self, ordinal: int, doc: dict):
+        if ordinal in self.doc_terms:
+            self._remove(ordinal)
+        tf: dict[str, int] = {}
+        for field, weight in _FIELD_WEIGHTS:
+            value = doc.get(field) or ""
+            text = " ".join(map(str, value)) if isinstance(value, list) else value
+            for term in tokenize(text):
+                tf[term] = tf.get(term, 0) + weight
+        for term, n in tf.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if self.built:
+                    insort(self.terms, term)
+            posting[ordinal] = n
+            self._champions.pop(term, None)
+        length = sum(tf.values())
+        self.doc_terms[ordinal] = tf
+        self.doc_len[ordinal] = length
+        self.total_len += length
+        self.docs[ordinal] = {k: doc.get(k) for k in ("qid", "question", "theme", "test", "choix", "correct")}
+
+    def _remove(self, ordinal: int):
+        tf = self.doc_terms.pop(ordinal, None)
+        if tf is None:
+            return
+        for term in tf:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(ordinal, None)
+            self._champions.pop(term, None)
+            if not posting:
+                del self.postings[term]
+                i = bisect_left(self.terms, term)
+                if i < len(self.terms) and self.terms[i] == term:
+                    del self.terms[i]
+        self.total_len -= self.doc_len.pop(ordinal, 0)
+        self.docs.pop(ordinal, None)
+
+    def build(self, questions: dict[int, dict]):
+        """
+        (Re)construit l'index complet à partir de {ordinal: question} : construit à part,
+        puis substitué d'un bloc sous le verrou (les recherches en cours voient l'ancien
+        index ou le nouveau, jamais un index partiel).
+        """
+        fresh = SearchIndex(self.k1, self.b)
+        for ordinal, doc in list(questions.items()):
+            fresh._add(ordinal, doc)
+        fresh.terms = sorted(fresh.postings)
+        impact = fresh._impact(fresh.total_len / len(fresh.doc_terms) if fresh.doc_terms else 1.0)
+        for term, posting in fresh.postings.items():
+            if len(posting) > CHAMPION_MIN_DF:
+                fresh._candidates(term, posting, impact)
+        with self._lock:
+            for name in ("postings", "doc_terms", "doc_len", "docs", "terms", "total_len", "_champions"):
+                setattr(self, name, getattr(fresh, name))
+            self.built = True
+
+    def add(self, ordinal: int, doc: dict):
+        with self._lock:
+            self._add(ordinal, doc)
+
+    def remove(self, ordinal: int):
+        with self._lock:
+            self._remove(ordinal)
+
+    def _impact(self, avgdl: float):
+        """Part de BM25 propre au document (hors idf) : tf·(k1+1) / (tf + k1·(1-b+b·dl/avgdl))."""
+        k1, b, doc_len = self.k1, self.b, self.doc_len
+        return lambda ordinal, tf: tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len[ordinal] / avgdl))
+
+    def _candidates(self, term: str, posting: dict[int, int], impact) -> list[int]:
+        champions = self._champions.get(term)
+        if champions is None:
+            best = heapq.nlargest(CHAMPION_SIZE, posting.items(), key=lambda item: impact(*item))
+            champions = self._champions[term] = [ordinal for ordinal, _ in best]
+        return champions
+
+    def _score(self, terms: list[str], allowed=None, exhaustive: bool = False) -> dict[int, float]:
+        n_docs = len(self.doc_terms)
+        avgdl = (self.total_len / n_docs) if n_docs else 1.0
+        impact = self._impact(avgdl)
+        idf: dict[str, float] = {}
+        candidates: set[int] = set()
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            if exhaustive or df <= CHAMPION_MIN_DF:
+                candidates.update(posting)
+            else:
+                candidates.update(self._candidates(term, posting, impact))
+        scores: dict[int, float] = {}
+        doc_terms = self.doc_terms
+        for ordinal in candidates:
+            if allowed is not None and not allowed(ordinal):
+                continue
+            tf = doc_terms[ordinal]
+            total = 0.0
+            for term, weight in idf.items():
+                n = tf.get(term)
+                if n:
+                    total += weight * impact(ordinal, n)
+            scores[ordinal] = total
+        return scores
+
+    def _filter(self, theme: str | None, test: str | None):
+        if not theme and not test:
+            return None
+        docs = self.docs
+        return lambda o: ((not theme or docs[o].get("theme") == theme)
+                          and (not test or docs[o].get("test") == test))
+
+    def _results(self, scores: dict[int, float], limit: int) -> list[dict]:
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [{**self.docs[o], "score": round(s, 4)} for o, s in best]
+
+    def search(self, query: str, limit: int = 20, theme: str | None = None, test: str | None = None) -> list[dict]:
+        """Questions les plus pertinentes pour la requête (BM25)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        allowed = self._filter(theme, test)
+        with self._lock:
+            scores = self._score(terms, allowed)
+            if allowed is not None and len(scores) < limit:
+                # Filtre très sélectif : les listes champions ne suffisent pas, parcours complet
+                scores = self._score(terms, allowed, exhaustive=True)
+            return self._results(scores, limit)
+
+    def complete_terms(self, prefix: str, limit: int = 10) -> list[str]:
+        """
+        Termes du vocabulaire commençant par prefix, les plus fréquents d'abord. Les termes
+        indexés étant racinisés, la racine du préfixe sert aussi (« tables » -> « table »).
+        """
+        prefix = fold(prefix)
+        if not prefix:
+            return []
+        candidates: set[str] = set()
+        with self._lock:
+            for p in {prefix, stem(prefix)}:
+                start = bisect_left(self.terms, p)
+                end = bisect_left(self.terms, p + "\uffff", start)
+                candidates.update(self.terms[start:end])
+            return heapq.nlargest(limit, sorted(candidates), key=lambda t: len(self.postings.get(t, ())))
+
+    def autocomplete(self, query: str, limit: int = 10, expansions: int = 20) -> dict:
+        """
+        Suggestions pour une saisie en cours : le dernier mot est traité comme un préfixe
+        (étendu à ses `expansions` complétions les plus fréquentes), les précédents comme
+        des termes complets.
+        """
+        words = _TOKEN_RE.findall(fold(query))
+        if not words:
+            return {"terms": [], "questions": []}
+        prefix = words[-1]
+        full = [stem(w) for w in words[:-1] if w not in STOPWORDS]
+        completions = self.complete_terms(prefix, expansions)
+        with self._lock:
+            scores = self._score(full + completions)
+            return {"terms": completions[:limit], "questions": self._results(scores, limit)}
+
+    def stats(self) -> dict:
+        return {"built": self.built, "documents": len(self.doc_terms), "terms": len(self.postings)}
+
+
+search_index = SearchIndex()
+_build_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Index du processus (construit depuis la banque au premier appel si besoin)."""
+    if not search_index.built:
+        bank = get_bank()
+        with _build_lock:
+            if not search_index.built:
+                search_index.build(bank.questions)
+    return search_index
+
+
+@on_questions_changed
+def _sync_search(event: str, doc: dict):
+    """Ajouts/suppressions répercutés sur l'index (s'il est construit)."""
+    if event == "reset":
+        search_index.built = False  # reconstruit depuis la banque rechargée au prochain appel
+        return
+    if not search_index.built or doc.get("ordinal") is None:
+        return
+    if event in ("added", "updated"):
+        search_index.add(int(doc["ordinal"]), doc)
+    elif event == "deleted":
+        search_index.remove(int(doc["ordinal"]))
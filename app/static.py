@@ -0,0 +1,211 @@
+"""
+Service du frontend par l'API : URLs versionnées, fichiers pré-compressés, Range
+
+Au démarrage (ou via `python -m app.static` lors du déploiement), le contenu de
+`STATIC_SOURCE_DIR` (frontend/) est préparé dans `STATIC_BUILD_DIR` :
+
+- chaque ressource (CSS, audio, images...) est copiée sous un nom contenant
+  l'empreinte de son contenu (`assets/bg.3f9a1c07d2b8.mp3`), servie sous
+  `/app/static/...` avec `Cache-Control: immutable` (un an) : le navigateur ne la
+  télécharge qu'une fois par version ;
+- les pages HTML sont réécrites pour pointer vers ces URLs, et servies sous
+  `/app/<page>.html` en `no-cache` (revalidation par ETag, 304) ;
+- les fichiers texte reçoivent des variantes `.gz` (et `.br` si le paquet brotli
+  est installé), compressées une fois au niveau maximal.
+
+Les requêtes conditionnelles (If-None-Match, If-Modified-Since) sont traitées ici,
+les requêtes partielles (Range, If-Range : lecture audio) par FileResponse.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from .compression import brotli, negotiate
+from .config import static_config
+
+# Types compressibles (les formats audio/image le sont déjà)
+_COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".txt")
+_PAGE_EXT = ".html"
+_REF_RE = re.compile(r'''(\b(?:src|href)=["'])([^"'#?:]+)(["'])''')
+
+
+class StaticFile:
+    """Fichier prêt à servir : chemin, en-têtes de cache, variantes compressées."""
+
+    __slots__ = ("path", "media_type", "etag", "last_modified", "mtime", "immutable", "variants")
+
+    def __init__(self, path: str, digest: str, immutable: bool):
+        self.path = path
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or self.media_type == "application/javascript":
+            self.media_type += "; charset=utf-8"
+        self.etag = f'"{digest}"'
+        self.mtime = int(os.stat(path).st_mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        self.immutable = immutable
+        self.variants: dict[str, str] = {}
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+
+def _write_once(path: str, data: bytes):
+    """Écrit un fichier de build s'il n'existe pas (écriture atomique : plusieurs workers démarrent ensemble)."""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _precompress(path: str, data: bytes, entry: StaticFile):
+    if not path.endswith(_COMPRESSIBLE) or len(data) < static_config["min_compress_size"]:
+        return
+    _write_once(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    entry.variants["gzip"] = path + ".gz"
+    if brotli is not None:
+        _write_once(path + ".br", brotli.compress(data, quality=11))
+        entry.variants["br"] = path + ".br"
+
+
+class StaticSite:
+    """Table des fichiers servis sous `prefix`, construite depuis le répertoire source."""
+
+    def __init__(self, source_dir: str, build_dir: str, prefix: str = "/app"):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.prefix = prefix.rstrip("/")
+        self.files: dict[str, StaticFile] = {}
+        self.manifest: dict[str, str] = {}
+        self.built = False
+        self._lock = threading.Lock()
+
+    def _sources(self):
+        for root, _, names in os.walk(self.source_dir):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, self.source_dir).replace(os.sep, "/"), path
+
+    @staticmethod
+    def _add(build_path: str, data: bytes, immutable: bool) -> StaticFile:
+        _write_once(build_path, data)
+        entry = StaticFile(build_path, _digest(data), immutable)
+        _precompress(build_path, data, entry)
+        return entry
+
+    def _build(self):
+        files: dict[str, StaticFile] = {}
+        manifest: dict[str, str] = {}
+        pages = []
+        for rel, path in self._sources():
+            if rel.endswith(_PAGE_EXT):
+                pages.append((rel, path))
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            stem, ext = os.path.splitext(rel)
+            hashed = f"{stem}.{_digest(data)}{ext}"
+            manifest[rel] = f"{self.prefix}/static/{hashed}"
+            entry = files[f"static/{hashed}"] = self._add(os.path.join(self.build_dir, "static", hashed), data, True)
+            # Ancienne URL non versionnée (pages en cache, liens externes) : servie avec revalidation
+            files[rel] = StaticFile(entry.path, _digest(data), False)
+            files[rel].variants = entry.variants
+
+        def rewrite(match):
+            target = manifest.get(match.group(2).removeprefix("./"))
+            return f"{match.group(1)}{target}{match.group(3)}" if target else match.group(0)
+
+        for rel, path in pages:
+            with open(path, "r", encoding="utf-8") as f:
+                html = _REF_RE.sub(rewrite, f.read()).encode("utf-8")
+            # Un répertoire par version de page : un worker ne remplace pas la page servie par un autre
+            files[rel] = self._add(os.path.join(self.build_dir, "pages", _digest(html), rel), html, False)
+        self.files = files
+        self.manifest = manifest
+        self.built = True
+
+    def build(self) -> dict:
+        """Prépare ressources versionnées, pages réécrites et variantes compressées."""
+        with self._lock:
+            self._build()
+            return self.stats()
+
+    def resolve(self, url_path: str) -> StaticFile | None:
+        if not self.built:
+            with self._lock:
+                if not self.built:
+                    self._build()
+        return self.files.get(url_path or "index.html")
+
+    def stats(self) -> dict:
+        return {
+            "built": self.built,
+            "files": len(self.files),
+            "versioned_assets": len(self.manifest),
+            "precompressed": sum(len(f.variants) for f in self.files.values()),
+        }
+
+
+static_site = StaticSite(static_config["source_dir"], static_config["build_dir"], static_config["prefix"])
+
+
+def _variant_etag(entry: StaticFile, encoding: str) -> str:
+    # Variante compressée : ETag distinct (octets différents)
+    return entry.etag[:-1] + f'-{encoding}"'
+
+
+def _not_modified(request: Request, entry: StaticFile, etag: str) -> bool:
+    """Requête conditionnelle satisfaite, comparée à l'ETag de la variante servie uniquement."""
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in inm.split(",")}
+        return "*" in tags or etag in tags
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        try:
+            return entry.mtime <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def static_response(request: Request, url_path: str) -> Response | None:
+    """Réponse pour un chemin sous le préfixe du frontend (None si inconnu)."""
+    entry = static_site.resolve(url_path)
+    if entry is None:
+        return None
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": (f"public, max-age={static_config['max_age_s']}, immutable"
+                          if entry.immutable else "no-cache"),
+    }
+    if entry.variants:
+        headers["Vary"] = "Accept-Encoding"
+    path = entry.path
+    encoding = negotiate(request.headers.get("accept-encoding")) if entry.variants else None
+    if encoding in entry.variants:
+        path = entry.variants[encoding]
+        headers["ETag"] = _variant_etag(entry, encoding)
+    if _not_modified(request, entry, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if encoding in entry.variants:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type=entry.media_type, headers=headers)
+
+
+if __name__ == "__main__":
+    # Préparation au déploiement : python -m app.static
+    shutil.rmtree(static_config["build_dir"], ignore_errors=True)
+    print(static_site.build())
@@ -0,0 +1,201 @@
+"""
+Statistiques de difficulté par question, maintenues au fil des corrections
+
+Chaque réponse corrigée incrémente des compteurs en mémoire (tentatives, bonnes
+réponses, nombre de sélections par choix). Un thread d'arrière-plan les pousse
+périodiquement dans `question_stats` par lots d'incréments (upsert) :
+`GET /stats/questions` lit ces compteurs pré-calculés, sans jamais parcourir
+le journal des tentatives.
+
+Les compteurs sont indexés par qid : deux questions de même intitulé ont chacune
+les leurs, et une question modifiée garde les siens (intitulé, thème et test mis à
+jour). Réponses à une question sans qid (sessions anciennes) : non comptées.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from .config import stats_config
+from .questions import on_questions_changed
+from .storage import PartialWriteError, get_store
+
+logger = logging.getLogger("miskatonic")
+
+
+class _Counts:
+    __slots__ = ("question", "attempts", "correct", "choices", "theme", "test")
+
+    def __init__(self):
+        self.question = None
+        self.attempts = 0
+        self.correct = 0
+        self.choices: Counter = Counter()
+        self.theme = None
+        self.test = None
+
+
+class QuestionStatsAccumulator:
+    """Compteurs en mémoire, vidés périodiquement en incréments groupés."""
+
+    def __init__(self, flush_interval_s: float = 5.0, writer=None):
+        self.flush_interval_s = flush_interval_s
+        self._writer = writer or (lambda rows: get_store().increment_question_stats(rows))
+        self._pending: dict[str, _Counts] = {}  # qid -> compteurs
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread: threading.Thread | None = None
+        self.flushes = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, qid: str | None, question: str, reponse: list[str], correct: bool,
+               theme: str | None = None, test: str | None = None, choix: list[str] | None = None):
+        """
+        Comptabilise une réponse corrigée à la question qid. Seules les réponses figurant
+        parmi les choix de la question sont comptées par choix (choix inconnus : aucune).
+        """
+        if not qid:
+            return
+        allowed = set(choix or ())
+        selected = {c for c in reponse if c and c in allowed}
+        with self._lock:
+            counts = self._pending.get(qid)
+            if counts is None:
+                counts = self._pending[qid] = _Counts()
+            counts.question = question
+            counts.attempts += 1
+            counts.correct += bool(correct)
+            counts.choices.update(selected)
+            if theme is not None:
+                counts.theme = theme
+            if test is not None:
+                counts.test = test
+
+    def discard(self, qid: str):
+        """Oublie les compteurs en attente d'une question (supprimée)."""
+        with self._lock:
+            self._pending.pop(qid, None)
+
+    def rename(self, qid: str, fields: dict):
+        """Intitulé, thème ou test modifiés : repris par les compteurs en attente."""
+        with self._lock:
+            counts = self._pending.get(qid)
+            if counts is not None:
+                for field, value in fields.items():
+                    setattr(counts, field, value)
+
+    @staticmethod
+    def _to_row(qid: str, counts: _Counts) -> dict:
+        return {
+            "qid": qid,
+            "question": counts.question,
+            "attempts": counts.attempts,
+            "correct": counts.correct,
+            "choices": dict(counts.choices),
+            "theme": counts.theme,
+            "test": counts.test,
+        }
+
+    def flush(self) -> int:
+        """Pousse les compteurs en attente. Retourne le nombre de questions mises à jour."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            started = time.perf_counter()
+            try:
+                self._writer([self._to_row(q, c) for q, c in pending.items()])
+            except Exception as exc:
+                self.errors += 1
+                logger.warning("Statistiques par question : écriture impossible (%s)", exc)
+                # Les compteurs non écrits sont ré-fusionnés pour le prochain vidage
+                # (écriture partielle : ceux déjà incrémentés ne le sont pas deux fois)
+                if isinstance(exc, PartialWriteError):
+                    pending = {row["qid"]: pending[row["qid"]] for row in exc.failed}
+                with self._lock:
+                    for qid, counts in pending.items():
+                        current = self._pending.setdefault(qid, _Counts())
+                        current.question = current.question or counts.question
+                        current.attempts += counts.attempts
+                        current.correct += counts.correct
+                        current.choices.update(counts.choices)
+                        current.theme = current.theme or counts.theme
+                        current.test = current.test or counts.test
+                return 0
+            self.flushes += 1
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            return len(pending)
+
+    def _run(self):
+        while not self._stop:
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="question-stats", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Arrête le thread après un dernier vidage."""
+        self._stop = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_questions": len(self._pending),
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+question_stats = QuestionStatsAccumulator(flush_interval_s=stats_config["flush_interval_s"])
+
+
+def list_question_stats(theme: str | None = None, test: str | None = None, order: str = "hardest",
+                        min_attempts: int = 1, limit: int = 50) -> list[dict]:
+    """
+    Questions triées par difficulté (taux de réussite croissant pour « hardest »,
+    décroissant pour « easiest »), à partir des compteurs pré-calculés.
+    """
+    results = []
+    for doc in get_store().query_question_stats(theme, test, order, min_attempts, limit):
+        attempts = doc.get("attempts", 0)
+        choices = doc.get("choices") or {}
+        results.append({
+            "qid": doc["qid"],
+            "question": doc.get("question"),
+            "theme": doc.get("theme"),
+            "test": doc.get("test"),
+            "attempts": attempts,
+            "correct": doc.get("correct", 0),
+            "success_rate": round(doc.get("success_rate", 0.0), 4),
+            "choices": {c: {"count": n, "rate": round(n / attempts, 4)} for c, n in choices.items()},
+        })
+    return results
+
+
+@on_questions_changed
+def _sync_question_stats(event: str, doc: dict):
+    """Question supprimée : compteurs supprimés ; modifiée : intitulé, thème et test repris."""
+    qid = doc.get("qid")
+    if not qid:
+        return
+    if event == "deleted":
+        question_stats.discard(qid)
+        get_store().delete_question_stats(qid)
+    elif event == "updated":
+        fields = {k: doc[k] for k in ("question", "theme", "test") if doc.get(k) is not None}
+        question_stats.rename(qid, fields)
+        get_store().update_question_stats(qid, fields)
@@ -0,0 +1,59 @@
+"""
+Stockage des questions et sessions de quiz, derrière une interface commune
+
+Backend choisi par `STORAGE_BACKEND` :
+- `mongo` (par défaut) : MongoDB, plusieurs workers et nœuds ;
+- `sqlite` : fichier local `STORAGE_SQLITE_PATH` (ou `:memory:`), sans serveur
+  ni réseau, pour les petites installations, les tests et les benchmarks.
+
+Le stockage est créé au premier appel, une fois par processus (jamais à l'import).
+"""
+import os
+import threading
+
+from ..config import storage_config
+from .base import PartialWriteError, QuestionStore
+
+_store: QuestionStore | None = None
+_store_pid: int | None = None
+_store_lock = threading.Lock()
+
+
+def create_store(backend: str, sqlite_path: str = "data/quiz.db") -> QuestionStore:
+    """Instancie le backend demandé (« mongo » ou « sqlite »)."""
+    if backend == "mongo":
+        from .mongo import MongoStore
+        return MongoStore()
+    if backend == "sqlite":
+        from .sqlite import SQLiteStore
+        return SQLiteStore(sqlite_path)
+    raise ValueError(f"STORAGE_BACKEND inconnu : {backend}")
+
+
+def get_store() -> QuestionStore:
+    """Stockage du processus courant (créé au premier appel)."""
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store_pid != os.getpid():
+                _store = create_store(storage_config["backend"], storage_config["sqlite_path"])
+                _store_pid = os.getpid()
+    return _store
+
+
+def use_store(store: QuestionStore):
+    """Remplace le stockage du processus (benchmarks, scripts)."""
+    global _store, _store_pid
+    with _store_lock:
+        _store = store
+        _store_pid = os.getpid()
+
+
+def close_store():
+    """Ferme le stockage du processus (arrêt de l'application)."""
+    global _store, _store_pid
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
+        _store_pid = None
@@ -0,0 +1,213 @@
+"""
+Interface du stockage des questions, sessions de quiz et données de correction
+
+Les documents échangés sont des dict au format de la collection MongoDB
+d'origine (question, theme, test, choix, correct, qid, ordinal ; sessions avec
+user, created_at, questions...). `_id` est la clé propre au backend : elle ne
+sort jamais de la couche de données, sauf `str(_id)` comme quiz_id.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+
+class PartialWriteError(Exception):
+    """
+    Écriture groupée partiellement réussie : `failed` contient les éléments à réécrire
+    (ceux déjà écrits, ou rejetés définitivement comme doublons, n'y sont pas).
+    """
+
+    def __init__(self, message: str, failed: list):
+        super().__init__(message)
+        self.failed = failed
+
+
+class QuestionStore(ABC):
+    """
+    Opérations de stockage utilisées par l'application (une implémentation par backend) :
+    un backend incomplet ne peut pas être instancié.
+    """
+
+    backend = "abstract"
+
+    # --- Cycle de vie ---
+    @abstractmethod
+    def ping(self, timeout_s: float = 2.0) -> bool:
+        ...
+
+    @abstractmethod
+    def close(self):
+        ...
+
+    @abstractmethod
+    def ensure_indexes(self):
+        """Crée tables et index (idempotent)."""
+
+    # --- Questions ---
+    @abstractmethod
+    def next_ordinals(self, n: int) -> range:
+        """Réserve n ordinaux consécutifs (sûr entre workers)."""
+
+    @abstractmethod
+    def raise_ordinal_counter(self, top: int):
+        """Garantit que le compteur d'ordinaux n'est pas inférieur à top."""
+
+    @abstractmethod
+    def count_questions(self) -> int:
+        ...
+
+    @abstractmethod
+    def count_missing_ids(self) -> int:
+        """Nombre de questions sans qid ou sans ordinal (données antérieures)."""
+
+    @abstractmethod
+    def sample_questions(self, size: int, theme: str | None = None) -> list[dict]:
+        """Échantillon aléatoire d'au plus size questions, thème optionnel."""
+
+    @abstractmethod
+    def distinct(self, field: str, filters: dict | None = None) -> list:
+        """Valeurs distinctes de theme ou test, filtres d'égalité optionnels."""
+
+    @abstractmethod
+    def all_questions(self, limit: int | None = None) -> list[dict]:
+        """Questions complètes (avec _id), au plus limit."""
+
+    @abstractmethod
+    def set_missing(self, field: str, values: dict) -> dict:
+        """
+        Écrit values[_id] dans le champ des questions qui n'en ont pas encore
+        (ordinal, qid). Retourne les valeurs effectivement retenues par _id
+        (un autre worker a pu les attribuer en parallèle).
+        """
+
+    @abstractmethod
+    def find_question(self, qid: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def find_question_by_text(self, text: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def insert_question(self, doc: dict) -> bool:
+        """Insère une question ; False si son qid ou son ordinal existe déjà."""
+
+    @abstractmethod
+    def insert_questions(self, docs: list[dict]) -> list[dict]:
+        """Insère plusieurs questions, ignore les doublons. Retourne celles insérées."""
+
+    @abstractmethod
+    def update_question(self, qid: str, fields: dict) -> dict | None:
+        """Met à jour les champs ; retourne la question modifiée, None si absente."""
+
+    @abstractmethod
+    def delete_question(self, qid: str) -> dict | None:
+        """Supprime une question ; retourne la question supprimée, None si absente."""
+
+    @abstractmethod
+    def delete_questions_by_text(self, text: str) -> list[dict]:
+        ...
+
+    # --- Sessions de quiz ---
+    @abstractmethod
+    def insert_session(self, doc: dict) -> str:
+        """Enregistre une session (renseigne doc["_id"]). Retourne le quiz_id."""
+
+    @abstractmethod
+    def insert_sessions(self, docs: list[dict]) -> list[str]:
+        ...
+
+    @abstractmethod
+    def find_session(self, quiz_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def delete_session(self, quiz_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list_sessions(self, user: str | None = None, limit: int = 50) -> list[dict]:
+        """Sessions complètes, de la plus récente à la plus ancienne."""
+
+    # --- Questions vues par étudiant ---
+    @abstractmethod
+    def load_seen(self, username: str) -> tuple[bytes, int | None]:
+        """Bitset des questions vues et sa version (None si jamais enregistré)."""
+
+    @abstractmethod
+    def save_seen(self, username: str, bits: bytes, version: int | None) -> bool:
+        """Écrit le bitset si sa version n'a pas changé depuis la lecture (écriture optimiste)."""
+
+    # --- Journal des tentatives et statistiques par question ---
+    @abstractmethod
+    def insert_attempts(self, docs: list[dict]):
+        """Ajoute des tentatives ; PartialWriteError si seule une partie a été écrite."""
+
+    @abstractmethod
+    def increment_question_stats(self, rows: list[dict]):
+        """
+        Ajoute des compteurs par question : {"qid", "question", "attempts", "correct",
+        "choices": {choix: n}, "theme", "test"} (theme/test None : inchangés).
+        PartialWriteError si seule une partie des lignes a été appliquée.
+        """
+
+    @abstractmethod
+    def query_question_stats(self, theme: str | None, test: str | None, order: str,
+                             min_attempts: int, limit: int) -> list[dict]:
+        """Compteurs triés par taux de réussite (croissant pour « hardest »), avec success_rate."""
+
+    @abstractmethod
+    def update_question_stats(self, qid: str, fields: dict):
+        """Reprend l'intitulé, le thème ou le test d'une question modifiée."""
+
+    @abstractmethod
+    def delete_question_stats(self, qid: str):
+        ...
+
+    # --- Modèle de réponse (IRT) et sessions adaptatives ---
+    @abstractmethod
+    def attempt_outcomes(self):
+        """
+        Itère sur les tentatives journalisées : (utilisateur, qid, question, correct) ;
+        qid None pour les tentatives antérieures à son enregistrement.
+        """
+
+    @abstractmethod
+    def save_item_params(self, rows: list[dict]):
+        """Remplace les paramètres IRT des questions : {"qid", "a", "b", "n", "fitted_at"}."""
+
+    @abstractmethod
+    def load_item_params(self) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def insert_adaptive_session(self, doc: dict) -> str:
+        """Enregistre une session adaptative (renseigne doc["_id"], version 1)."""
+
+    @abstractmethod
+    def find_adaptive_session(self, session_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def update_adaptive_session(self, session_id: str, version: int, fields: dict) -> bool:
+        """Met à jour la session si sa version n'a pas changé (écriture optimiste)."""
+
+    # --- Journal des modifications de la banque ---
+    @abstractmethod
+    def append_question_changes(self, entries: list[dict]) -> list[int]:
+        """Ajoute des entrées {"op", "qid", "question", "at"} ; retourne leurs numéros (croissants)."""
+
+    @abstractmethod
+    def question_changes_since(self, seq: int, limit: int) -> list[dict]:
+        """Au plus limit entrées de numéro supérieur à seq, par numéro croissant (avec "seq")."""
+
+    @abstractmethod
+    def question_changes_bounds(self) -> tuple[int, int]:
+        """(plancher, dernier numéro attribué) : les entrées jusqu'au plancher ont pu être supprimées."""
+
+    @abstractmethod
+    def compact_question_changes(self, floor: int, settled_before: datetime | None = None) -> int:
+        """
+        Supprime les entrées jusqu'à floor (relève le plancher) et, parmi celles écrites
+        avant settled_before, celles remplacées par une entrée plus récente de la même
+        question. Retourne le nombre d'entrées supprimées.
+        """
@@ -0,0 +1,502 @@
+"""
+Stockage SQLite : questions et sessions dans un fichier local (ou en mémoire)
+
+Pour les petites installations mono-nœud, les tests et les benchmarks : aucun
+serveur ni réseau. Chaque document est conservé en JSON (colonne `doc`) ; les
+champs interrogés (qid, ordinal, question, theme, test, user, created_at) sont
+recopiés dans des colonnes indexées. Une seule connexion par processus, protégée
+par un verrou ; en fichier, le mode WAL laisse les lectures d'autres processus
+se poursuivre pendant une écriture.
+
+`STORAGE_SQLITE_PATH=:memory:` : base en mémoire, perdue à l'arrêt.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from ..config import adaptive_config
+from .base import QuestionStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    qid TEXT UNIQUE,
+    ordinal INTEGER UNIQUE,
+    question TEXT NOT NULL,
+    theme TEXT,
+    test TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_theme ON questions (theme, test);
+CREATE INDEX IF NOT EXISTS questions_test ON questions (test, theme);
+CREATE INDEX IF NOT EXISTS questions_question ON questions (question);
+
+CREATE TABLE IF NOT EXISTS quiz_sessions (
+    id TEXT PRIMARY KEY,
+    user TEXT,
+    created_at TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quiz_sessions_created ON quiz_sessions (created_at);
+CREATE INDEX IF NOT EXISTS quiz_sessions_user ON quiz_sessions (user, created_at);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS student_seen (
+    username TEXT PRIMARY KEY,
+    bits BLOB NOT NULL,
+    v INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    user TEXT,
+    quiz_id TEXT,
+    at TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_user ON attempts (user, at);
+CREATE INDEX IF NOT EXISTS attempts_quiz ON attempts (quiz_id, at);
+
+CREATE TABLE IF NOT EXISTS question_stats (
+    qid TEXT PRIMARY KEY,
+    question TEXT,
+    theme TEXT,
+    test TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    choices TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS question_stats_theme ON question_stats (theme, test);
+
+CREATE TABLE IF NOT EXISTS item_params (
+    qid TEXT PRIMARY KEY,
+    a REAL NOT NULL,
+    b REAL NOT NULL,
+    n INTEGER NOT NULL,
+    fitted_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS adaptive_sessions (
+    id TEXT PRIMARY KEY,
+    user TEXT,
+    created_at TEXT NOT NULL,
+    v INTEGER NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS adaptive_sessions_created ON adaptive_sessions (created_at);
+
+CREATE TABLE IF NOT EXISTS question_changes (
+    seq INTEGER PRIMARY KEY,
+    op TEXT NOT NULL,
+    qid TEXT,
+    at TEXT NOT NULL,
+    doc TEXT
+);
+CREATE INDEX IF NOT EXISTS question_changes_qid ON question_changes (qid, seq);
+"""
+
+# Champs d'une question recopiés dans des colonnes (filtres, unicité)
+_COLUMNS = ("qid", "ordinal", "question", "theme", "test")
+_DISTINCT_FIELDS = ("theme", "test")
+
+
+def _dumps(doc: dict) -> str:
+    return json.dumps({k: v for k, v in doc.items() if k != "_id"}, ensure_ascii=False, separators=(",", ":"))
+
+
+def _question(row) -> dict:
+    doc = json.loads(row["doc"])
+    doc["_id"] = row["id"]
+    return doc
+
+
+def _session(row) -> dict:
+    doc = json.loads(row["doc"])
+    doc["_id"] = row["id"]
+    doc["created_at"] = datetime.fromisoformat(row["created_at"])
+    return doc
+
+
+class SQLiteStore(QuestionStore):
+    """Implémentation SQLite (fichier local ou « :memory: »)."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = "data/quiz.db"):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Autocommit : les écritures de plusieurs requêtes passent par des transactions explicites
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+            conn.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            # Compteurs indexés autrefois par intitulé : table mise de côté, recréée par qid
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(question_stats)")}
+            if columns and "qid" not in columns:
+                conn.execute("ALTER TABLE question_stats RENAME TO question_stats_by_text")
+                conn.execute("DROP INDEX IF EXISTS question_stats_theme")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _write(self, fn):
+        """Exécute fn(conn) dans une transaction (verrou d'écriture pris immédiatement)."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    # --- Cycle de vie ---
+    def ping(self, timeout_s: float = 2.0) -> bool:
+        try:
+            self._query("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+
+    def ensure_indexes(self):
+        self._connect()
+
+    # --- Questions ---
+    def next_ordinals(self, n: int) -> range:
+        def reserve(conn):
+            conn.execute("INSERT OR IGNORE INTO counters (name, seq) VALUES ('question_ordinal', 0)")
+            conn.execute("UPDATE counters SET seq = seq + ? WHERE name = 'question_ordinal'", (int(n),))
+            return conn.execute("SELECT seq FROM counters WHERE name = 'question_ordinal'").fetchone()[0]
+        end = int(self._write(reserve))
+        return range(end - n + 1, end + 1)
+
+    def raise_ordinal_counter(self, top: int):
+        self._write(lambda conn: conn.execute(
+            "INSERT INTO counters (name, seq) VALUES ('question_ordinal', ?) "
+            "ON CONFLICT (name) DO UPDATE SET seq = max(seq, excluded.seq)", (int(top),)))
+
+    def count_questions(self) -> int:
+        return self._query("SELECT count(*) FROM questions")[0][0]
+
+    def count_missing_ids(self) -> int:
+        return self._query("SELECT count(*) FROM questions WHERE qid IS NULL OR ordinal IS NULL")[0][0]
+
+    def sample_questions(self, size: int, theme: str | None = None) -> list[dict]:
+        if theme:
+            rows = self._query("SELECT id, doc FROM questions WHERE theme = ? ORDER BY random() LIMIT ?",
+                               (theme, int(size)))
+        else:
+            rows = self._query("SELECT id, doc FROM questions ORDER BY random() LIMIT ?", (int(size),))
+        return [_question(row) for row in rows]
+
+    def distinct(self, field: str, filters: dict | None = None) -> list:
+        if field not in _DISTINCT_FIELDS:
+            raise ValueError(f"Champ non indexé : {field}")
+        filters = {k: v for k, v in (filters or {}).items() if k in _DISTINCT_FIELDS}
+        where = " AND ".join(f"{k} = ?" for k in filters)
+        sql = f"SELECT DISTINCT {field} FROM questions" + (f" WHERE {where}" if where else "")
+        return [row[0] for row in self._query(sql, tuple(filters.values()))]
+
+    def all_questions(self, limit: int | None = None) -> list[dict]:
+        if limit is None:
+            rows = self._query("SELECT id, doc FROM questions ORDER BY id")
+        else:
+            rows = self._query("SELECT id, doc FROM questions ORDER BY id LIMIT ?", (int(limit),))
+        return [_question(row) for row in rows]
+
+    def set_missing(self, field: str, values: dict) -> dict:
+        if field not in ("qid", "ordinal"):
+            raise ValueError(f"Champ non modifiable : {field}")
+
+        def assign(conn):
+            for _id, value in values.items():
+                try:
+                    conn.execute(
+                        f"UPDATE questions SET {field} = ?, doc = json_set(doc, '$.{field}', ?) "
+                        f"WHERE id = ? AND {field} IS NULL", (value, value, _id))
+                except sqlite3.IntegrityError:
+                    pass  # valeur déjà prise : la question garde son champ vide
+            placeholders = ",".join("?" * len(values))
+            return {row[0]: row[1] for row in conn.execute(
+                f"SELECT id, {field} FROM questions WHERE id IN ({placeholders})", tuple(values))}
+
+        actual = self._write(assign) if values else {}
+        return {_id: actual.get(_id) if actual.get(_id) is not None else value for _id, value in values.items()}
+
+    def find_question(self, qid: str) -> dict | None:
+        rows = self._query("SELECT id, doc FROM questions WHERE qid = ?", (qid,))
+        return _question(rows[0]) if rows else None
+
+    def find_question_by_text(self, text: str) -> dict | None:
+        rows = self._query("SELECT id, doc FROM questions WHERE question = ? LIMIT 1", (text,))
+        return _question(rows[0]) if rows else None
+
+    @staticmethod
+    def _insert_question(conn, doc: dict) -> bool:
+        try:
+            cur = conn.execute(
+                "INSERT INTO questions (qid, ordinal, question, theme, test, doc) VALUES (?, ?, ?, ?, ?, ?)",
+                (*(doc.get(k) for k in _COLUMNS), _dumps(doc)))
+        except sqlite3.IntegrityError:
+            return False
+        doc["_id"] = cur.lastrowid
+        return True
+
+    def insert_question(self, doc: dict) -> bool:
+        return self._write(lambda conn: self._insert_question(conn, doc))
+
+    def insert_questions(self, docs: list[dict]) -> list[dict]:
+        return self._write(lambda conn: [doc for doc in docs if self._insert_question(conn, doc)])
+
+    def update_question(self, qid: str, fields: dict) -> dict | None:
+        def update(conn):
+            row = conn.execute("SELECT id, doc FROM questions WHERE qid = ?", (qid,)).fetchone()
+            if row is None:
+                return None
+            doc = {**_question(row), **fields}
+            conn.execute("UPDATE questions SET question = ?, theme = ?, test = ?, doc = ? WHERE id = ?",
+                         (doc.get("question"), doc.get("theme"), doc.get("test"), _dumps(doc), doc["_id"]))
+            return doc
+        return self._write(update)
+
+    def delete_question(self, qid: str) -> dict | None:
+        def delete(conn):
+            row = conn.execute("SELECT id, doc FROM questions WHERE qid = ?", (qid,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM questions WHERE id = ?", (row["id"],))
+            return _question(row)
+        return self._write(delete)
+
+    def delete_questions_by_text(self, text: str) -> list[dict]:
+        def delete(conn):
+            rows = conn.execute("SELECT id, doc FROM questions WHERE question = ?", (text,)).fetchall()
+            conn.execute("DELETE FROM questions WHERE question = ?", (text,))
+            return [_question(row) for row in rows]
+        return self._write(delete)
+
+    # --- Sessions de quiz ---
+    @staticmethod
+    def _insert_session(conn, doc: dict) -> str:
+        # Identifiant au format ObjectId : même forme de quiz_id qu'avec MongoDB
+        doc["_id"] = str(ObjectId())
+        record = {k: v for k, v in doc.items() if k != "created_at"}
+        conn.execute("INSERT INTO quiz_sessions (id, user, created_at, doc) VALUES (?, ?, ?, ?)",
+                     (doc["_id"], doc.get("user"), doc["created_at"].isoformat(), _dumps(record)))
+        return doc["_id"]
+
+    def insert_session(self, doc: dict) -> str:
+        return self._write(lambda conn: self._insert_session(conn, doc))
+
+    def insert_sessions(self, docs: list[dict]) -> list[str]:
+        return self._write(lambda conn: [self._insert_session(conn, doc) for doc in docs])
+
+    def find_session(self, quiz_id: str) -> dict | None:
+        rows = self._query("SELECT id, created_at, doc FROM quiz_sessions WHERE id = ?", (quiz_id,))
+        return _session(rows[0]) if rows else None
+
+    def delete_session(self, quiz_id: str) -> bool:
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM quiz_sessions WHERE id = ?", (quiz_id,)).rowcount > 0)
+
+    def list_sessions(self, user: str | None = None, limit: int = 50) -> list[dict]:
+        if user:
+            rows = self._query("SELECT id, created_at, doc FROM quiz_sessions WHERE user = ? "
+                               "ORDER BY created_at DESC LIMIT ?", (user, int(limit)))
+        else:
+            rows = self._query("SELECT id, created_at, doc FROM quiz_sessions ORDER BY created_at DESC LIMIT ?",
+                               (int(limit),))
+        return [_session(row) for row in rows]
+
+    # --- Questions vues par étudiant ---
+    def load_seen(self, username: str) -> tuple[bytes, int | None]:
+        rows = self._query("SELECT bits, v FROM student_seen WHERE username = ?", (username,))
+        return (bytes(rows[0]["bits"]), rows[0]["v"]) if rows else (b"", None)
+
+    def save_seen(self, username: str, bits: bytes, version: int | None) -> bool:
+        if version is None:
+            sql, params = ("INSERT OR IGNORE INTO student_seen (username, bits, v) VALUES (?, ?, 1)",
+                           (username, bytes(bits)))
+        else:
+            sql, params = ("UPDATE student_seen SET bits = ?, v = v + 1 WHERE username = ? AND v = ?",
+                           (bytes(bits), username, version))
+        return self._write(lambda conn: conn.execute(sql, params).rowcount > 0)
+
+    # --- Journal des tentatives et statistiques par question ---
+    def insert_attempts(self, docs: list[dict]):
+        rows = [(d.get("user"), d.get("quiz_id"), d["at"].isoformat(),
+                 _dumps({k: v for k, v in d.items() if k != "at"})) for d in docs]
+        self._write(lambda conn: conn.executemany(
+            "INSERT INTO attempts (user, quiz_id, at, doc) VALUES (?, ?, ?, ?)", rows))
+
+    def increment_question_stats(self, rows: list[dict]):
+        def increment(conn):
+            for row in rows:
+                current = conn.execute("SELECT choices FROM question_stats WHERE qid = ?",
+                                       (row["qid"],)).fetchone()
+                choices = json.loads(current["choices"]) if current else {}
+                for choice, n in row["choices"].items():
+                    choices[choice] = choices.get(choice, 0) + n
+                conn.execute(
+                    "INSERT INTO question_stats (qid, question, theme, test, attempts, correct, choices) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (qid) DO UPDATE SET "
+                    "attempts = attempts + excluded.attempts, correct = correct + excluded.correct, "
+                    "choices = excluded.choices, question = coalesce(excluded.question, question), "
+                    "theme = coalesce(excluded.theme, theme), test = coalesce(excluded.test, test)",
+                    (row["qid"], row.get("question"), row.get("theme"), row.get("test"), row["attempts"], row["correct"],
+                     json.dumps(choices, ensure_ascii=False)))
+        self._write(increment)
+
+    def query_question_stats(self, theme: str | None, test: str | None, order: str,
+                             min_attempts: int, limit: int) -> list[dict]:
+        where, params = ["attempts >= ?"], [max(1, min_attempts)]
+        if theme:
+            where.append("theme = ?")
+            params.append(theme)
+        if test:
+            where.append("test = ?")
+            params.append(test)
+        direction = "ASC" if order == "hardest" else "DESC"
+        rows = self._query(
+            "SELECT qid, question, theme, test, attempts, correct, choices, "
+            "CAST(correct AS REAL) / attempts AS success_rate FROM question_stats "
+            f"WHERE {' AND '.join(where)} ORDER BY success_rate {direction}, attempts DESC LIMIT ?",
+            (*params, int(limit)))
+        return [{**dict(row), "choices": json.loads(row["choices"])} for row in rows]
+
+    def update_question_stats(self, qid: str, fields: dict):
+        fields = {k: v for k, v in fields.items() if k in ("question", "theme", "test")}
+        if fields:
+            assignments = ", ".join(f"{k} = ?" for k in fields)
+            self._write(lambda conn: conn.execute(f"UPDATE question_stats SET {assignments} WHERE qid = ?",
+                                                  (*fields.values(), qid)))
+
+    def delete_question_stats(self, qid: str):
+        self._write(lambda conn: conn.execute("DELETE FROM question_stats WHERE qid = ?", (qid,)))
+
+    # --- Modèle de réponse (IRT) et sessions adaptatives ---
+    def attempt_outcomes(self):
+        rows = self._query("SELECT user, json_extract(doc, '$.qid'), json_extract(doc, '$.question'), "
+                           "json_extract(doc, '$.correct') FROM attempts")
+        for user, qid, question, correct in rows:
+            yield user, qid, question, bool(correct)
+
+    def save_item_params(self, rows: list[dict]):
+        def replace(conn):
+            conn.execute("DELETE FROM item_params")
+            conn.executemany("INSERT INTO item_params (qid, a, b, n, fitted_at) VALUES (?, ?, ?, ?, ?)",
+                             [(r["qid"], r["a"], r["b"], r["n"], r.get("fitted_at")) for r in rows])
+        self._write(replace)
+
+    def load_item_params(self) -> list[dict]:
+        return [dict(row) for row in self._query("SELECT qid, a, b, n, fitted_at FROM item_params")]
+
+    def insert_adaptive_session(self, doc: dict) -> str:
+        doc["_id"] = str(ObjectId())
+        doc["v"] = 1
+        record = {k: v for k, v in doc.items() if k not in ("created_at", "v")}
+        # Pas d'index TTL : les sessions expirées sont purgées à chaque création
+        expired = (doc["created_at"] - timedelta(seconds=adaptive_config["session_ttl_s"])).isoformat()
+
+        def insert(conn):
+            conn.execute("DELETE FROM adaptive_sessions WHERE created_at < ?", (expired,))
+            conn.execute("INSERT INTO adaptive_sessions (id, user, created_at, v, doc) VALUES (?, ?, ?, 1, ?)",
+                         (doc["_id"], doc.get("user"), doc["created_at"].isoformat(), _dumps(record)))
+        self._write(insert)
+        return doc["_id"]
+
+    def find_adaptive_session(self, session_id: str) -> dict | None:
+        rows = self._query("SELECT id, created_at, v, doc FROM adaptive_sessions WHERE id = ?", (session_id,))
+        if not rows:
+            return None
+        doc = _session(rows[0])
+        doc["v"] = rows[0]["v"]
+        return doc
+
+    def update_adaptive_session(self, session_id: str, version: int, fields: dict) -> bool:
+        def update(conn):
+            row = conn.execute("SELECT doc FROM adaptive_sessions WHERE id = ? AND v = ?",
+                               (session_id, version)).fetchone()
+            if row is None:
+                return False
+            doc = {**json.loads(row["doc"]), **fields}
+            conn.execute("UPDATE adaptive_sessions SET doc = ?, v = v + 1 WHERE id = ?", (_dumps(doc), session_id))
+            return True
+        return self._write(update)
+
+    # --- Journal des modifications de la banque ---
+    def append_question_changes(self, entries: list[dict]) -> list[int]:
+        if not entries:
+            return []
+
+        def append(conn):
+            # Numéros attribués dans la même transaction que l'insertion : jamais de trou visible
+            conn.execute("INSERT OR IGNORE INTO counters (name, seq) VALUES ('question_change', 0)")
+            conn.execute("UPDATE counters SET seq = seq + ? WHERE name = 'question_change'", (len(entries),))
+            end = conn.execute("SELECT seq FROM counters WHERE name = 'question_change'").fetchone()[0]
+            seqs = list(range(end - len(entries) + 1, end + 1))
+            conn.executemany(
+                "INSERT INTO question_changes (seq, op, qid, at, doc) VALUES (?, ?, ?, ?, ?)",
+                [(seq, e["op"], e.get("qid"), e["at"].isoformat(),
+                  json.dumps(e["question"], ensure_ascii=False) if e.get("question") is not None else None)
+                 for seq, e in zip(seqs, entries)],
+            )
+            return seqs
+        return self._write(append)
+
+    def question_changes_since(self, seq: int, limit: int) -> list[dict]:
+        rows = self._query("SELECT seq, op, qid, at, doc FROM question_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                           (int(seq), int(limit)))
+        return [{
+            "seq": row["seq"],
+            "op": row["op"],
+            "qid": row["qid"],
+            "at": datetime.fromisoformat(row["at"]),
+            "question": json.loads(row["doc"]) if row["doc"] is not None else None,
+        } for row in rows]
+
+    def question_changes_bounds(self) -> tuple[int, int]:
+        counters = {row["name"]: row["seq"] for row in self._query(
+            "SELECT name, seq FROM counters WHERE name IN ('question_change', 'question_change_floor')")}
+        return counters.get("question_change_floor", 0), counters.get("question_change", 0)
+
+    def compact_question_changes(self, floor: int, settled_before: datetime | None = None) -> int:
+        def compact(conn):
+            conn.execute("INSERT INTO counters (name, seq) VALUES ('question_change_floor', ?) "
+                         "ON CONFLICT (name) DO UPDATE SET seq = max(seq, excluded.seq)", (int(floor),))
+            removed = conn.execute("DELETE FROM question_changes WHERE seq <= ?", (int(floor),)).rowcount
+            # Seule la dernière entrée de chaque question compte pour un client en retard
+            removed += conn.execute(
+                "DELETE FROM question_changes WHERE qid IS NOT NULL AND at < ? AND seq < "
+                "(SELECT MAX(c.seq) FROM question_changes c WHERE c.qid = question_changes.qid)",
+                ((settled_before or datetime.max).isoformat(),)
+            ).rowcount
+            return removed
+        return self._write(compact)
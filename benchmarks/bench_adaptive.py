@@ -0,0 +1,82 @@
+# ============================================================
+# bench_adaptive.py - Quiz adaptatif : estimation du niveau et choix de la question
+# ============================================================
+# Usage (depuis la racine du repo, sans MongoDB ni réseau) :
+#   python -m benchmarks.bench_adaptive [--bank 100000] [--runs 500] [--items 20]
+#
+# Banque synthétique en mémoire avec paramètres 2PL aléatoires : mesure une étape
+# de session (EAP sur les réponses + sélection de la question la plus informative,
+# vectorisées ; masque des questions disponibles gardé d'une étape à l'autre)
+# puis l'ajustement hors ligne sur des réponses simulées.
+# ============================================================
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from app.adaptive import AdaptiveEngine, ItemArrays, fit_2pl
+from app.generator import QuestionBank
+
+THEMES = ["BDD", "Python", "Docker", "Machine Learning", "Streamlit", "Automation"]
+TESTS = ["Test de positionnement", "Test de validation", "Total Bootcamp"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bank", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--items", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    bank = QuestionBank([{
+        "_id": i, "ordinal": i + 1, "qid": f"q{i}", "question": f"Question {i}",
+        "theme": THEMES[i % len(THEMES)], "test": TESTS[(i // len(THEMES)) % len(TESTS)],
+        "choix": ["A", "B", "C", "D"], "correct": ["A"],
+    } for i in range(args.bank)])
+    params = {f"q{i}": (rng.uniform(0.5, 2.5), rng.gauss(0, 1)) for i in range(args.bank)}
+    t0 = time.perf_counter()
+    arrays = ItemArrays(bank, params)
+    print(f"tableaux pré-calculés ({args.bank} questions) : {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    engine = AdaptiveEngine()
+    eligible = arrays.eligible(None, None)
+    seen = bytearray(rng.randbytes(args.bank // 8 // 2))  # la moitié basse de la banque partiellement vue
+    timings = []
+    for run in range(args.runs):
+        true_theta = rng.gauss(0, 1)
+        responses, asked = [], set()
+        theta = 0.0
+        for _ in range(args.items):
+            t0 = time.perf_counter()
+            ordinal = engine.select(arrays, theta, eligible, asked, seen, rng, session=f"s{run}")
+            pos = arrays.position[ordinal]
+            a, b = float(arrays.a[pos]), float(arrays.b[pos])
+            asked.add(ordinal)
+            responses.append((a, b, rng.random() < 1 / (1 + np.exp(-a * (true_theta - b)))))
+            theta, _ = engine.estimate(responses)
+            timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    print(f"étape de session              médiane {statistics.median(timings):.3f} ms   "
+          f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+    # Ajustement : 2000 étudiants x 40 réponses sur 2000 questions
+    n_users, n_items, per_user = 2000, 2000, 40
+    a_true = np.random.default_rng(0).uniform(0.5, 2.0, n_items)
+    b_true = np.random.default_rng(1).normal(0, 1, n_items)
+    theta_true = np.random.default_rng(2).normal(0, 1, n_users)
+    users = np.repeat(np.arange(n_users), per_user)
+    items = np.random.default_rng(3).integers(0, n_items, len(users))
+    p = 1 / (1 + np.exp(-a_true[items] * (theta_true[users] - b_true[items])))
+    y = (np.random.default_rng(4).random(len(users)) < p).astype(float)
+    t0 = time.perf_counter()
+    _, b_fit, _ = fit_2pl(users, items, y, n_users, n_items)
+    print(f"ajustement ({len(y)} réponses)   {(time.perf_counter() - t0) * 1000:.1f} ms   "
+          f"corrélation b {np.corrcoef(b_fit, b_true)[0, 1]:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# ============================================================
+# bench_dedup.py - Quasi-doublons (MinHash / LSH)
+# ============================================================
+# Usage (depuis la racine du repo, sans MongoDB) :
+#   python -m benchmarks.bench_dedup [--bank 100000] [--copies 1000] [--runs 500]
+#
+# Banque synthétique (vocabulaire de 5000 mots, fréquences de Zipf) dans
+# laquelle --copies questions sont recopiées avec une reformulation légère
+# (un mot changé, ponctuation, casse, accents). Mesure le calcul des
+# signatures, l'indexation, une requête d'insertion (POST /questions) et le
+# rapport complet des groupes, ainsi que le rappel sur les copies injectées.
+# ============================================================
+
+import argparse
+import random
+import statistics
+import time
+
+from app.config import dedup_config
+from app.dedup import MinHashLSH, signature, similarity, np
+
+OPENINGS = ["Quelle est", "Quel est", "Comment", "Pourquoi", "Que permet", "Laquelle de ces"]
+
+
+def make_vocabulary(rng: random.Random, size: int = 5000) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyzéèàç"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def make_question(rng: random.Random, vocab: list[str], weights: list[float]) -> str:
+    return f"{rng.choice(OPENINGS)} " + " ".join(rng.choices(vocab, weights, k=rng.randint(6, 14))) + " ?"
+
+
+def reword(rng: random.Random, text: str, vocab: list[str]) -> str:
+    words = text.rstrip(" ?").split()
+    words[rng.randrange(1, len(words))] = rng.choice(vocab)
+    text = " ".join(words)
+    return rng.choice([text.upper(), text + " :", text.replace("e", "é"), text + " ?"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bank", type=int, default=100_000)
+    parser.add_argument("--copies", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=dedup_config["threshold"])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocab = make_vocabulary(rng)
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    texts = [make_question(rng, vocab, weights) for _ in range(args.bank)]
+    originals = rng.sample(range(args.bank), args.copies)
+    copies = [reword(rng, texts[i], vocab) for i in originals]
+
+    t0 = time.perf_counter()
+    sigs = [signature(t) for t in texts + copies]
+    t_sig = time.perf_counter() - t0
+    index = MinHashLSH()
+    t0 = time.perf_counter()
+    for key, sig in enumerate(sigs[:args.bank]):
+        index.add(key, sig)
+    t_add = time.perf_counter() - t0
+    print(f"banque={args.bank} numpy={'oui' if np is not None else 'non'}")
+    print(f"signatures {t_sig / len(sigs) * 1e6:.1f} µs/question, indexation {t_add:.2f} s")
+
+    timings, found = [], 0
+    for i, original in enumerate(originals):
+        sig = sigs[args.bank + i]
+        t0 = time.perf_counter()
+        matches = index.query(sig, args.threshold)
+        timings.append((time.perf_counter() - t0) * 1000)
+        found += any(key == original for key, _ in matches)
+    true_sims = [similarity(sigs[o], sigs[args.bank + i]) for i, o in enumerate(originals)]
+    timings.sort()
+    print(f"requête    médiane {statistics.median(timings):.3f} ms   p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+    print(f"rappel     {found}/{args.copies} copies retrouvées "
+          f"({sum(s >= args.threshold for s in true_sims)} au-dessus du seuil en similarité estimée)")
+
+    for i in range(args.copies):
+        index.add(args.bank + i, sigs[args.bank + i])
+    t0 = time.perf_counter()
+    clusters = index.clusters(args.threshold)
+    print(f"rapport    {time.perf_counter() - t0:.2f} s, {len(clusters)} groupes")
+
+
+if __name__ == "__main__":
+    main()
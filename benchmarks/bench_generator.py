@@ -0,0 +1,67 @@
+# ============================================================
+# bench_generator.py - Génération stratifiée sans répétition
+# ============================================================
+# Usage (depuis la racine du repo, sans MongoDB) :
+#   python -m benchmarks.bench_generator [--bank 100000] [--seen 0.6] [--runs 2000]
+#
+# Construit une banque synthétique en mémoire et un historique étudiant
+# (fraction --seen des questions déjà vues), puis mesure la génération
+# d'un quiz de 50 questions réparti sur plusieurs thèmes/tests.
+# ============================================================
+
+import argparse
+import random
+import statistics
+import time
+
+from app.generator import QuestionBank, generate, mark_seen
+
+THEMES = ["BDD", "Python", "Docker", "Machine Learning", "Streamlit", "Automation"]
+TESTS = ["Test de positionnement", "Test de validation", "Total Bootcamp"]
+
+
+def build_bank(size: int) -> QuestionBank:
+    docs = []
+    for i in range(size):
+        docs.append({
+            "ordinal": i + 1,
+            "question": f"Question {i}",
+            "theme": THEMES[i % len(THEMES)],
+            "test": TESTS[(i // len(THEMES)) % len(TESTS)],
+            "choix": ["A", "B", "C", "D"],
+            "correct": ["A"],
+        })
+    return QuestionBank(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bank", type=int, default=100_000)
+    parser.add_argument("--seen", type=float, default=0.6)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    bank = build_bank(args.bank)
+    rng = random.Random(42)
+    seen = mark_seen(bytearray(), [o for o in bank.all if rng.random() < args.seen])
+    quotas = [
+        {"theme": "BDD", "count": 20},
+        {"theme": "Python", "count": 15},
+        {"theme": "Docker", "test": "Test de validation", "count": 10},
+        {"count": 5},
+    ]
+
+    timings = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        quiz = generate(bank, quotas, seen, rng)
+        timings.append((time.perf_counter() - t0) * 1000)
+    assert len(quiz) == 50
+
+    timings.sort()
+    print(f"banque={args.bank} vues={args.seen:.0%} bitset={len(seen)} octets")
+    print(f"médiane {statistics.median(timings):.3f} ms   p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
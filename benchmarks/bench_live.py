@@ -0,0 +1,87 @@
+# ============================================================
+# bench_live.py - Diffusion d'un quiz en direct à N connexions
+# ============================================================
+# Usage (depuis la racine du repo, sans MongoDB) :
+#   python -m benchmarks.bench_live [--clients 2000] [--rounds 20] [--slow 20]
+#
+# Simule, dans une seule boucle asyncio (un worker), N connexions abonnées
+# au hub (app/live.py) : chaque client consomme sa file comme la route
+# WebSocket (un await d'envoi par message). Mesure, pour chaque question
+# poussée, le temps de publish() et la latence jusqu'à réception par le
+# dernier client. Les clients « lents » ne lisent jamais leur file et doivent
+# être déconnectés sans ralentir les autres.
+# ============================================================
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.live import LiveHub
+
+
+def pct(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(clients: int, rounds: int, slow: int, queue_size: int):
+    hub = LiveHub(queue_size=queue_size, max_subscribers=clients + slow)
+    state = {"sent_at": 0.0}
+    received: list[list[float]] = [[] for _ in range(rounds)]
+
+    async def client():
+        sub = hub.subscribe("bench")
+        async for message in sub.messages():
+            # Équivalent d'un websocket.send_text : rend la main à la boucle
+            await asyncio.sleep(0)
+            index = int(message.text.split('"index":', 1)[1].split(",", 1)[0])
+            received[index].append(time.perf_counter() - state["sent_at"])
+
+    async def slow_client():
+        hub.subscribe("bench")
+        await asyncio.sleep(3600)
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    tasks += [asyncio.create_task(slow_client()) for _ in range(slow)]
+    await asyncio.sleep(0.1)
+
+    publish_ms, last_ms, p50_ms = [], [], []
+    dropped = 0
+    for i in range(rounds):
+        message = {"type": "question", "index": i, "total": rounds,
+                   "question": {"question": f"Question n°{i} ?", "choix": ["A", "B", "C", "D"]}}
+        state["sent_at"] = time.perf_counter()
+        result = hub.publish("bench", message, i)
+        publish_ms.append((time.perf_counter() - state["sent_at"]) * 1000)
+        dropped += result["dropped"]
+        while len(received[i]) < clients:
+            await asyncio.sleep(0.001)
+        last_ms.append(max(received[i]) * 1000)
+        p50_ms.append(statistics.median(received[i]) * 1000)
+        await asyncio.sleep(0.05)
+
+    hub.close("bench")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"{clients} clients (+{slow} lents, file de {queue_size}), {rounds} questions")
+    print(f"  publish()            médiane {statistics.median(publish_ms):7.2f} ms   p99 {pct(publish_ms, 0.99):7.2f} ms")
+    print(f"  réception (médiane)  médiane {statistics.median(p50_ms):7.2f} ms")
+    print(f"  réception (dernier)  médiane {statistics.median(last_ms):7.2f} ms   max {max(last_ms):7.2f} ms")
+    print(f"  clients lents déconnectés : {dropped}/{slow}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=20)
+    parser.add_argument("--queue-size", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.rounds, args.slow, args.queue_size))
+
+
+if __name__ == "__main__":
+    main()
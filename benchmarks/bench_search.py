@@ -0,0 +1,80 @@
+# ============================================================
+# bench_search.py - Recherche plein texte (index inversé, BM25)
+# ============================================================
+# Usage (depuis la racine du repo, sans MongoDB) :
+#   python -m benchmarks.bench_search [--bank 100000] [--runs 300]
+#
+# Construit un index sur une banque synthétique (vocabulaire technique
+# français, fréquences de Zipf) puis mesure la recherche et l'autocomplétion
+# sur des requêtes mêlant termes rares et termes très fréquents.
+# ============================================================
+
+import argparse
+import random
+import statistics
+import time
+
+from app.search import SearchIndex
+
+WORDS = """
+requête index jointure table clé primaire étrangère conteneur image volume réseau port
+déploiement pipeline modèle entraînement régression classification variable fonction boucle
+liste dictionnaire exception décorateur générateur transaction agrégation collection document
+schéma normalisation cluster réplication partition sauvegarde restauration performance cache
+mémoire processus thread asynchrone tâche planification tableau graphique interface composant
+""".split()
+THEMES = ["BDD", "Python", "Docker", "Machine Learning", "Streamlit", "Automation"]
+QUERIES = ["index", "jointure externe", "réseau docker", "clé étrangère table", "exceptions python",
+           "régression", "transaction mongodb réplication", "générateurs asynchrones"]
+PREFIXES = ["ind", "join", "rés", "dé", "tr", "cl"]
+
+
+def build_docs(size: int, rng: random.Random) -> dict[int, dict]:
+    weights = [1 / (i + 1) for i in range(len(WORDS))]
+    docs = {}
+    for i in range(size):
+        words = rng.choices(WORDS, weights, k=rng.randint(6, 14)) + [f"terme{rng.randrange(size)}"]
+        docs[i + 1] = {
+            "question": "Quelle est la " + " ".join(words) + " ?",
+            "theme": THEMES[i % len(THEMES)],
+            "test": "Test de validation",
+            "choix": [" ".join(rng.choices(WORDS, weights, k=3)) for _ in range(4)],
+            "correct": [],
+        }
+    return docs
+
+
+def timed(fn, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bank", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    docs = build_docs(args.bank, rng)
+    index = SearchIndex()
+    t0 = time.perf_counter()
+    index.build(docs)
+    print(f"banque={args.bank} construction {time.perf_counter() - t0:.2f} s, {index.stats()['terms']} termes")
+
+    for label, fn in (
+        ("recherche", lambda: index.search(rng.choice(QUERIES), 20)),
+        ("recherche thème", lambda: index.search(rng.choice(QUERIES), 20, theme="BDD")),
+        ("terme rare", lambda: index.search(f"terme{rng.randrange(args.bank)}", 20)),
+        ("autocomplétion", lambda: index.autocomplete(rng.choice(PREFIXES), 10)),
+    ):
+        timings = timed(fn, args.runs)
+        print(f"{label:16} médiane {statistics.median(timings):7.3f} ms   p99 {timings[int(len(timings) * 0.99)]:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
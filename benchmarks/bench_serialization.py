@@ -0,0 +1,80 @@
+# ============================================================
+# bench_serialization.py - Chemin JSON avant / après
+# ============================================================
+# Usage (depuis la racine du repo, sans MongoDB) :
+#   python -m benchmarks.bench_serialization [--items 200] [--runs 500]
+#
+# Compare, pour une liste admin de questions et une session de quiz :
+#   - avant : validation response_model (pydantic) + jsonable_encoder + json stdlib
+#             (ce que fait FastAPI quand la route retourne un dict/list)
+#   - après : FastJSONResponse (orjson) sur les données déjà normalisées
+# ============================================================
+
+import argparse
+import json
+import statistics
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models import Question
+from app.responses import FastJSONResponse, orjson
+
+
+def make_questions(n: int) -> list[dict]:
+    return [{
+        "question": f"Quelle commande Docker permet de lister les conteneurs n°{i} ?",
+        "theme": "Docker",
+        "test": "Test de validation",
+        "choix": ["docker ps", "docker ls", "docker images", "docker run"],
+        "correct": ["docker ps"],
+    } for i in range(n)]
+
+
+def before_list(adapter, data):
+    validated = adapter.validate_python(data)
+    encoded = jsonable_encoder(validated)
+    return json.dumps(encoded, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def before_dict(data):
+    encoded = jsonable_encoder(data)
+    return json.dumps(encoded, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def after(data):
+    return FastJSONResponse(data).body
+
+
+def bench(fn, *args, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=500)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[Question])
+    listing = make_questions(args.items)
+    session = {"quiz_id": "0" * 24, "user": "prof1", "name": "Révision", "theme": "Docker",
+               "limit": 10, "created_at": "2025-10-01T10:00:00", "questions": make_questions(10)}
+
+    print(f"orjson {'disponible' if orjson else 'absent (repli json)'}")
+    for label, b, a in (
+        (f"/questions admin ({args.items})", bench(before_list, adapter, listing, runs=args.runs), bench(after, listing, runs=args.runs)),
+        ("/quiz/{id} (10 questions)", bench(before_dict, session, runs=args.runs), bench(after, session, runs=args.runs)),
+    ):
+        print(f"{label:28s} avant {b:9.1f} µs   après {a:9.1f} µs   x{b / a:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
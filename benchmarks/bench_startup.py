@@ -0,0 +1,48 @@
+# ============================================================
+# bench_startup.py - Temps d'import et temps jusqu'à /readyz
+# ============================================================
+# Usage (depuis la racine du repo, MongoDB démarré) :
+#   python -m benchmarks.bench_startup [--runs 5]
+#
+# Chaque mesure est faite dans un processus Python neuf :
+#   - import_ms : import de app.main (aucune connexion ouverte)
+#   - ready_ms  : exécution du lifespan jusqu'à ce que /readyz réponde 200
+# ============================================================
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import app.main as m
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(m.app) as client:
+    r = client.get("/readyz")
+    t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "ready_ms": (t2 - t1) * 1000, "status": r.status_code}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for key in ("import_ms", "ready_ms"):
+        values = [r[key] for r in results]
+        print(f"{key:10s} médiane {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+    print("statuts /readyz :", sorted({r["status"] for r in results}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# ============================================================
+# bench_storage.py - Opérations de la couche de données, backend SQLite
+# ============================================================
+# Usage (depuis la racine du repo, sans MongoDB ni réseau) :
+#   python -m benchmarks.bench_storage [--bank 5000] [--runs 2000] [--path :memory:]
+#
+# Remplit une base SQLite (en mémoire par défaut) avec une banque synthétique,
+# puis mesure les opérations des routes les plus fréquentes : tirage aléatoire,
+# listes de thèmes, création et relecture de sessions, correction.
+# ============================================================
+
+import argparse
+import statistics
+import time
+
+from app.questions import (
+    add_questions, create_quiz_session, get_questions, get_question_by_id,
+    list_themes_for_test, invalidate_question_caches, sessions_cache, _load_session_payload,
+)
+from app.storage import use_store
+from app.storage.sqlite import SQLiteStore
+
+THEMES = ["BDD", "Python", "Docker", "Machine Learning", "Streamlit", "Automation"]
+TESTS = ["Test de positionnement", "Test de validation", "Total Bootcamp"]
+
+
+def measure(label: str, runs: int, fn):
+    timings = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    print(f"{label:<28} médiane {statistics.median(timings):.3f} ms   p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bank", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--path", default=":memory:")
+    args = parser.parse_args()
+
+    store = SQLiteStore(args.path)
+    use_store(store)
+    store.ensure_indexes()
+    t0 = time.perf_counter()
+    add_questions([{
+        "question": f"Question {i}",
+        "theme": THEMES[i % len(THEMES)],
+        "test": TESTS[(i // len(THEMES)) % len(TESTS)],
+        "choix": ["A", "B", "C", "D"],
+        "correct": ["A"],
+    } for i in range(args.bank)])
+    print(f"import de {args.bank} questions : {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    qids = [d["qid"] for d in store.all_questions()]
+    quiz_ids = []
+
+    def create(i):
+        quiz_ids.append(create_quiz_session("prof", 10, theme=THEMES[i % len(THEMES)])[0])
+
+    def themes(i):
+        # Sans le cache des listes : coût de la requête DISTINCT indexée
+        invalidate_question_caches()
+        list_themes_for_test(TESTS[i % len(TESTS)])
+
+    measure("get_questions(10, thème)", args.runs, lambda i: get_questions(10, THEMES[i % len(THEMES)]))
+    measure("get_question_by_id", args.runs, lambda i: get_question_by_id(qids[i % len(qids)]))
+    measure("list_themes_for_test", args.runs, themes)
+    measure("create_quiz_session", args.runs, create)
+    sessions_cache.invalidate()
+    measure("lecture session (non cachée)", args.runs, lambda i: _load_session_payload(quiz_ids[i % len(quiz_ids)]))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
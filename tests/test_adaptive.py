@@ -0,0 +1,84 @@
+"""Sélection adaptative : question la plus informative, masques de session, cache borné, ajustement."""
+import random
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app import adaptive
+from app.adaptive import AdaptiveEngine, ItemArrays, fit_from_attempts
+from app.generator import QuestionBank
+from app.storage import use_store
+from app.storage.sqlite import SQLiteStore
+
+
+def _arrays(n=5000, fitted_every=2):
+    rng = random.Random(1)
+    bank = QuestionBank([{
+        "_id": i, "ordinal": i + 1, "qid": f"q{i}", "question": f"Question {i}",
+        "theme": "BDD" if i % 2 else "Python", "test": "Quiz", "choix": ["A", "B"], "correct": ["A"],
+    } for i in range(n)])
+    params = {f"q{i}": (rng.uniform(0.5, 2.5), rng.gauss(0, 1)) for i in range(0, n, fitted_every)}
+    return ItemArrays(bank, params)
+
+
+def test_best_matches_full_scan():
+    arrays = _arrays()
+    engine = AdaptiveEngine(top_k=3)
+    eligible = arrays.eligible(None, None)
+    rng = random.Random(2)
+    seen = bytearray(rng.randbytes(300))
+    for _ in range(20):
+        theta = rng.gauss(0, 1.5)
+        exclude = set(rng.sample(range(1, len(arrays) + 1), 10))
+        mask = engine._available(arrays, seen, exclude, None)
+        best = engine._best(arrays, theta, eligible, mask)
+        p = 1 / (1 + np.exp(-arrays.a * (theta - arrays.b)))
+        info = np.where(mask, arrays.a ** 2 * p * (1 - p), -1.0)
+        assert len(best) == 3 and (info[best] >= np.sort(info)[-3] - 1e-12).all()
+
+
+def test_session_mask_excludes_asked_and_falls_back_to_seen():
+    arrays = _arrays(n=16)
+    engine = AdaptiveEngine(top_k=1)
+    eligible = arrays.eligible(None, None)
+    seen = bytearray(b"\xff\xff\xff")  # toutes vues
+    asked = set()
+    for _ in range(16):
+        ordinal = engine.select(arrays, 0.0, eligible, asked, seen, session="s1")
+        assert ordinal not in asked
+        asked.add(ordinal)
+    assert engine.select(arrays, 0.0, eligible, asked, seen, session="s1") is None
+
+
+def test_unknown_theme_is_not_cached():
+    arrays = _arrays(n=10)
+    assert len(arrays.eligible("inconnu", None)) == 0
+    assert len(arrays.eligible("BDD", "Quiz")) == 5
+    assert list(arrays._eligible) == [("BDD", "Quiz")]
+
+
+def test_fit_keeps_same_wording_questions_apart(monkeypatch):
+    store = SQLiteStore(":memory:")
+    store.ensure_indexes()
+    previous = use_store(store)
+    try:
+        bank = QuestionBank([{
+            "_id": i, "ordinal": i + 1, "qid": f"q{i}", "question": "Même intitulé",
+            "theme": "BDD", "test": "Quiz", "choix": ["A", "B"], "correct": ["A"],
+        } for i in range(2)])
+        monkeypatch.setattr(adaptive, "get_bank", lambda: bank)
+        now = datetime.now(timezone.utc)
+        store.insert_attempts(
+            [{"user": f"u{u}", "qid": "q0", "question": "Même intitulé", "correct": True, "at": now}
+             for u in range(4)]
+            + [{"user": f"u{u}", "qid": "q1", "question": "Même intitulé", "correct": u == 0, "at": now}
+               for u in range(4)]
+            # Tentative ancienne sans qid : intitulé ambigu, ignorée
+            + [{"user": "u0", "question": "Même intitulé", "correct": False, "at": now}])
+        result = fit_from_attempts(min_responses=1, iterations=50)
+        params = {row["qid"]: row for row in store.load_item_params()}
+    finally:
+        use_store(previous)
+    assert result["responses"] == 8 and result["questions"] == 2
+    assert params["q0"]["n"] == params["q1"]["n"] == 4
+    assert params["q0"]["b"] < params["q1"]["b"]
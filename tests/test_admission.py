@@ -0,0 +1,115 @@
+"""Contrôle d'admission : CoDel sur horloge injectée, 503 + Retry-After, exemptions, limites par classe."""
+import asyncio
+
+from app.admission import AdmissionClass, AdmissionController, AdmissionMiddleware, Rejected, classify
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _settle():
+    # Quelques tours de boucle : les attentes (wait_for) voient leur future résolue
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _outcome(cls):
+    try:
+        await cls.acquire()
+        return "admitted"
+    except Rejected as exc:
+        assert exc.retry_after >= 1
+        return exc.reason
+
+
+def test_codel_sheds_only_after_a_full_interval_above_target():
+    async def scenario():
+        clock = Clock()
+        cls = AdmissionClass("read", limit=1, max_queue=10, target_ms=50, interval_ms=100,
+                             max_wait_ms=60_000, clock=clock)
+        await cls.acquire()
+        waiters = [asyncio.create_task(_outcome(cls)) for _ in range(4)]  # arrivées à t=0
+        await _settle()
+
+        clock.now = 0.06  # au-dessus de la cible : début de l'intervalle d'observation
+        cls.release(0.01)
+        await _settle()
+        assert waiters[0].done() and not cls.overloaded
+
+        clock.now = 0.15  # toujours au-dessus, mais l'intervalle n'est pas écoulé
+        cls.release(0.01)
+        late = asyncio.create_task(_outcome(cls))
+        await _settle()
+        assert waiters[1].done() and not cls.overloaded and cls.shed["overloaded"] == 0
+
+        clock.now = 0.17  # intervalle complet au-dessus : les requêtes trop anciennes sont délestées
+        cls.release(0.01)
+        results = await asyncio.gather(*waiters, late)
+        assert results == ["admitted", "admitted", "overloaded", "overloaded", "admitted"]
+        # La dernière admise a peu attendu : fin de l'engorgement
+        assert cls.shed["overloaded"] == 2 and not cls.overloaded
+
+    asyncio.run(scenario())
+
+
+def test_exempt_and_classified_routes():
+    assert classify("GET", "/quiz/abc/live/events") is None
+    assert classify("GET", "/healthz") is None
+    assert classify("POST", "/login") == "auth"
+    assert classify("GET", "/admin/cache") == "bulk"
+    assert classify("GET", "/questions", b"admin=true&username=a") == "bulk"
+    assert classify("GET", "/quiz/abc") == "read"
+
+
+def _limits(limit=1, max_queue=0):
+    return {"limit": limit, "max_queue": max_queue, "target_ms": 50, "interval_ms": 100, "max_wait_ms": 60_000}
+
+
+def test_middleware_sheds_per_class_with_retry_after():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await gate.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        controller = AdmissionController({name: _limits() for name in ("auth", "bulk", "read")}, clock=Clock())
+        middleware = AdmissionMiddleware(app, controller)
+
+        async def call(method, path):
+            sent = []
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {"type": "http", "method": method, "path": path, "query_string": b"", "headers": []}
+            await middleware(scope, receive, send)
+            start = sent[0]
+            return start["status"], dict(start["headers"])
+
+        running = [asyncio.create_task(call("GET", "/admin/cache")), asyncio.create_task(call("GET", "/quiz/a"))]
+        await _settle()
+        # bulk et read pleins (limite 1, pas de file) : 503 immédiat avec Retry-After
+        for method, path in (("GET", "/admin/duplicates"), ("GET", "/quiz/b")):
+            status, headers = await call(method, path)
+            assert status == 503 and int(headers[b"retry-after"]) >= 1
+        # auth a sa propre limite, le flux en direct n'est pas limité
+        running += [asyncio.create_task(call("POST", "/login")),
+                    asyncio.create_task(call("GET", "/quiz/a/live/events"))]
+        await _settle()
+        assert controller.get("auth").active == 1
+        gate.set()
+        assert [status for status, _ in await asyncio.gather(*running)] == [200] * 4
+        assert {n: c.active for n, c in controller.classes.items()} == {"auth": 0, "bulk": 0, "read": 0}
+        assert controller.get("read").shed["queue_full"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,129 @@
+"""Archivage des sessions : partitions par jour, bail exclusif, relecture après archivage."""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app import archive
+from app.archive import SessionArchiver, find_archived_session, partition_path
+
+
+class Sessions:
+    """Sous-ensemble de quiz_sessions utilisé par l'archiveur."""
+
+    name = "quiz_sessions"
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def find(self, query):
+        cutoff = query["created_at"]["$lt"]
+        return _Cursor([d for d in self.docs if d["created_at"] < cutoff])
+
+    def delete_many(self, query):
+        ids = set(query["_id"]["$in"])
+        self.docs = [d for d in self.docs if d["_id"] not in ids]
+
+
+class _Cursor(list):
+    def sort(self, field, direction):
+        return _Cursor(sorted(self, key=lambda d: d[field], reverse=direction < 0))
+
+    def limit(self, n):
+        return _Cursor(self[:n])
+
+
+class Locks:
+    """Bail : mise à jour conditionnelle, ou insertion refusée si le bail est détenu."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def find_one_and_update(self, query, update, upsert, return_document):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and not (doc["until"] < datetime.utcnow() or doc["owner"] == update["$set"]["owner"]):
+            raise DuplicateKeyError("bail détenu")
+        self.docs[query["_id"]] = {"_id": query["_id"], **update["$set"]}
+        return self.docs[query["_id"]]
+
+    def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and doc["owner"] == query["owner"]:
+            doc.update(update["$set"])
+
+
+class Db:
+    def __init__(self):
+        self.locks = Locks()
+
+
+class Store:
+    backend = "mongo"
+
+
+def _session(day: datetime, second: int, **extra) -> dict:
+    created = day + timedelta(seconds=second)
+    return {"_id": ObjectId.from_datetime(created), "user": "prof_martin", "created_at": created,
+            "questions": [], **extra}
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.setitem(archive.archive_config, "dir", str(tmp_path))
+    db = Db()
+    monkeypatch.setattr(archive, "get_db", lambda: db)
+    monkeypatch.setattr(archive, "get_store", lambda: Store())
+    return db
+
+
+def _use(monkeypatch, sessions):
+    monkeypatch.setattr(archive, "get_sessions", lambda: sessions)
+
+
+def test_sessions_rotate_into_daily_partitions(env, monkeypatch):
+    old = datetime(2025, 3, 31)
+    sessions = Sessions([_session(old, 10), _session(old + timedelta(days=1), 10), _session(old, 20),
+                         _session(datetime.utcnow(), 0)])
+    _use(monkeypatch, sessions)
+    archiver = SessionArchiver(retention_days=30, batch_size=2)
+
+    assert archiver.run_once()["archived"] == 3
+    assert len(sessions.docs) == 1  # session récente conservée
+    assert partition_path(old).endswith("2025/03/2025-03-31.ndjson.gz")
+    assert partition_path(old + timedelta(days=1)).endswith("2025/04/2025-04-01.ndjson.gz")
+
+    # Nouveau passage : un membre gzip de plus dans le fichier du jour
+    late = _session(old, 30)
+    sessions.docs.append(late)
+    archiver.run_once()
+    assert find_archived_session(str(late["_id"]))["created_at"] == late["created_at"].isoformat()
+    assert archiver.stats()["archive_files"] == 2 and archiver.archived == 4
+
+
+def test_lease_held_by_another_worker_skips_the_run(env, monkeypatch):
+    sessions = Sessions([_session(datetime(2025, 1, 5), 0)])
+    _use(monkeypatch, sessions)
+    first, second = SessionArchiver(retention_days=30), SessionArchiver(retention_days=30)
+    env.locks.docs[archive._LEASE_ID] = {"_id": archive._LEASE_ID, "owner": first.owner,
+                                         "until": datetime.utcnow() + timedelta(minutes=5)}
+
+    assert "skipped" in second.run_once() and len(sessions.docs) == 1
+    assert first.run_once()["archived"] == 1
+    # Bail rendu en fin de passage : l'autre worker peut archiver
+    assert env.locks.docs[archive._LEASE_ID]["until"] <= datetime.utcnow()
+    assert "skipped" not in second.run_once()
+
+
+def test_lookup_matches_the_top_level_quiz_id_only(env, monkeypatch):
+    day = datetime(2025, 2, 10)
+    target = _session(day, 50, name="Partiel")
+    # Autre session du même jour qui cite l'identifiant (copie d'un quiz)
+    copy = _session(day, 40, copied_from={"quiz_id": str(target["_id"])})
+    _use(monkeypatch, Sessions([copy, target]))
+    SessionArchiver(retention_days=30).run_once()
+
+    found = find_archived_session(str(target["_id"]))
+    assert found["quiz_id"] == str(target["_id"]) and found["name"] == "Partiel"
+    assert find_archived_session(str(ObjectId.from_datetime(day + timedelta(seconds=60)))) is None
+    assert find_archived_session("pas-un-objectid") is None
@@ -0,0 +1,74 @@
+"""Journal des tentatives : reprise après une écriture groupée partielle."""
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+from app.attempts import AttemptBuffer
+from app.storage import PartialWriteError
+from app.storage import mongo
+
+
+class FlakyWriter:
+    """Écrit la première moitié du premier lot puis échoue ; écrit normalement ensuite."""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+
+    def __call__(self, docs):
+        self.calls += 1
+        if self.calls == 1:
+            half = len(docs) // 2
+            self.rows += docs[:half]
+            raise PartialWriteError("échec partiel", docs[half:])
+        self.rows += docs
+
+
+def test_partial_failure_requeues_only_unwritten_docs():
+    writer = FlakyWriter()
+    buffer = AttemptBuffer(max_items=100, batch_size=10, writer=writer)
+    for i in range(10):
+        buffer.record({"n": i})
+
+    assert buffer.flush() == 5
+    assert buffer.stats()["depth"] == 5
+    assert buffer.flush() == 5
+
+    assert sorted(d["n"] for d in writer.rows) == list(range(10))
+    stats = buffer.stats()
+    assert stats["depth"] == 0 and stats["written"] == 10 and stats["dropped"] == 0
+
+
+def test_generic_failure_requeues_whole_batch():
+    calls = []
+
+    def writer(docs):
+        calls.append(len(docs))
+        if len(calls) == 1:
+            raise RuntimeError("stockage injoignable")
+
+    buffer = AttemptBuffer(max_items=100, batch_size=10, writer=writer)
+    for i in range(4):
+        buffer.record({"n": i})
+    assert buffer.flush() == 0
+    assert buffer.flush() == 4
+    assert calls == [4, 4]
+
+
+def test_mongo_insert_attempts_skips_duplicate_keys(monkeypatch):
+    docs = [{"_id": i, "n": i} for i in range(4)]
+    details = {"writeErrors": [{"index": 1, "code": 11000}, {"index": 3, "code": 121}]}
+
+    def bulk_write(ops, ordered):
+        raise BulkWriteError(details)
+
+    fake_db = SimpleNamespace(attempts=SimpleNamespace(bulk_write=bulk_write))
+    monkeypatch.setattr(mongo, "get_db", lambda: fake_db)
+
+    try:
+        mongo.MongoStore().insert_attempts(docs)
+    except PartialWriteError as exc:
+        # Le doublon (déjà écrit lors d'un essai précédent) n'est pas réessayé
+        assert exc.failed == [docs[3]]
+    else:
+        raise AssertionError("PartialWriteError attendue")
@@ -0,0 +1,67 @@
+"""Quiz autonome : aller-retour navigateur, réponse falsifiée rejetée, 304 propre à l'encodage."""
+import pytest
+from starlette.requests import Request
+
+from app import grading
+from app.grading import answer_hash, get_bundle_payload, verify_bundle_submission
+from app.routes.quiz_routes import get_quiz_bundle
+
+SESSION = {"name": "Réseaux", "questions": [
+    {"qid": f"q{i}", "question": f"Quel port utilise le service n° {i} ?", "choix": ["22", "80", "443"],
+     "correct": [("22", "80", "443")[i % 3]], "theme": "Réseaux", "test": "Quiz"}
+    for i in range(20)
+]}
+
+
+@pytest.fixture(autouse=True)
+def session(monkeypatch):
+    monkeypatch.setattr(grading, "get_quiz_session_by_id", lambda quiz_id: SESSION)
+    grading.invalidate_answer_key("quiz")
+    yield
+    grading.invalidate_answer_key("quiz")
+
+
+def _browser_answers(bundle) -> list[dict]:
+    """Ce que fait le navigateur : retrouver le choix dont l'empreinte est celle de la bonne réponse."""
+    return [{"index": q["index"], "reponse": [c for c in q["choix"]
+                                              if answer_hash(bundle["salt"], q["index"], [c]) == q["answer_hash"]]}
+            for q in bundle["questions"]]
+
+
+def test_bundle_round_trip_is_verified():
+    bundle = get_bundle_payload("quiz").data
+    assert all("correct" not in q for q in bundle["questions"])
+    answers = _browser_answers(bundle)
+    result = verify_bundle_submission("quiz", answers, "etudiant_marie", claimed_score=20)
+    assert result["score"] == 20 and result["verified"]
+    assert result["results"][3]["correct_answers"] == [SESSION["questions"][3]["correct"][0]]
+
+
+def test_tampered_answer_is_rejected():
+    bundle = get_bundle_payload("quiz").data
+    answers = _browser_answers(bundle)
+    answers[0]["reponse"] = ["443"]  # mauvaise réponse annoncée juste par le client
+    answers.append({"index": 0, "reponse": ["443"]})  # doublon : compté une seule fois
+    result = verify_bundle_submission("quiz", answers, "etudiant_marie", claimed_score=20)
+    assert result["score"] == 19 and not result["verified"]
+    assert not next(r for r in result["results"] if r["index"] == 0)["correct"]
+
+
+def _request(**headers):
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/quiz/quiz/bundle", "headers": raw})
+
+
+def test_not_modified_respects_the_encoding():
+    plain = get_quiz_bundle("quiz", _request())
+    gzipped = get_quiz_bundle("quiz", _request(accept_encoding="gzip"))
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+
+    assert get_quiz_bundle("quiz", _request(accept_encoding="gzip",
+                                            if_none_match=gzipped.headers["etag"])).status_code == 304
+    assert get_quiz_bundle("quiz", _request(if_none_match=plain.headers["etag"])).status_code == 304
+    # ETag d'une autre variante : corps complet
+    assert get_quiz_bundle("quiz", _request(if_none_match=gzipped.headers["etag"])).status_code == 200
+    assert get_quiz_bundle("quiz", _request(accept_encoding="gzip",
+                                            if_none_match=plain.headers["etag"])).status_code == 200
@@ -0,0 +1,54 @@
+"""Compression : ETag propre à l'encodage, gros corps compressés hors de la boucle d'événements."""
+import anyio
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, compress
+
+BODY = b'{"questions": "' + b"x" * 4000 + b'"}'
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, min_size=1024, thread_min_size=2048)
+
+    @app.get("/strong")
+    def strong():
+        return Response(BODY, media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/weak")
+    def weak():
+        return Response(BODY, media_type="application/json", headers={"ETag": 'W/"abc"'})
+
+    @app.get("/small")
+    def small():
+        return Response(BODY[:1500], media_type="application/json")
+
+    return TestClient(app)
+
+
+def test_compressed_body_gets_an_encoding_etag(client):
+    response = client.get("/strong", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"abc-gzip"'
+    assert response.content == BODY  # décompressé par le client
+    assert client.get("/weak", headers={"Accept-Encoding": "gzip"}).headers["etag"] == 'W/"abc-gzip"'
+    assert client.get("/strong", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"abc"'
+
+
+def test_large_bodies_are_compressed_in_a_thread(client, monkeypatch):
+    calls = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def spy(func, *args, **kwargs):
+        if func is compress:
+            calls.append(len(args[0]))
+        return await run_sync(func, *args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", spy)
+    client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert calls == []
+    response = client.get("/strong", headers={"Accept-Encoding": "gzip"})
+    assert calls == [len(BODY)] and response.content == BODY
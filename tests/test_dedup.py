@@ -0,0 +1,79 @@
+"""Quasi-doublons : similarité des signatures, collisions de bandes, tri d'un lot, accès concurrents."""
+import threading
+
+import pytest
+
+from app import dedup
+from app.dedup import BANDS, MinHashLSH, screen_batch, signature, similarity
+from app.generator import QuestionBank
+
+BASE = "Quelle clause SQL permet de filtrer les groupes après un GROUP BY ?"
+
+
+def test_signature_similarity_tracks_wording():
+    assert signature("") is None
+    assert similarity(signature(BASE), signature(BASE.upper())) == 1.0
+    assert similarity(signature(BASE), signature(BASE.replace("filtrer", "trier"))) > 0.6
+    assert similarity(signature(BASE), signature("Combien de couches compte le modèle OSI ?")) < 0.2
+
+
+def test_identical_signatures_collide_in_every_band():
+    index = MinHashLSH()
+    sig = signature(BASE)
+    index.add("a", sig)
+    index.add("b", signature(BASE + " "))
+    assert sum(len(buckets) for buckets in index._buckets) == BANDS
+    assert index.query(sig, 0.9, exclude="a") == [("b", 1.0)]
+    index.remove("a")
+    index.remove("b")
+    assert len(index) == 0 and all(not buckets for buckets in index._buckets)
+
+
+@pytest.fixture
+def bank(monkeypatch):
+    bank = QuestionBank([{"_id": 1, "ordinal": 1, "qid": "q1", "question": BASE, "theme": "BDD",
+                          "test": "SQL", "choix": ["HAVING", "WHERE"], "correct": ["HAVING"]}])
+    monkeypatch.setattr(dedup, "get_bank", lambda: bank)
+    monkeypatch.setattr(dedup, "dedup_index", MinHashLSH())
+    monkeypatch.setattr(dedup, "_built", False)
+    return bank
+
+
+def test_screen_batch_rejects_bank_and_in_batch_duplicates(bank):
+    other = "Quel protocole de transport garantit la livraison ordonnée des segments ?"
+    accepted, duplicates = screen_batch([
+        {"question": BASE.replace("?", " ?")},
+        {"question": other},
+        {"question": other.replace("segments", "segments reçus")},
+        {"question": "Combien de couches compte le modèle OSI ?"},
+    ], threshold=0.7)
+    assert [d["question"] for d in accepted] == [other, "Combien de couches compte le modèle OSI ?"]
+    assert [(d["index"], d["duplicate_of"]) for d in duplicates] == [(0, BASE), (2, other)]
+
+
+def test_concurrent_updates_and_reset_do_not_break_queries():
+    index = MinHashLSH()
+    sigs = [signature(f"{BASE} variante numéro {i}") for i in range(50)]
+    errors, stop = [], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                index.query(sigs[0], 0.5)
+                index.clusters(0.5)
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for _ in range(20):
+        for i, sig in enumerate(sigs):
+            index.add(i, sig)
+        for i in range(0, 50, 2):
+            index.remove(i)
+        index.clear()
+    stop.set()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(index) == 0
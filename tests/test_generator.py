@@ -0,0 +1,54 @@
+"""Banque et tirage : retrait en O(1), copies des candidates, tirage concurrent des suppressions."""
+import random
+import threading
+
+from app.generator import QuestionBank, generate
+
+
+def _bank(n=400):
+    return QuestionBank([{
+        "_id": i, "ordinal": i, "qid": f"q{i}", "question": f"Question {i}",
+        "theme": "BDD" if i % 2 else "Python", "test": "Quiz", "choix": ["A", "B"], "correct": ["A"],
+    } for i in range(1, n + 1)])
+
+
+def test_remove_keeps_every_index_consistent():
+    bank = _bank(10)
+    for ordinal in (1, 10, 5):
+        bank.remove(ordinal)
+    bank.remove(5)
+    assert sorted(bank.candidates()) == [2, 3, 4, 6, 7, 8, 9]
+    assert sorted(bank.candidates("BDD")) == [3, 7, 9]
+    assert sorted(bank.candidates("Python", "Quiz")) == [2, 4, 6, 8]
+    assert all(bank.all[bank.all.positions[o]] == o for o in bank.all)
+
+
+def test_candidates_is_a_snapshot():
+    bank = _bank(4)
+    snapshot = bank.candidates("BDD")
+    bank.remove(1)
+    assert snapshot == [1, 3] and bank.candidates("BDD") == [3]
+
+
+def test_generate_while_questions_are_removed():
+    bank = _bank()
+    errors = []
+
+    def draw():
+        rng = random.Random(threading.get_ident())
+        try:
+            for _ in range(300):
+                quiz = generate(bank, [{"theme": "BDD", "count": 5}, {"theme": "Python", "count": 5}], rng=rng)
+                assert len({q["ordinal"] for q in quiz}) == len(quiz)
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=draw) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for ordinal in range(1, 391):
+        bank.remove(ordinal)
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(generate(bank, [{"count": 20}])) == 10
@@ -0,0 +1,42 @@
+"""Correction : clé par position, question désignée par qid (texte seul s'il est unique)."""
+import pytest
+
+from app import grading
+from app.grading import build_answer_key, grade_submission
+
+SESSION = {"questions": [
+    {"qid": "a1", "question": "Quel port ?", "choix": ["80", "443"], "correct": ["80"], "theme": "Web"},
+    {"qid": "b2", "question": "Quel port ?", "choix": ["22", "21"], "correct": ["22"], "theme": "SSH"},
+    {"qid": "c3", "question": "Quel langage ?", "choix": ["Python", "C"], "correct": ["Python"]},
+]}
+
+
+@pytest.fixture(autouse=True)
+def session(monkeypatch):
+    monkeypatch.setattr(grading, "get_quiz_session_by_id", lambda quiz_id: SESSION)
+    grading.invalidate_answer_key("quiz")
+    yield
+    grading.invalidate_answer_key("quiz")
+
+
+def test_same_wording_questions_stay_distinct():
+    key = build_answer_key(SESSION)
+    assert len(key) == 3
+    assert key.find("b2") == 1 and key.find(question="Quel port ?") is None
+    assert key.find(question="Quel langage ?") == 2 and key.find("inconnu", "Quel langage ?") is None
+
+
+def test_submission_by_qid_grades_both_questions():
+    result = grade_submission("quiz", [
+        {"qid": "a1", "question": "Quel port ?", "reponse": ["80"]},
+        {"qid": "b2", "question": "Quel port ?", "reponse": ["22"]},
+        {"question": "Quel langage ?", "reponse": ["C"]},
+        {"question": "Quel langage ?", "reponse": ["Python"]},  # la dernière fait foi
+    ])
+    assert result["score"] == 3 and result["total"] == 3
+    assert sorted(r["qid"] for r in result["results"]) == ["a1", "b2", "c3"]
+
+
+def test_ambiguous_text_without_qid_is_unknown():
+    result = grade_submission("quiz", [{"question": "Quel port ?", "reponse": ["80"]}])
+    assert result["score"] == 0 and result["results"][0]["unknown"]
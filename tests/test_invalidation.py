@@ -0,0 +1,106 @@
+"""Canal d'invalidation : reprise en ordre naturel, remise à zéro sur perte, sujets de l'application."""
+import itertools
+from collections import deque
+
+import pytest
+
+from app import adaptive, database, grading, questions
+from app.invalidation import InvalidationChannel, invalidation_channel
+
+
+class CappedCollection:
+    """Collection plafonnée minimale : ordre naturel = ordre d'insertion, plus anciens écrasés."""
+
+    name = "invalidations"
+
+    def __init__(self, max_docs=100):
+        self.docs = deque(maxlen=max_docs)
+        self._ids = itertools.count(1)
+        self.database = self
+
+    def create_collection(self, name, **options):
+        pass
+
+    def insert_one(self, doc):
+        self.docs.append({"_id": next(self._ids), **doc})
+
+    def find(self, query, sort=None, batch_size=None):
+        assert sort == [("$natural", -1)]
+        return iter(list(reversed(self.docs)))
+
+    def find_one(self, query, projection=None, sort=None):
+        return next(self.find(query, sort), None)
+
+
+def _worker(coll):
+    channel = InvalidationChannel()
+    received = []
+    for topic in ("questions", "sessions"):
+        channel.subscribe(topic, lambda payload, topic=topic: received.append((topic, payload)))
+    channel.attach(lambda: coll)
+    channel._last_id = (coll.find_one({}, sort=[("$natural", -1)]) or {}).get("_id")
+    return channel, received
+
+
+def test_events_resume_after_last_seen_in_natural_order():
+    coll = CappedCollection()
+    a, _ = _worker(coll)
+    a.publish("sessions", {"quiz_id": "avant"})
+    b, received = _worker(coll)  # démarré après : l'événement précédent n'est pas rejoué
+
+    a.publish("questions", {"n": 1})
+    a.publish("sessions", {"quiz_id": "q1"})
+    b.publish("sessions", {"quiz_id": "local"})  # propre événement : déjà appliqué
+    assert b.poll() == 3
+    assert received == [("questions", {"n": 1}), ("sessions", {"quiz_id": "q1"})]
+    assert b.poll() == 0 and b.received == 2
+
+    a.publish("questions", {"n": 2})
+    b.poll()
+    assert received[-1] == ("questions", {"n": 2}) and b.resets == 0
+
+
+def test_lost_events_publish_a_reset_to_every_topic():
+    coll = CappedCollection(max_docs=3)
+    a, _ = _worker(coll)
+    b, received = _worker(coll)
+    a.publish("questions", {"n": 0})
+    b.poll()
+    received.clear()
+    for n in range(1, 5):  # le dernier événement vu par b est écrasé
+        a.publish("questions", {"n": n})
+    b.poll()
+    assert sorted(received) == [("questions", None), ("sessions", None)] and b.resets == 1
+    a.publish("sessions", {"quiz_id": "q2"})
+    b.poll()
+    assert received[-1] == ("sessions", {"quiz_id": "q2"})
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    """Canal du processus relié à une collection partagée avec un autre worker."""
+    coll = CappedCollection()
+    monkeypatch.setattr(invalidation_channel, "_collection", lambda: coll)
+    monkeypatch.setattr(invalidation_channel, "origin", "ce-worker")
+    monkeypatch.setattr(invalidation_channel, "_last_id", None)
+    other, _ = _worker(coll)
+    return other
+
+
+def test_application_topics_are_dispatched(remote, monkeypatch):
+    changes, reloads = [], []
+    monkeypatch.setattr(questions, "_notify_questions_changed", lambda event, doc: changes.append((event, doc)))
+    monkeypatch.setattr(adaptive.adaptive_engine, "reload", lambda: reloads.append(True))
+    database._roles_cache.set("etudiant_marie", "etudiant")
+    grading._answer_keys.set("quiz-1", object())
+
+    remote.publish("questions", {"event": "deleted", "docs": [{"qid": "q1", "ordinal": 1}]})
+    remote.publish("sessions", {"quiz_id": "quiz-1"})
+    remote.publish("users", {"username": "etudiant_marie"})
+    remote.publish("adaptive", {"fitted_at": "2026-01-01T00:00:00"})
+    assert invalidation_channel.poll() == 4
+
+    assert changes == [("deleted", {"qid": "q1", "ordinal": 1})]
+    assert grading._answer_keys.get("quiz-1") is None
+    assert database._roles_cache.get("etudiant_marie") is None
+    assert reloads == [True]
@@ -0,0 +1,55 @@
+"""Classements en direct : rang, top-k, réponses corrigées à nouveau, éviction."""
+from app.leaderboard import Leaderboard, LeaderboardRegistry
+
+
+def test_rank_and_top_with_ties():
+    board = Leaderboard(max_score=3)
+    for question in ("q1", "q2", "q3"):
+        board.record("alice", question, True)
+    board.record("bob", "q1", True)
+    board.record("carol", "q1", True)
+    board.record("dave", "q1", False)
+
+    assert board.rank("alice") == {"username": "alice", "score": 3, "rank": 1}
+    assert board.rank("bob")["rank"] == 2 and board.rank("carol")["rank"] == 2
+    assert board.rank("dave") == {"username": "dave", "score": 0, "rank": 4}
+    assert board.rank("inconnu") is None
+    assert [(e["username"], e["rank"]) for e in board.top(3)] == [("alice", 1), ("bob", 2), ("carol", 2)]
+    assert len(board.top(10)) == len(board) == 4
+
+
+def test_last_answer_wins():
+    board = Leaderboard(max_score=2)
+    assert board.record("alice", "q1", True) == 1
+    assert board.record("alice", "q1", True) == 1  # même question : comptée une fois
+    assert board.record("alice", "q2", True) == 2
+    assert board.record("alice", "q1", False) == 1
+    board.record("bob", "q1", True)
+    assert board.top(1) == [{"username": "alice", "score": 1, "rank": 1}]
+    assert board.rank("bob")["rank"] == 1
+
+
+def test_registry_evicts_lru_and_idle_boards():
+    registry = LeaderboardRegistry(max_boards=2, idle_ttl_s=60)
+    registry.apply("quiz1", 5, "alice", "q1", True)
+    registry.apply("quiz2", 5, "alice", "q1", True)
+    registry.apply("quiz1", 5, "bob", "q1", True)  # quiz1 redevient le plus récent
+    registry.apply("quiz3", 5, "alice", "q1", True)
+    assert registry.get("quiz2") is None and registry.get("quiz1") is not None
+    assert registry.evicted == 1
+
+    registry.get("quiz1").updated_at -= 120  # inactif au-delà du TTL
+    registry.apply("quiz4", 5, "alice", "q1", True)
+    assert registry.get("quiz1") is None and registry.get("quiz3") is not None
+    registry.drop("quiz3")
+    assert registry.stats()["boards"] == 1
+
+
+def test_remote_answers_are_replayed(monkeypatch):
+    from app import leaderboard as module
+    registry = LeaderboardRegistry()
+    monkeypatch.setattr(module, "leaderboards", registry)
+    module._apply_remote_answer({"quiz_id": "quiz", "max_score": 3, "username": "alice",
+                                 "question": "q1", "correct": True})
+    module._apply_remote_answer(None)
+    assert registry.get("quiz").rank("alice")["score"] == 1
@@ -0,0 +1,47 @@
+"""Mode direct : fin de flux sans perte du message `end`, SSE jamais compressé."""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+from app.live import LiveHub
+
+
+def test_close_keeps_pending_messages():
+    async def scenario():
+        hub = LiveHub(queue_size=4)
+        sub = hub.subscribe("quiz")
+        hub.publish("quiz", {"type": "question", "index": 0})
+        hub.publish("quiz", {"type": "end", "quiz_id": "quiz"})
+        assert hub.close("quiz") == 1
+        return [message.text async for message in sub.messages()]
+
+    received = asyncio.run(scenario())
+    assert len(received) == 2 and '"end"' in received[-1]
+
+
+def test_slow_client_is_dropped_and_closed():
+    async def scenario():
+        hub = LiveHub(queue_size=2)
+        sub = hub.subscribe("quiz")
+        results = [hub.publish("quiz", {"index": i}) for i in range(3)]
+        return sub, results, [message async for message in sub.messages()]
+
+    sub, results, received = asyncio.run(scenario())
+    assert results[-1] == {"delivered": 0, "dropped": 1}
+    assert sub.dropped and received == []
+
+
+def test_event_stream_is_not_compressed():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, min_size=1)
+
+    @app.get("/events")
+    def events():
+        return Response(b"data: x\n\n" * 200, media_type="text/event-stream")
+
+    response = TestClient(app).get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text.startswith("data: x")
@@ -0,0 +1,74 @@
+"""Profilage : seuls les threads de la requête profilée sont relevés."""
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.profiling import ProfilingMiddleware, StackSampler
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def noise_worker(stop):
+    while not stop.is_set():
+        _spin(0.01)
+
+
+@pytest.fixture
+def noise():
+    stop = threading.Event()
+    thread = threading.Thread(target=noise_worker, args=(stop,), daemon=True)
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+@pytest.fixture
+def profiled(monkeypatch):
+    captured = []
+    monkeypatch.setitem(profiling.profiling_config, "sample_rate", 1.0)
+    monkeypatch.setitem(profiling.profiling_config, "routes", ["/"])
+    monkeypatch.setitem(profiling.profiling_config, "interval_ms", 1)
+    monkeypatch.setattr(profiling, "save_profile", lambda sampler, meta: captured.append(sampler))
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/sync")
+    def sync_route():
+        _spin(0.15)
+        return {}
+
+    @app.get("/async")
+    async def async_route():
+        _spin(0.15)
+        return {}
+
+    return TestClient(app), captured
+
+
+@pytest.mark.parametrize("path, route", [("/sync", "sync_route"), ("/async", "async_route")])
+def test_only_request_threads_are_sampled(profiled, noise, path, route):
+    client, captured = profiled
+    assert client.get(path).status_code == 200
+    stacks = captured[0].collapsed()
+    assert route in stacks
+    assert "noise_worker" not in stacks and "request-profiler" not in stacks
+
+
+def test_sampler_without_targets_skips_other_samplers(noise):
+    first, second = StackSampler(1), StackSampler(1)
+    first.start()
+    second.start()
+    _spin(0.05)
+    first.stop()
+    second.stop()
+    stacks = first.collapsed()
+    assert "noise_worker" in stacks and "_run (profiling.py" not in stacks
@@ -0,0 +1,62 @@
+"""Unicité des questions (contenu actuel, pas qid d'origine) ; qid des données antérieures."""
+import json
+
+import pytest
+
+from app.generator import backfill_question_ids
+from app.questions import add_question, add_questions, find_identical_question, update_question
+from app.storage import use_store
+from app.storage.sqlite import SQLiteStore
+
+
+@pytest.fixture(autouse=True)
+def store():
+    store = SQLiteStore(":memory:")
+    store.ensure_indexes()
+    use_store(store)
+    yield store
+    store.close()
+
+
+def _doc(question, choix=("Oui", "Non")):
+    return {"question": question, "choix": list(choix), "correct": [choix[0]]}
+
+
+def test_original_content_can_be_added_again_after_edit():
+    qid = add_question(_doc("Kafka est un broker ?"))
+    update_question(qid, {"question": "Kafka est un système de messagerie ?"})
+
+    assert find_identical_question(_doc("Kafka est un broker ?")) is None
+    other = add_question(_doc("Kafka est un broker ?"))
+    assert other and other != qid
+    assert find_identical_question(_doc("Kafka est un broker ?"))["qid"] == other
+
+
+def test_edit_matching_another_question_is_detected():
+    first = add_question(_doc("Spark est distribué ?"))
+    second = add_question(_doc("Hadoop est distribué ?"))
+
+    clash = find_identical_question(_doc("Spark est distribué ?"), exclude_qid=second)
+    assert clash["qid"] == first
+    assert find_identical_question(_doc("Spark est distribué ?"), exclude_qid=first) is None
+
+
+def test_bulk_import_salts_qid_taken_by_edited_question():
+    qid = add_question(_doc("Redis est en mémoire ?"))
+    update_question(qid, {"choix": ["Vrai", "Faux"], "correct": ["Vrai"]})
+
+    assert add_questions([_doc("Redis est en mémoire ?"), _doc("Redis est en mémoire ?")]) == 1
+
+
+def test_legacy_rows_get_qid_and_ordinal_at_startup(store):
+    add_question(_doc("Docker isole les processus ?"))
+    legacy = _doc("Kubernetes orchestre des conteneurs ?")
+    store._write(lambda conn: conn.execute("INSERT INTO questions (question, doc) VALUES (?, ?)",
+                                           (legacy["question"], json.dumps(legacy))))
+    assert store.count_missing_ids() == 1
+
+    assert backfill_question_ids() == 1
+    assert store.count_missing_ids() == 0 and backfill_question_ids() == 0
+    doc = store.find_question_by_text(legacy["question"])
+    assert doc["qid"] and doc["ordinal"] is not None
+    assert store.find_question(doc["qid"])["question"] == legacy["question"]
@@ -0,0 +1,55 @@
+"""Quiz par classe : variantes enregistrées en une écriture, distinctes, taille de classe bornée."""
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app import utils
+from app.generator import QuestionBank
+from app.models import QuizBatchInput
+from app.routes import quiz_routes
+from app.storage import use_store
+from app.storage.sqlite import SQLiteStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = SQLiteStore(":memory:")
+    store.ensure_indexes()
+    previous = use_store(store)
+    bank = QuestionBank([{
+        "_id": i, "ordinal": i, "qid": f"q{i}", "question": f"Question {i}",
+        "theme": "BDD", "test": "Quiz", "choix": ["A", "B"], "correct": ["A"],
+    } for i in range(1, 41)])
+    monkeypatch.setattr(quiz_routes, "get_bank", lambda: bank)
+    monkeypatch.setattr(utils, "get_user_role", lambda username: "prof")
+    yield store
+    use_store(previous)
+
+
+def test_class_variants_are_written_once_and_distinct(store, monkeypatch):
+    calls = []
+    insert_sessions = store.insert_sessions
+
+    def spy(docs):
+        calls.append(len(docs))
+        return insert_sessions(docs)
+
+    monkeypatch.setattr(store, "insert_sessions", spy)
+    monkeypatch.setattr(store, "insert_session", lambda doc: pytest.fail("écriture unitaire"))
+    batch = QuizBatchInput(username="prof_martin", class_size=8, limit=5, theme="BDD", name="Partiel")
+    result = json.loads(quiz_routes.create_quiz_batch(batch).body)
+
+    assert calls == [8] and result["count"] == 8 and len(set(result["quiz_ids"])) == 8
+    sessions = [store.find_session(quiz_id) for quiz_id in result["quiz_ids"]]
+    assert [s["variant"] for s in sessions] == list(range(1, 9))
+    assert len({s["batch_id"] for s in sessions}) == 1
+    variants = {frozenset(q["qid"] for q in s["questions"]) for s in sessions}
+    assert len(variants) == 8 and all(len(v) == 5 for v in variants)
+
+
+def test_class_size_is_bounded():
+    assert QuizBatchInput(username="prof_martin", class_size=1000).class_size == 1000
+    for size in (0, 1001):
+        with pytest.raises(ValidationError):
+            QuizBatchInput(username="prof_martin", class_size=size)
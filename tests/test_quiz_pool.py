@@ -0,0 +1,23 @@
+"""Réserve de quiz : demande bornée aux thèmes de la banque et décroissante."""
+from app import quiz_pool as module
+from app.generator import QuestionBank
+from app.quiz_pool import QuizPool
+
+
+def test_demand_ignores_unknown_themes_and_decays(monkeypatch):
+    bank = QuestionBank([{
+        "_id": i, "ordinal": i + 1, "qid": f"q{i}", "question": f"Question {i}", "theme": "BDD",
+        "test": "Quiz", "choix": ["A", "B"], "correct": ["A"],
+    } for i in range(20)])
+    monkeypatch.setattr(module, "get_bank", lambda: bank)
+    pool = QuizPool(size=2, max_dynamic_keys=2, interval_s=0)
+    for i in range(1000):
+        pool.take(f"inconnu {i}", 5)
+    for _ in range(4):
+        pool.take("BDD", 5)
+    pool.take(None, 10)
+    assert dict(pool._demand) == {("BDD", 5): 4, (None, 10): 1}
+
+    pool.refill()
+    assert dict(pool._demand) == {("BDD", 5): 2}
+    assert len(pool._pools[("BDD", 5)]) == 2
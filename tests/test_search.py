@@ -0,0 +1,56 @@
+"""Recherche plein texte : reconstruction substituée sous verrou, autocomplétion racinisée."""
+import threading
+
+from app.search import SearchIndex, tokenize
+
+
+def _questions(n, word="jointure"):
+    return {i: {"qid": f"q{i}", "question": f"Question {i} sur la {word} des tables",
+                "theme": "BDD", "test": "Quiz", "choix": ["Réseaux", "Élève"], "correct": ["Élève"]}
+            for i in range(1, n + 1)}
+
+
+def test_tokenize_folds_and_stems():
+    assert tokenize("Les requêtes de l'élève") == ["requete", "eleve"]
+
+
+def test_rebuild_keeps_lock_and_replaces_content():
+    index = SearchIndex()
+    index.build(_questions(3))
+    lock = index._lock
+    index.build(_questions(2, word="projection"))
+    assert index._lock is lock
+    assert index.search("jointure") == []
+    assert {r["qid"] for r in index.search("projection")} == {"q1", "q2"}
+
+
+def test_search_during_rebuild_sees_a_whole_index():
+    index = SearchIndex()
+    index.build(_questions(200))
+    errors, stop = [], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                assert len(index.search("jointure tables", limit=500)) in (200, 300)
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for n in (300, 200, 300, 200):
+        index.build(_questions(n))
+    stop.set()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_autocomplete_matches_plural_and_accented_prefixes():
+    index = SearchIndex()
+    index.build(_questions(3))
+    assert "table" in index.autocomplete("jointure des tables")["terms"]
+    assert index.autocomplete("Élèv")["terms"] == ["eleve"]
+    assert index.autocomplete("réseaux")["terms"] == ["reseau"]
+    assert len(index.autocomplete("jointure tables")["questions"]) == 3
@@ -0,0 +1,36 @@
+"""Frontend : 304 comparé à l'ETag de la variante servie (encodage négocié)."""
+import pytest
+from starlette.requests import Request
+
+from app import static
+from app.static import StaticSite, static_response
+
+
+def _request(**headers):
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/app/app.js", "headers": raw})
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    source = tmp_path / "frontend"
+    source.mkdir()
+    (source / "app.js").write_text("console.log('quiz');\n" * 200)
+    site = StaticSite(str(source), str(tmp_path / "build"))
+    monkeypatch.setattr(static, "static_site", site)
+    return site
+
+
+def test_304_only_for_the_served_variant(site):
+    plain = static_response(_request(), "app.js")
+    gzipped = static_response(_request(accept_encoding="gzip"), "app.js")
+    plain_etag, gzip_etag = plain.headers["etag"], gzipped.headers["etag"]
+    assert gzipped.headers["content-encoding"] == "gzip" and plain_etag != gzip_etag
+
+    assert static_response(_request(accept_encoding="gzip", if_none_match=gzip_etag), "app.js").status_code == 304
+    assert static_response(_request(if_none_match=plain_etag), "app.js").status_code == 304
+    # ETag d'une autre variante : corps complet, dans l'encodage négocié
+    response = static_response(_request(if_none_match=gzip_etag), "app.js")
+    assert response.status_code == 200 and "content-encoding" not in response.headers
+    response = static_response(_request(accept_encoding="gzip", if_none_match=plain_etag), "app.js")
+    assert response.status_code == 200 and response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,90 @@
+"""Statistiques par question : choix comptés, reprise après écriture partielle, suivi par qid."""
+import pytest
+
+from app import stats
+from app.stats import QuestionStatsAccumulator
+from app.storage import PartialWriteError, use_store
+from app.storage.sqlite import SQLiteStore
+
+
+@pytest.fixture
+def store():
+    store = SQLiteStore(":memory:")
+    store.ensure_indexes()
+    previous = use_store(store)
+    yield store
+    use_store(previous)
+
+
+def test_only_known_choices_are_counted():
+    rows = []
+    acc = QuestionStatsAccumulator(writer=rows.extend)
+    acc.record("q1", "Q", ["A", "", "inventé"], False, choix=["A", "B"])
+    acc.record("q1", "Q", ["B"], True, choix=["A", "B"])
+    acc.record(None, "Q", ["A"], True, choix=["A", "B"])
+    acc.flush()
+    assert rows[0]["qid"] == "q1" and rows[0]["question"] == "Q"
+    assert rows[0]["attempts"] == 2 and rows[0]["correct"] == 1
+    assert rows[0]["choices"] == {"A": 1, "B": 1}
+
+
+def test_partial_failure_remerges_only_failed_rows():
+    written = []
+
+    def writer(rows):
+        if not written:
+            written.append([r for r in rows if r["qid"] == "q1"])
+            raise PartialWriteError("échec partiel", [r for r in rows if r["qid"] != "q1"])
+        written.append(rows)
+
+    acc = QuestionStatsAccumulator(writer=writer)
+    acc.record("q1", "Q1", ["A"], True, choix=["A"])
+    acc.record("q2", "Q2", ["A"], True, choix=["A"])
+    assert acc.flush() == 0
+    acc.flush()
+
+    assert [r["qid"] for r in written[1]] == ["q2"]
+    assert sum(r["attempts"] for batch in written for r in batch) == 2
+
+
+def _counted(store, monkeypatch):
+    acc = QuestionStatsAccumulator(writer=store.increment_question_stats)
+    monkeypatch.setattr(stats, "question_stats", acc)
+    acc.record("q1", "Même intitulé", ["A"], True, "t", "T1", ["A", "B"])
+    acc.record("q2", "Même intitulé", ["B"], False, "t", "T1", ["A", "B"])
+    acc.flush()
+    return acc
+
+
+def test_deleting_a_question_keeps_stats_of_same_wording(store, monkeypatch):
+    _counted(store, monkeypatch)
+    stats._sync_question_stats("deleted", {"qid": "q1", "question": "Même intitulé"})
+    assert [row["qid"] for row in stats.list_question_stats()] == ["q2"]
+
+
+def test_editing_a_question_follows_its_stats(store, monkeypatch):
+    acc = _counted(store, monkeypatch)
+    acc.record("q1", "Même intitulé", ["A"], True, "t", "T1", ["A", "B"])
+    stats._sync_question_stats("updated", {"qid": "q1", "question": "Nouvel intitulé", "theme": "u"})
+    acc.flush()
+
+    row = next(r for r in stats.list_question_stats() if r["qid"] == "q1")
+    assert (row["question"], row["theme"], row["attempts"]) == ("Nouvel intitulé", "u", 2)
+    other = next(r for r in stats.list_question_stats() if r["qid"] == "q2")
+    assert other["question"] == "Même intitulé"
+
+
+def test_legacy_text_keyed_table_is_set_aside(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE question_stats (question TEXT PRIMARY KEY, theme TEXT, test TEXT, "
+                 "attempts INTEGER, correct INTEGER, choices TEXT)")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteStore(path)
+    store.ensure_indexes()
+    store.increment_question_stats([{"qid": "q1", "question": "Q", "attempts": 1, "correct": 1,
+                                     "choices": {}, "theme": None, "test": None}])
+    assert store.query_question_stats(None, None, "hardest", 1, 10)[0]["qid"] == "q1"
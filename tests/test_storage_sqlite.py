@@ -0,0 +1,121 @@
+"""Stockage SQLite (en mémoire) : questions, sessions, bitsets « déjà vues », journal des modifications."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.changelog import QuestionChangeLog
+from app.storage import use_store
+from app.storage.base import QuestionStore
+from app.storage.sqlite import SQLiteStore
+
+
+@pytest.fixture
+def store():
+    store = SQLiteStore(":memory:")
+    store.ensure_indexes()
+    use_store(store)
+    yield store
+    store.close()
+
+
+def _question(qid, text, ordinal, theme="BDD"):
+    return {"qid": qid, "ordinal": ordinal, "question": text, "theme": theme, "test": "Quiz",
+            "choix": ["A", "B"], "correct": ["A"]}
+
+
+def _change(op, qid, at=None):
+    return {"op": op, "qid": qid, "question": {"qid": qid} if op != "delete" else None,
+            "at": at or datetime.utcnow()}
+
+
+def test_question_insert_update_delete(store):
+    assert store.insert_question(_question("q1", "Un index accélère ?", 1))
+    assert not store.insert_question(_question("q1", "Doublon de qid", 2))
+    inserted = store.insert_questions([_question("q2", "SQL ?", 2), _question("q1", "Encore q1", 3)])
+    assert [d["qid"] for d in inserted] == ["q2"]
+    assert store.count_questions() == 2
+
+    updated = store.update_question("q1", {"question": "Un index accélère la lecture ?", "theme": "SQL"})
+    assert updated["question"] == "Un index accélère la lecture ?" and updated["ordinal"] == 1
+    assert store.find_question_by_text("Un index accélère la lecture ?")["qid"] == "q1"
+    assert sorted(store.distinct("theme")) == ["BDD", "SQL"]
+    assert store.update_question("absente", {"question": "x"}) is None
+
+    assert store.delete_question("q2")["qid"] == "q2"
+    assert store.delete_question("q2") is None
+    assert [d["qid"] for d in store.delete_questions_by_text("Un index accélère la lecture ?")] == ["q1"]
+    assert store.count_questions() == 0
+
+
+def test_ordinals_are_reserved_after_counter(store):
+    first = store.next_ordinals(3)
+    store.raise_ordinal_counter(100)
+    assert list(first) == [1, 2, 3] and list(store.next_ordinals(2)) == [101, 102]
+
+
+def test_sessions(store):
+    now = datetime.utcnow()
+    quiz_id = store.insert_session({"user": "alice", "created_at": now - timedelta(minutes=1),
+                                    "questions": [{"question": "Q"}]})
+    other = store.insert_sessions([{"user": "bob", "created_at": now, "questions": []}])[0]
+    assert store.find_session(quiz_id)["questions"] == [{"question": "Q"}]
+    assert [s["_id"] for s in store.list_sessions()] == [other, quiz_id]
+    assert [s["_id"] for s in store.list_sessions("alice")] == [quiz_id]
+    assert store.delete_session(quiz_id) and not store.delete_session(quiz_id)
+    assert store.find_session(quiz_id) is None
+
+
+def test_seen_bitset_versioning(store):
+    assert store.load_seen("alice") == (b"", None)
+    assert store.save_seen("alice", b"\x01", None)
+    assert not store.save_seen("alice", b"\x02", None)  # déjà créé par un autre worker
+    bits, version = store.load_seen("alice")
+    assert bits == b"\x01" and version == 1
+    assert store.save_seen("alice", b"\x03", version)
+    assert not store.save_seen("alice", b"\x07", version)  # version périmée
+    assert store.load_seen("alice") == (b"\x03", 2)
+
+
+def test_change_log_paging(store):
+    seqs = store.append_question_changes([_change("insert", f"q{i}") for i in range(5)])
+    assert seqs == [1, 2, 3, 4, 5]
+    log = QuestionChangeLog(page_limit=2, gap_wait_s=0)
+    page = log.since(0)
+    assert [c["seq"] for c in page["changes"]] == [1, 2] and page["has_more"]
+    page = log.since(page["seq"])
+    assert [c["seq"] for c in page["changes"]] == [3, 4] and page["has_more"]
+    page = log.since(page["seq"])
+    assert [c["seq"] for c in page["changes"]] == [5] and not page["has_more"]
+    assert log.since(None)["seq"] == 5
+    assert log.since(6)["resync"]
+
+
+def test_change_log_compaction(store):
+    old = datetime.utcnow() - timedelta(minutes=5)
+    store.append_question_changes([_change("insert", "q1", old), _change("update", "q1", old),
+                                   _change("insert", "q2", old), _change("insert", "q3")])
+    store.append_question_changes([_change("update", "q3")])
+    # q1 ne garde que sa dernière entrée ; celles de q3, trop récentes, sont toutes gardées
+    settled = datetime.utcnow() - timedelta(minutes=1)
+    assert store.compact_question_changes(0, settled) == 1
+    assert [e["seq"] for e in store.question_changes_since(0, 10)] == [2, 3, 4, 5]
+    # Plancher relevé : les entrées jusqu'à 3 disparaissent, un client plus ancien doit se resynchroniser
+    assert store.compact_question_changes(3, settled) == 2
+    assert store.question_changes_bounds() == (3, 5)
+
+    log = QuestionChangeLog(gap_wait_s=0)
+    assert log.since(2)["resync"]
+    assert [c["seq"] for c in log.since(3)["changes"]] == [4, 5]
+    floor = log.record_reset()
+    assert store.question_changes_bounds() == (floor, floor)
+    assert log.since(5)["resync"] and log.since(floor)["changes"] == []
+
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class Partial(QuestionStore):
+        def ping(self, timeout_s=2.0):
+            return True
+
+    with pytest.raises(TypeError):
+        Partial()
+    assert isinstance(SQLiteStore(":memory:"), QuestionStore)